@@ -0,0 +1,238 @@
+"""
+ASGI entry point for the async serving mode (``python start.py async``).
+
+The description routes can wait seconds for Gemini, so they are served
+natively on the event loop with the SDK's async client: one worker keeps
+many LLM calls pending while it keeps answering predictions. Every other
+route runs through the Flask app via ``WsgiToAsgi``, which handles the
+requests of a worker one at a time on a single thread, so none of them may
+wait on Gemini.
+
+Native routes still run inside a Flask request context built from the ASGI
+scope, so ``request``, ``jsonify`` and the app's before/after/teardown hooks
+apply to them as to any other route.
+"""
+
+from contextlib import aclosing
+import asyncio
+import io
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import Response, jsonify, request
+
+from src.app import (
+    app as flask_app,
+    description_event,
+    description_get_response,
+    description_get_shortcut,
+    event_stream_response,
+    logger,
+    _description_response,
+)
+from src.utils.descriptions import (
+    get_description_stat,
+    get_disease_description_async,
+    stream_disease_description_async,
+)
+
+wsgi_app = WsgiToAsgi(flask_app)
+
+
+class AsyncStreamResponse(Response):
+    """Response whose body is sent from an async iterator of text chunks."""
+
+    def __init__(self, chunks, **kwargs):
+        super().__init__(**kwargs)
+        self.chunks = chunks
+
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    return body
+
+
+def _environ(scope, body):
+    """WSGI environ of an ASGI HTTP request, for a Flask request context."""
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO": scope["path"].encode().decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": (scope.get("server") or ("localhost", 80))[0],
+        "SERVER_PORT": str((scope.get("server") or ("localhost", 80))[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "REMOTE_ADDR": (scope.get("client") or ("", 0))[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin1").upper().replace("-", "_")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        value = value.decode("latin1")
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _stream_body(send, chunks):
+    async with aclosing(chunks):
+        async for chunk in chunks:
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": chunk.encode(),
+                    "more_body": True,
+                }
+            )
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _send_response(receive, send, response, head=False):
+    """
+    Sends a Flask response, only its headers when ``head``. The body of an
+    ``AsyncStreamResponse`` is cancelled when the client disconnects, which
+    uvicorn does not report through ``send``.
+    """
+    streamed = isinstance(response, AsyncStreamResponse)
+    if streamed:
+        del response.headers["Content-Length"]
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in response.headers.items()
+            ],
+        }
+    )
+    if head:
+        await send({"type": "http.response.body", "body": b""})
+        return
+    if not streamed:
+        await send({"type": "http.response.body", "body": response.get_data()})
+        return
+
+    streaming = asyncio.ensure_future(_stream_body(send, response.chunks))
+    watching = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await asyncio.wait({streaming, watching}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (streaming, watching):
+            task.cancel()
+        await asyncio.gather(streaming, watching, return_exceptions=True)
+
+
+async def _serve(scope, receive, send, view):
+    """
+    Runs a coroutine view like Flask dispatches a route: in a request
+    context, between the app's before_request and after_request hooks.
+    """
+    environ = _environ(scope, await _read_body(receive))
+    with flask_app.request_context(environ):
+        try:
+            response = flask_app.preprocess_request()
+            if response is None:
+                response = await view()
+        except Exception as e:
+            logger.error(f"Unhandled error in {scope['path']}: {e}")
+            response = jsonify(error="Internal server error"), 500
+        response = flask_app.process_response(flask_app.make_response(response))
+        await _send_response(receive, send, response, head=scope["method"] == "HEAD")
+
+
+async def disease_description():
+    """The Flask POST route, generating with the async Gemini client"""
+    data = request.get_json(silent=True)
+    if not data or "disease_name" not in data:
+        return jsonify(error="No disease name provided"), 400
+
+    try:
+        disease_name = data["disease_name"]
+        description = await get_disease_description_async(disease_name)
+        if description:
+            return _description_response(
+                description, get_description_stat(disease_name)
+            )
+        return jsonify(error="Description not found for the given disease"), 404
+    except Exception as e:
+        logger.error(f"Description lookup error: {e}")
+        return jsonify(error="Description lookup failed"), 500
+
+
+async def disease_description_get():
+    """The cacheable Flask GET route, generating with the async Gemini client"""
+    try:
+        response = description_get_shortcut()
+        if response is not None:
+            return response
+        disease_name = request.args["disease_name"]
+        description = await get_disease_description_async(disease_name)
+        return description_get_response(disease_name, description)
+    except Exception as e:
+        logger.error(f"Description lookup error: {e}")
+        return jsonify(error="Description lookup failed"), 500
+
+
+async def disease_description_stream():
+    """The Flask stream route, relayed from the async Gemini client"""
+    data = request.get_json(silent=True) or request.args
+    if not data or "disease_name" not in data:
+        return jsonify(error="No disease name provided"), 400
+    disease_name = data["disease_name"]
+
+    async def events():
+        try:
+            async for chunk in stream_disease_description_async(disease_name):
+                yield description_event(chunk)
+            yield description_event()
+        except Exception as e:
+            yield description_event(error=e)
+
+    return event_stream_response(events(), AsyncStreamResponse)
+
+
+# (method, path) -> coroutine view served in a Flask request context
+NATIVE_ROUTES = {
+    ("POST", "/disease_description"): disease_description,
+    ("GET", "/disease_description"): disease_description_get,
+    ("HEAD", "/disease_description"): disease_description_get,
+    ("GET", "/disease_description/stream"): disease_description_stream,
+    ("POST", "/disease_description/stream"): disease_description_stream,
+}
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] == "http":
+        view = NATIVE_ROUTES.get((scope["method"], scope["path"]))
+        if view is not None:
+            return await _serve(scope, receive, send, view)
+    return await wsgi_app(scope, receive, send)
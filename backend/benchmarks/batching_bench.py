@@ -0,0 +1,166 @@
+"""
+Throughput vs added latency of micro-batched inference per batching window.
+
+For every window in ``--windows`` (microseconds, 0 = no batching)
+``--clients`` threads predict single rows back to back for ``--duration``
+seconds. By default they call the predictor in process, which isolates the
+scheduler. With ``--server`` they post to ``/predict`` on the real gunicorn
+config instead, as one gthread worker (32 threads) with the prediction
+cache and case index off, so every request reaches the model.
+
+The report gives throughput, latency percentiles and mean rows per model
+call, each relative to running without batching.
+
+    python -m benchmarks.batching_bench --windows 0 100 250 500 1000 2000
+"""
+
+import argparse
+import os
+import signal
+import threading
+import time
+
+from benchmarks.common import (
+    latency_summary,
+    load_dataset,
+    load_model,
+    silence_sklearn_warnings,
+    skewed_rows,
+    write_report,
+)
+from benchmarks.load_test import CACHE_MODES, LoadGenerator, sample_cases
+from benchmarks.serving_mode_bench import start_server
+from src.utils import metrics
+from src.utils.batching import MicroBatcher
+from src.utils.inference import BACKENDS, create_predictor
+
+
+def batch_rows_observed():
+    """(model calls, rows) recorded by the micro-batcher so far."""
+    count = total = 0.0
+    for metric in metrics.INFERENCE_BATCH_ROWS.collect():
+        for sample in metric.samples:
+            if sample.name.endswith("_count"):
+                count = sample.value
+            elif sample.name.endswith("_sum"):
+                total = sample.value
+    return count, total
+
+
+def run_in_process(predictor, window, args, rows):
+    if window > 0:
+        predictor = MicroBatcher(predictor, window, args.max_rows)
+    calls_before, rows_before = batch_rows_observed()
+    latencies = [[] for _ in range(args.clients)]
+    deadline = time.perf_counter() + args.duration
+
+    def client(index):
+        position = index
+        timings = latencies[index]
+        while time.perf_counter() < deadline:
+            row = rows[position % len(rows)][None, :]
+            started = time.perf_counter()
+            predictor.predict_proba(row)
+            timings.append(time.perf_counter() - started)
+            position += args.clients
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    calls, batched_rows = batch_rows_observed()
+    calls -= calls_before
+    timings = [seconds for client_timings in latencies for seconds in client_timings]
+    return {
+        "requests": len(timings),
+        "throughput_rps": round(len(timings) / elapsed, 1),
+        "latency": latency_summary(timings),
+        "mean_batch_rows": (
+            round((batched_rows - rows_before) / calls, 2) if calls else 1.0
+        ),
+    }
+
+
+def run_server(window, args, cases):
+    env = dict(
+        os.environ,
+        INFERENCE_BATCH_WINDOW_US=str(window),
+        INFERENCE_BATCH_MAX_ROWS=str(args.max_rows),
+        **CACHE_MODES["off"],
+    )
+    server = start_server("gthread", args.port, 1, env)
+    try:
+        generator = LoadGenerator(args.port, {"predict": 1.0}, cases)
+        generator.closed_loop(args.clients, 1.0)
+        generator.results = []
+        started = time.perf_counter()
+        generator.closed_loop(args.clients, args.duration)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+    timings = [seconds for _, status, seconds in generator.results if status == 200]
+    return {
+        "requests": len(generator.results),
+        "errors": len(generator.results) - len(timings),
+        "throughput_rps": round(len(generator.results) / elapsed, 1),
+        "latency": latency_summary(timings or [0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--windows", nargs="+", type=float, default=[0, 100, 250, 500, 1000, 2000]
+    )
+    parser.add_argument("--max-rows", type=int, default=64)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--backend", choices=BACKENDS, default="flat")
+    parser.add_argument("--server", action="store_true")
+    parser.add_argument("--port", type=int, default=8771)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    if args.server:
+        cases = sample_cases("partial", 20000, keys=0)
+        results = [run_server(window, args, cases) for window in args.windows]
+    else:
+        silence_sklearn_warnings()
+        predictor = create_predictor(load_model(), args.backend)
+        features, _ = load_dataset()
+        rows = skewed_rows(features, 5000, 20000)
+        results = [
+            run_in_process(predictor, window, args, rows) for window in args.windows
+        ]
+
+    baseline = results[0]
+    report = []
+    for window, result in zip(args.windows, results):
+        report.append(
+            {
+                "window_us": window,
+                "max_rows": args.max_rows,
+                "clients": args.clients,
+                "mode": "server" if args.server else "in_process",
+                **result,
+                "throughput_ratio": round(
+                    result["throughput_rps"] / baseline["throughput_rps"], 2
+                ),
+                "added_p50_ms": round(
+                    result["latency"]["p50_ms"] - baseline["latency"]["p50_ms"], 3
+                ),
+                "added_p99_ms": round(
+                    result["latency"]["p99_ms"] - baseline["latency"]["p99_ms"], 3
+                ),
+            }
+        )
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Helpers shared by the benchmark scripts.
+
+Run every benchmark from the backend directory as a module, e.g.
+``python -m benchmarks.prediction_cache_bench``, so ``src`` is importable and
+relative paths such as ``src/model/model.joblib`` resolve like in the app.
+"""
+
+from pathlib import Path
+import csv
+import json
+import warnings
+
+import numpy as np
+from joblib import load
+
+from src.utils.registry import disease_names
+
+DATASET_PATH = Path(__file__).resolve().parents[2] / "ml" / "MultiDiseaseDataset.csv"
+MODEL_PATH = "src/model/model.joblib"
+
+
+def load_dataset(path=DATASET_PATH):
+    """
+    Reads the training dataset.
+
+    Returns:
+        tuple: (uint8 feature matrix, int label array) in model column order.
+    """
+    with open(path, newline="") as file:
+        rows = list(csv.reader(file))[1:]
+    features = np.array([row[:-1] for row in rows], dtype=np.uint8)
+    label_of = {name: index for index, name in enumerate(disease_names)}
+    labels = np.array([label_of[row[-1]] for row in rows], dtype=np.intp)
+    return features, labels
+
+
+def load_model(path=MODEL_PATH):
+    """Loads the sklearn forest without version-mismatch noise."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return load(path)
+
+
+def silence_sklearn_warnings():
+    """Hides the per-call feature-name warning when predicting on arrays."""
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def row_mask(row):
+    """Canonical symptom bitmask of one encoded row."""
+    mask = 0
+    for column in np.flatnonzero(row):
+        mask |= 1 << int(column)
+    return mask
+
+
+def skewed_rows(features, n_keys, n_samples, seed=0, exponent=1.1):
+    """
+    Draws a Zipf-skewed request stream over ``n_keys`` distinct symptom sets.
+
+    The key universe is every distinct training row plus random one-symptom
+    perturbations of them, so it contains both textbook and unseen cases.
+
+    Returns:
+        numpy.ndarray: Matrix of ``n_samples`` encoded rows.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.unique(features, axis=0)
+    while len(keys) < n_keys:
+        extra = keys[rng.integers(len(keys), size=n_keys)].copy()
+        flip = rng.integers(features.shape[1], size=n_keys)
+        extra[np.arange(n_keys), flip] ^= 1
+        keys = np.unique(np.vstack([keys, extra]), axis=0)
+    keys = keys[rng.permutation(len(keys))[:n_keys]]
+    weights = 1.0 / np.arange(1, n_keys + 1) ** exponent
+    picks = rng.choice(n_keys, size=n_samples, p=weights / weights.sum())
+    return keys[picks]
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean of a list of durations, in milliseconds."""
+    values = np.asarray(seconds) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 4),
+        "p95_ms": round(float(np.percentile(values, 95)), 4),
+        "p99_ms": round(float(np.percentile(values, 99)), 4),
+        "mean_ms": round(float(values.mean()), 4),
+    }
+
+
+def write_report(report, output):
+    """Prints ``report`` as JSON and optionally writes it to ``output``."""
+    text = json.dumps(report, indent=2)
+    print(text)
+    if output:
+        Path(output).write_text(text + "\n")
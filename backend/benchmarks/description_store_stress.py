@@ -0,0 +1,222 @@
+"""
+Concurrent writers against the description cache file.
+
+Forks N worker processes that each write their own set of descriptions into
+the same store at the same time while reader processes keep looking entries
+up. Runs once with the old JSON read-modify-write code and once with the
+SQLite ``DescriptionStore``, and reports lost entries, read errors and
+per-lookup latency on a hit for both.
+
+    python -m benchmarks.description_store_stress --workers 16
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.common import latency_summary, write_report
+from src.utils.data import diseases
+from src.utils.description_store import DescriptionStore
+from src.utils.descriptions import LEGACY_CACHE_PATH
+
+
+class LegacyStore:
+    """The previous behaviour: parse the file per lookup, rewrite it per miss."""
+
+    def __init__(self, path):
+        self.path = f"{path}.json"
+        if not os.path.exists(self.path):
+            with open(self.path, "w") as file:
+                json.dump({}, file)
+
+    def get(self, disease_name):
+        with open(self.path, "r") as file:
+            return json.load(file).get(disease_name)
+
+    def put(self, disease_name, description):
+        with open(self.path, "r") as file:
+            entries = json.load(file)
+        entries[disease_name] = description
+        with open(self.path, "w") as file:
+            json.dump(entries, file)
+
+
+def sqlite_store(path):
+    return DescriptionStore(f"{path}.db", model="bench", prompt_version="1")
+
+
+STORES = {"legacy": LegacyStore, "sqlite": sqlite_store}
+
+
+def _write(store_name, path, worker, keys, barrier, errors):
+    store = STORES[store_name](path)
+    barrier.wait()
+    for key in keys:
+        try:
+            store.put(key, f"description of {key} by worker {worker}")
+        except ValueError:
+            errors.put(1)
+
+
+def _read(store_name, path, keys, stop, errors):
+    store = STORES[store_name](path)
+    failed = 0
+    while not stop.is_set():
+        for key in keys:
+            try:
+                store.get(key)
+            except ValueError:
+                failed += 1
+    errors.put(failed)
+
+
+def _drain(queue):
+    total = 0
+    while not queue.empty():
+        total += queue.get()
+    return total
+
+
+def stress(store_name, workers, keys_per_worker, readers):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "descriptions")
+    STORES[store_name](path)
+
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(workers)
+    write_errors = context.Queue()
+    read_errors = context.Queue()
+    expected = {}
+    processes = []
+    for worker in range(workers):
+        keys = [
+            f"{diseases[i % len(diseases)]} #{worker}.{i}"
+            for i in range(keys_per_worker)
+        ]
+        expected.update(dict.fromkeys(keys))
+        processes.append(
+            context.Process(
+                target=_write,
+                args=(store_name, path, worker, keys, barrier, write_errors),
+            )
+        )
+
+    # Readers are processes too: SQLite connections must not cross a fork,
+    # so the parent opens none until every child has been started
+    stop = context.Event()
+    sample = list(expected)[:: max(len(expected) // 50, 1)]
+    reader_processes = [
+        context.Process(
+            target=_read, args=(store_name, path, sample, stop, read_errors)
+        )
+        for _ in range(readers)
+    ]
+    started = time.perf_counter()
+    for process in reader_processes + processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    for process in reader_processes:
+        process.join()
+
+    store = STORES[store_name](path)
+    try:
+        stored = {key for key in expected if store.get(key) is not None}
+        corrupt = False
+    except ValueError:
+        stored, corrupt = set(), True
+    shutil.rmtree(directory)
+
+    return {
+        "store": store_name,
+        "workers": workers,
+        "entries_written": len(expected),
+        "entries_stored": len(stored),
+        "lost_entries": len(expected) - len(stored),
+        "file_corrupt": corrupt,
+        "write_errors": _drain(write_errors),
+        "read_errors": _drain(read_errors),
+        "seconds": round(elapsed, 3),
+    }
+
+
+def lookup_latency(store_name, source, lookups):
+    """Hit latency with the descriptions of the former JSON cache file."""
+    with open(source, "r") as file:
+        entries = json.load(file) or {"missing": ""}
+    directory = tempfile.mkdtemp()
+    store = STORES[store_name](os.path.join(directory, "descriptions"))
+    for name, text in entries.items():
+        store.put(name, text)
+    keys = list(entries)
+    latencies = []
+    for i in range(lookups):
+        started = time.perf_counter()
+        store.get(keys[i % len(keys)])
+        latencies.append(time.perf_counter() - started)
+    shutil.rmtree(directory)
+    return {
+        "store": store_name,
+        "cache_file_bytes": os.path.getsize(source),
+        "latency": latency_summary(latencies),
+    }
+
+
+def lookup_at_scale(entries, lookups):
+    """SQLite hit latency once the table holds ``entries`` rows."""
+    directory = tempfile.mkdtemp()
+    store = sqlite_store(os.path.join(directory, "descriptions"))
+    store.put(diseases[0], "")
+    versions = -(-entries // len(diseases))
+    store._connection().executemany(
+        "INSERT OR IGNORE INTO descriptions"
+        " (disease, prompt_version, model, description, digest, created_at, ttl)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (name, f"v{version}", "bench", "x" * 2000, "", time.time(), None)
+            for version in range(versions)
+            for name in diseases
+        ),
+    )
+    rows = len(store)
+    latencies = []
+    for i in range(lookups):
+        started = time.perf_counter()
+        store.get(diseases[i % len(diseases)])
+        latencies.append(time.perf_counter() - started)
+    shutil.rmtree(directory)
+    return {"rows": rows, "latency": latency_summary(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--keys-per-worker", type=int, default=41)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--cache", default=LEGACY_CACHE_PATH)
+    parser.add_argument("--scale-entries", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = {
+        "stress": [
+            stress(name, args.workers, args.keys_per_worker, args.readers)
+            for name in STORES
+        ],
+        "lookup": [lookup_latency(name, args.cache, args.lookups) for name in STORES],
+        "sqlite_lookup_at_scale": [
+            lookup_at_scale(entries, args.lookups) for entries in args.scale_entries
+        ],
+    }
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
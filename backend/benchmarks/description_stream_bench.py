@@ -0,0 +1,102 @@
+"""
+Time to first byte of the blocking vs streaming description routes.
+
+Runs the real gunicorn config against the local Gemini stub, which spreads
+its answer over ``--latency`` seconds when streaming, and requests distinct
+uncached diseases from ``/disease_description`` and
+``/disease_description/stream``, then the same diseases again once cached.
+
+    python -m benchmarks.description_stream_bench --latency 3 --diseases 5
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import tempfile
+import time
+
+from benchmarks.common import latency_summary, write_report
+from benchmarks.serving_mode_bench import start_server
+from benchmarks.stub_gemini import start_stub
+from src.utils.data import diseases
+
+ROUTES = {
+    "blocking": "/disease_description",
+    "stream": "/disease_description/stream",
+}
+
+
+def timed_request(port, path, disease_name):
+    """Returns (seconds to first body byte, seconds to the full body)."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    started = time.perf_counter()
+    try:
+        connection.request(
+            "POST",
+            path,
+            json.dumps({"disease_name": disease_name}),
+            {"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        first = response.read(1)
+        ttfb = time.perf_counter() - started
+        body = first + response.read()
+        if response.status != 200 or not body:
+            raise RuntimeError(f"{path} returned {response.status}")
+        return ttfb, time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=3.0)
+    parser.add_argument("--diseases", type=int, default=5)
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency)
+    directory = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GEMINI_BASE_URL=f"http://127.0.0.1:{stub.server_port}",
+        GEMINI_API_KEY="stub",
+        DESCRIPTION_DB_PATH=os.path.join(directory, "descriptions.db"),
+    )
+    server = start_server(args.mode, args.port, 1, env)
+    try:
+        # Imports the Gemini SDK in the worker so it is not part of any timing
+        timed_request(args.port, ROUTES["blocking"], diseases[-1])
+
+        names = iter(diseases)
+        cold = {mode: [next(names) for _ in range(args.diseases)] for mode in ROUTES}
+        report = []
+        for state in ("cold", "cached"):
+            for mode, path in ROUTES.items():
+                timings = [timed_request(args.port, path, name) for name in cold[mode]]
+                report.append(
+                    {
+                        "route": path,
+                        "serving_mode": args.mode,
+                        "state": state,
+                        "requests": len(timings),
+                        "gemini_latency_s": args.latency,
+                        "ttfb": latency_summary([ttfb for ttfb, _ in timings]),
+                        "total": latency_summary([total for _, total in timings]),
+                    }
+                )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+        stub.shutdown()
+        shutil.rmtree(directory)
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Checks conditional GETs of the read-mostly routes answer 304 without body
+work.
+
+Runs the Flask app in process against the local Gemini stub with an empty
+description database. Counts every description read, description
+generation, JSON serialisation and Gemini call made while serving
+revalidations, and compares the latency of full and 304 responses. Exits
+with status 1 if a check fails or any 304 did body work.
+
+    python -m benchmarks.http_cache_check --requests 2000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import latency_summary, write_report
+from benchmarks.stub_gemini import start_stub
+
+
+class Counted:
+    """Wraps a callable and counts its calls."""
+
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        return self.function(*args, **kwargs)
+
+
+def timed(client, path, headers, requests):
+    durations = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.get(path, headers=headers)
+        durations.append(time.perf_counter() - started)
+    return latency_summary(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=0.05)
+    directory = tempfile.mkdtemp()
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["DESCRIPTION_DB_PATH"] = os.path.join(directory, "descriptions.db")
+    from src import app as app_module
+    from src.utils import compression, descriptions
+    from src.utils.data import diseases
+
+    # Everything that builds a body; none of it may run for a 304
+    body_work = {
+        "description_reads": Counted(descriptions.store.get),
+        "description_lookups": Counted(app_module.get_disease_description),
+        "encoded_reads": Counted(descriptions.store.get_encoded),
+        "jsonify": Counted(app_module.jsonify),
+        "json_dumps": Counted(app_module.app.json.dumps),
+        "compress": Counted(compression.compress),
+    }
+    descriptions.store.get = body_work["description_reads"]
+    descriptions.store.get_encoded = body_work["encoded_reads"]
+    app_module.get_disease_description = body_work["description_lookups"]
+    app_module.jsonify = body_work["jsonify"]
+    app_module.app.json.dumps = body_work["json_dumps"]
+    compression.compress = body_work["compress"]
+
+    client = app_module.app.test_client()
+    description_path = f"/disease_description?disease_name={diseases[0]}"
+    paths = ["/symptoms", "/diseases", description_path]
+    checks = {}
+    report = {"checks": checks, "latency": {}}
+
+    first = {path: client.get(path) for path in paths}
+    checks["full responses carry validators"] = all(
+        response.status_code == 200
+        and response.headers.get("ETag")
+        and response.headers.get("Last-Modified")
+        and "max-age" in response.headers.get("Cache-Control", "")
+        for response in first.values()
+    )
+    checks["description generated once"] = stub.calls == 1
+
+    # Compressed variants carry weak ETags that must revalidate as well
+    accept = {"Accept-Encoding": "br, gzip"}
+    compressed = {path: client.get(path, headers=accept) for path in paths}
+
+    calls = {name: counter.calls for name, counter in body_work.items()}
+    gemini_calls = stub.calls
+    revalidations = []
+    for path, response in first.items():
+        revalidations.append(
+            client.get(path, headers={"If-None-Match": response.headers["ETag"]})
+        )
+        revalidations.append(
+            client.get(
+                path, headers={"If-Modified-Since": response.headers["Last-Modified"]}
+            )
+        )
+        revalidations.append(
+            client.get(
+                path,
+                headers={"If-None-Match": compressed[path].headers["ETag"], **accept},
+            )
+        )
+    checks["revalidations answer 304"] = all(
+        response.status_code == 304 and response.data == b""
+        for response in revalidations
+    )
+    report["body_work_during_304"] = {
+        name: counter.calls - calls[name] for name, counter in body_work.items()
+    }
+    report["body_work_during_304"]["gemini_calls"] = stub.calls - gemini_calls
+    checks["304 did no body work"] = not any(report["body_work_during_304"].values())
+
+    stale = client.get(description_path, headers={"If-None-Match": '"stale"'})
+    checks["mismatched ETag gets the full body"] = stale.status_code == 200 and bool(
+        stale.json.get("description")
+    )
+    descriptions.store.put(diseases[0], "Changed description.")
+    changed = client.get(
+        description_path,
+        headers={"If-None-Match": first[description_path].headers["ETag"]},
+    )
+    checks["changed content gets a new ETag"] = (
+        changed.status_code == 200
+        and changed.headers["ETag"] != first[description_path].headers["ETag"]
+    )
+    checks["unknown disease is 404"] = (
+        client.get("/disease_description?disease_name=Unknown").status_code == 404
+    )
+
+    etag = changed.headers["ETag"]
+    report["latency"]["description_200"] = timed(
+        client, description_path, {}, args.requests
+    )
+    report["latency"]["description_304"] = timed(
+        client, description_path, {"If-None-Match": etag}, args.requests
+    )
+    report["latency"]["symptoms_200"] = timed(client, "/symptoms", {}, args.requests)
+    report["latency"]["symptoms_304"] = timed(
+        client,
+        "/symptoms",
+        {"If-None-Match": first["/symptoms"].headers["ETag"]},
+        args.requests,
+    )
+    report["bytes"] = {path: len(response.data) for path, response in first.items()}
+    report["compressed_bytes"] = {
+        path: len(response.data) for path, response in compressed.items()
+    }
+
+    stub.shutdown()
+    shutil.rmtree(directory)
+    write_report(report, args.output)
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
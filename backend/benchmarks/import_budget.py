@@ -0,0 +1,77 @@
+"""
+Cold-start budget for importing the Flask app.
+
+Imports ``src.app`` in fresh interpreters under ``python -X importtime`` and
+exits non-zero when its cumulative import time (which includes loading the
+model) exceeds the budget, or when a module that must stay lazy, such as the
+Gemini SDK, is imported during boot.
+
+    python -m benchmarks.import_budget --budget-ms 2500
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+from benchmarks.common import write_report
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+LAZY_MODULES = ["google.genai"]
+
+
+def import_times(module):
+    """
+    Imports ``module`` in a fresh interpreter.
+
+    Returns:
+        dict: Module name -> cumulative import time in milliseconds.
+    """
+    env = dict(os.environ)
+    env.setdefault("GEMINI_API_KEY", "unused")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return {
+        match.group(4): int(match.group(2)) / 1000
+        for match in IMPORT_LINE.finditer(result.stderr)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="src.app")
+    parser.add_argument("--budget-ms", type=float, default=2500)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--lazy", nargs="*", default=LAZY_MODULES)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.repeats)]
+    best = min(run[args.module] for run in runs)
+    slowest = sorted(
+        (item for item in runs[0].items() if item[0] != args.module),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    eager = [name for name in args.lazy if name in runs[0]]
+
+    report = {
+        "module": args.module,
+        "cumulative_ms": round(best, 1),
+        "budget_ms": args.budget_ms,
+        "eagerly_imported": eager,
+        "slowest_imports_ms": {name: round(ms, 1) for name, ms in slowest[:10]},
+    }
+    report["passed"] = best <= args.budget_ms and not eager
+    write_report(report, args.output)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
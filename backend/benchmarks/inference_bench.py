@@ -0,0 +1,96 @@
+"""
+Latency of the inference backends on single rows and large batches, and
+single-row throughput with ``--threads`` threads predicting at once (what a
+gthread worker does; only backends that release the GIL scale with it).
+
+    python -m benchmarks.inference_bench --backends sklearn flat onnx
+    ONNX_THREADS=4 python -m benchmarks.inference_bench --backends onnx
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.common import (
+    MODEL_PATH,
+    latency_summary,
+    load_dataset,
+    load_model,
+    silence_sklearn_warnings,
+    skewed_rows,
+    write_report,
+)
+from src.utils.inference import BACKENDS, create_predictor
+
+
+def threaded_rows_per_s(predictor, single_rows, threads):
+    """Single-row predictions per second with ``threads`` callers."""
+
+    def client(offset):
+        for row in single_rows[offset::threads]:
+            predictor.predict_proba(row[None, :])
+
+    workers = [threading.Thread(target=client, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return round(len(single_rows) / (time.perf_counter() - started), 1)
+
+
+def bench_backend(name, model, single_rows, batch, repeats, threads):
+    predictor = create_predictor(model, name, source=MODEL_PATH)
+    predictor.predict_proba(single_rows[:1])
+
+    single = []
+    for row in single_rows:
+        started = time.perf_counter()
+        predictor.predict_proba(row[None, :])
+        single.append(time.perf_counter() - started)
+
+    batches = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        predictor.predict_proba(batch)
+        batches.append(time.perf_counter() - started)
+
+    return {
+        "backend": name,
+        "predictor": type(predictor).__name__,
+        "single_row": latency_summary(single),
+        "batch_rows": len(batch),
+        "batch_best_ms": round(min(batches) * 1000, 3),
+        "batch_rows_per_s": round(len(batch) / min(batches), 1),
+        "threads": threads,
+        "threaded_single_rows_per_s": threaded_rows_per_s(
+            predictor, single_rows, threads
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS)
+    parser.add_argument("--single-rows", type=int, default=500)
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    silence_sklearn_warnings()
+    model = load_model()
+    features, _ = load_dataset()
+    single_rows = skewed_rows(features, args.single_rows, args.single_rows)
+    batch = skewed_rows(features, 5000, args.batch_rows, seed=1)
+
+    report = [
+        bench_backend(name, model, single_rows, batch, args.repeats, args.threads)
+        for name in args.backends
+    ]
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
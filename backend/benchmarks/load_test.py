@@ -0,0 +1,295 @@
+"""
+Load test of the real gunicorn config against the local Gemini stub.
+
+For every combination of ``--worker-classes``, ``--workers`` and
+``--cache-modes`` it starts ``gunicorn.conf.py`` with a fresh description
+store, then drives ``/predict``, ``/disease_description`` and ``/health`` in
+the proportions of ``--mix`` for ``--duration`` seconds. Symptom sets are
+drawn from ``ml/MultiDiseaseDataset.csv``:
+
+- ``dataset``: whole training rows, as often as they occur in the file
+- ``partial``: training rows with only some of their symptoms kept, like
+  users who enter the first few symptoms they notice
+- ``skewed``: a Zipf-skewed stream over ``--keys`` distinct symptom sets,
+  the training rows and one-symptom changes of them
+- ``random``: 1 to 17 symptoms picked uniformly
+
+and description requests ask for the disease of the drawn row. By default
+``--concurrency`` clients send requests back to back (closed loop). With
+``--rate`` requests instead arrive as a Poisson process at that many per
+second (open loop) and latency counts from the scheduled arrival, so a
+saturated server shows up as queueing delay rather than fewer requests.
+
+Prints one JSON entry per configuration with throughput, p50/p95/p99
+latency and status codes, overall and per route.
+
+    python -m benchmarks.load_test --worker-classes sync gthread \\
+        --workers 2 4 --cache-modes local shared --duration 30 \\
+        --mix predict=80 disease_description=15 health=5 --concurrency 16
+"""
+
+import argparse
+from collections import Counter, defaultdict
+import itertools
+import os
+import random
+import shutil
+import signal
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.common import latency_summary, load_dataset, skewed_rows, write_report
+from benchmarks.serving_mode_bench import MODES, request, start_server
+from benchmarks.stub_gemini import start_stub
+from src.utils.registry import disease_names, display_columns
+
+ROUTES = {
+    "predict": ("POST", "/predict"),
+    "disease_description": ("POST", "/disease_description"),
+    "health": ("GET", "/health"),
+}
+DISTRIBUTIONS = ["dataset", "partial", "skewed", "random"]
+# Environment of each prediction cache mode
+CACHE_MODES = {
+    "local": {"PREDICTION_CACHE_BACKEND": "local"},
+    "shared": {"PREDICTION_CACHE_BACKEND": "shared"},
+    "off": {"PREDICTION_CACHE_SIZE": "0", "CASE_INDEX": "0"},
+}
+
+
+def parse_mix(items):
+    """``["predict=80", "health=5"]`` -> ``{"predict": 0.94.., "health": 0.05..}``"""
+    weights = {}
+    for item in items:
+        route, _, weight = item.partition("=")
+        if route not in ROUTES:
+            raise SystemExit(f"Unknown route in --mix: {route}")
+        weights[route] = float(weight or 1)
+    total = sum(weights.values())
+    return {route: weight / total for route, weight in weights.items()}
+
+
+def sample_cases(distribution, n_cases, keys, seed=0):
+    """
+    Draws request bodies from the training dataset.
+
+    Returns:
+        list: ``(display names, disease name)`` pairs.
+    """
+    features, labels = load_dataset()
+    rng = np.random.default_rng(seed)
+    display_of = {}
+    for name, column in display_columns.items():
+        display_of.setdefault(column, name)
+
+    if distribution == "skewed":
+        rows = skewed_rows(features, keys, n_cases, seed)
+        row_labels = [None] * n_cases
+    elif distribution == "random":
+        rows = np.zeros((n_cases, features.shape[1]), dtype=np.uint8)
+        for row in rows:
+            row[rng.choice(len(row), rng.integers(1, 18), replace=False)] = 1
+        row_labels = [None] * n_cases
+    else:
+        picks = rng.integers(len(features), size=n_cases)
+        rows = features[picks].copy()
+        row_labels = labels[picks]
+        if distribution == "partial":
+            for row in rows:
+                present = np.flatnonzero(row)
+                drop = rng.permutation(present)[rng.integers(1, len(present) + 1) :]
+                row[drop] = 0
+
+    cases = []
+    for row, label in zip(rows, row_labels):
+        if label is None:
+            label = rng.integers(len(disease_names))
+        columns = np.flatnonzero(row)
+        names = [display_of[int(column)] for column in columns if column in display_of]
+        cases.append((names or [display_of[0]], str(disease_names[label])))
+    return cases
+
+
+class LoadGenerator:
+    """Sends a mix of requests and records (route, status, seconds)."""
+
+    def __init__(self, port, mix, cases, seed=0):
+        self.port = port
+        self.routes = list(mix)
+        self.weights = list(mix.values())
+        self.cases = cases
+        self.results = []
+        self._lock = threading.Lock()
+        self._seed = itertools.count(seed)
+
+    def send(self, rng, scheduled=None):
+        route = rng.choices(self.routes, self.weights)[0]
+        symptoms, disease_name = self.cases[rng.randrange(len(self.cases))]
+        body = None
+        if route == "predict":
+            body = {"symptoms": symptoms}
+        elif route == "disease_description":
+            body = {"disease_name": disease_name}
+        method, path = ROUTES[route]
+        status, seconds = request(self.port, method, path, body)
+        if scheduled is not None:
+            seconds = time.perf_counter() - scheduled
+        with self._lock:
+            self.results.append((route, status, seconds))
+
+    def closed_loop(self, concurrency, duration):
+        """Each of ``concurrency`` clients sends its next request on reply."""
+        deadline = time.perf_counter() + duration
+
+        def client():
+            rng = random.Random(next(self._seed))
+            while time.perf_counter() < deadline:
+                self.send(rng)
+
+        self._run([threading.Thread(target=client) for _ in range(concurrency)])
+
+    def open_loop(self, rate, concurrency, duration):
+        """Poisson arrivals at ``rate`` per second, served by a client pool."""
+        rng = random.Random(next(self._seed))
+        arrivals = []
+        at = 0.0
+        while True:
+            at += rng.expovariate(rate)
+            if at >= duration:
+                break
+            arrivals.append(at)
+        started = time.perf_counter()
+        queue = iter(arrivals)
+        queue_lock = threading.Lock()
+
+        def client():
+            client_rng = random.Random(next(self._seed))
+            while True:
+                with queue_lock:
+                    at = next(queue, None)
+                if at is None:
+                    return
+                scheduled = started + at
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self.send(client_rng, scheduled)
+
+        self._run([threading.Thread(target=client) for _ in range(concurrency)])
+
+    @staticmethod
+    def _run(threads):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+def summarize(results, seconds):
+    """Throughput, latency and status codes of a list of results."""
+    latencies = [latency for _, status, latency in results if status == 200]
+    return {
+        "requests": len(results),
+        "throughput_rps": round(len(results) / seconds, 1),
+        "statuses": dict(Counter(str(status) for _, status, _ in results)),
+        "latency": latency_summary(latencies or [0]),
+    }
+
+
+def run(worker_class, workers, cache_mode, args, cases, stub):
+    directory = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GEMINI_BASE_URL=f"http://127.0.0.1:{stub.server_port}",
+        GEMINI_API_KEY="stub",
+        DESCRIPTION_DB_PATH=os.path.join(directory, "descriptions.db"),
+        **CACHE_MODES[cache_mode],
+    )
+    calls_before = stub.calls
+    server = start_server(worker_class, args.port, workers, env)
+    try:
+        generator = LoadGenerator(args.port, args.mix, cases, args.seed)
+        if args.warmup:
+            generator.closed_loop(args.concurrency, args.warmup)
+            generator.results = []
+        started = time.perf_counter()
+        if args.rate:
+            generator.open_loop(args.rate, args.concurrency, args.duration)
+        else:
+            generator.closed_loop(args.concurrency, args.duration)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+        shutil.rmtree(directory)
+
+    by_route = defaultdict(list)
+    for result in generator.results:
+        by_route[result[0]].append(result)
+    return {
+        "worker_class": worker_class,
+        "workers": workers,
+        "cache_mode": cache_mode,
+        "distribution": args.distribution,
+        "mix": {route: round(share, 3) for route, share in args.mix.items()},
+        "concurrency": args.concurrency,
+        "arrival_rate_rps": args.rate,
+        "duration_s": round(elapsed, 2),
+        "gemini_latency_s": args.latency,
+        "gemini_calls": stub.calls - calls_before,
+        **summarize(generator.results, elapsed),
+        "routes": {
+            route: summarize(results, elapsed) for route, results in by_route.items()
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--worker-classes", nargs="+", choices=MODES, default=["sync"])
+    parser.add_argument("--workers", nargs="+", type=int, default=[4])
+    parser.add_argument(
+        "--cache-modes", nargs="+", choices=CACHE_MODES, default=["local"]
+    )
+    parser.add_argument(
+        "--mix",
+        nargs="+",
+        default=["predict=80", "disease_description=15", "health=5"],
+        help="route=weight pairs; routes: " + ", ".join(ROUTES),
+    )
+    parser.add_argument("--distribution", choices=DISTRIBUTIONS, default="partial")
+    parser.add_argument("--keys", type=int, default=5000)
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--rate", type=float, help="Open-loop arrivals per second instead"
+    )
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--port", type=int, default=8769)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+    args.mix = parse_mix(args.mix)
+
+    cases = sample_cases(args.distribution, args.cases, args.keys, args.seed)
+    stub = start_stub(latency=args.latency, error_rate=args.error_rate)
+    try:
+        report = [
+            run(worker_class, workers, cache_mode, args, cases, stub)
+            for worker_class in args.worker_classes
+            for workers in args.workers
+            for cache_mode in args.cache_modes
+        ]
+    finally:
+        stub.shutdown()
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
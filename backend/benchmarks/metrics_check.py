@@ -0,0 +1,189 @@
+"""
+Checks /metrics adds up samples from every gunicorn worker.
+
+Runs the real gunicorn config with several workers against the local Gemini
+stub, sends a known number of predictions, batch predictions and
+description requests, then scrapes ``/metrics`` repeatedly (each scrape may
+be answered by a different worker). Exits with status 1 unless every scrape
+reports exactly the requests that were sent. The report includes the mean
+time per ``/predict`` stage and per Gemini call.
+
+    python -m benchmarks.metrics_check --workers 4 --requests 400
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.common import write_report
+from benchmarks.serialization_bench import random_cases
+from benchmarks.serving_mode_bench import request, start_server
+from benchmarks.stub_gemini import start_stub
+from src.utils.data import diseases
+from src.utils.descriptions import LEGACY_CACHE_PATH
+
+
+def scrape(port):
+    """Returns ``{(sample name, sorted label items): value}`` from /metrics."""
+    import http.client
+
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    try:
+        connection.request("GET", "/metrics")
+        text = connection.getresponse().read().decode()
+    finally:
+        connection.close()
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+    }
+
+
+def value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--diseases", type=int, default=5)
+    parser.add_argument("--scrapes", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8768)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=0.2)
+    directory = tempfile.mkdtemp()
+    metrics_dir = os.path.join(directory, "metrics")
+    env = dict(
+        os.environ,
+        GEMINI_BASE_URL=f"http://127.0.0.1:{stub.server_port}",
+        GEMINI_API_KEY="stub",
+        DESCRIPTION_DB_PATH=os.path.join(directory, "descriptions.db"),
+        PROMETHEUS_MULTIPROC_DIR=metrics_dir,
+    )
+    server = start_server("sync", args.port, args.workers, env)
+    try:
+        cases = random_cases(args.requests)
+        for case in cases:
+            request(args.port, "POST", "/predict", {"symptoms": case})
+        batches = args.requests // 10
+        for start in range(batches):
+            request(args.port, "POST", "/predict/batch", {"cases": cases[start::10]})
+        # Every disease twice: one miss that calls Gemini, then one hit.
+        # Diseases seeded from the legacy cache file would never miss.
+        seeded = set()
+        if os.path.exists(LEGACY_CACHE_PATH):
+            with open(LEGACY_CACHE_PATH) as file:
+                seeded = set(json.load(file))
+        names = [name for name in diseases if name not in seeded][: args.diseases]
+        for name in names * 2:
+            request(args.port, "POST", "/disease_description", {"disease_name": name})
+
+        expected = {
+            "/predict": args.requests,
+            "/predict/batch": batches,
+            "/disease_description": 2 * len(names),
+        }
+        scrapes = [scrape(args.port) for _ in range(args.scrapes)]
+        checks = {
+            "request counts match": all(
+                value(
+                    samples,
+                    "http_requests_total",
+                    route=route,
+                    method="POST",
+                    status="200",
+                )
+                == count
+                for samples in scrapes
+                for route, count in expected.items()
+            ),
+            "stage counts match": all(
+                value(
+                    samples,
+                    "predict_stage_duration_seconds_count",
+                    route="/predict",
+                    stage="json_parse",
+                )
+                == args.requests
+                for samples in scrapes
+            ),
+            "description hits and misses match": all(
+                value(samples, "description_cache_requests_total", result="miss")
+                == len(names)
+                and value(samples, "description_cache_requests_total", result="hit")
+                == len(names)
+                for samples in scrapes
+            ),
+            "one Gemini call per disease": all(
+                value(
+                    samples,
+                    "gemini_call_duration_seconds_count",
+                    kind="generate",
+                    outcome="ok",
+                )
+                == len(names)
+                for samples in scrapes
+            ),
+        }
+        worker_files = {
+            os.path.basename(path).rsplit("_", 1)[-1]
+            for path in glob.glob(os.path.join(metrics_dir, "*.db"))
+        }
+        checks["samples from several workers"] = len(worker_files) > 1
+
+        samples = scrapes[-1]
+
+        def mean_ms(name, **labels):
+            count = value(samples, f"{name}_count", **labels)
+            total = value(samples, f"{name}_sum", **labels)
+            return round(total / count * 1000, 4) if count else None
+
+        report = {
+            "workers": args.workers,
+            "worker_sample_files": len(worker_files),
+            "checks": checks,
+            "request_mean_ms": {
+                route: mean_ms(
+                    "http_request_duration_seconds", route=route, method="POST"
+                )
+                for route in expected
+            },
+            "predict_stage_mean_ms": {
+                stage: mean_ms(
+                    "predict_stage_duration_seconds", route="/predict", stage=stage
+                )
+                for stage in (
+                    "json_parse",
+                    "get_symptoms",
+                    "cache_lookup",
+                    "encode_symptoms",
+                    "model_predict",
+                    "decode",
+                )
+            },
+            "gemini_call_mean_ms": mean_ms(
+                "gemini_call_duration_seconds", kind="generate", outcome="ok"
+            ),
+        }
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+        stub.shutdown()
+        shutil.rmtree(directory)
+    write_report(report, args.output)
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Micro-benchmarks of each step of the prediction path, with a history.
+
+Times every step on its own, the way the routes call it:
+
+- ``get_symptoms``: display names -> model columns
+- ``encode_symptoms``: columns -> feature vector
+- ``predict_single.<backend>`` / ``predict_batch.<backend>``:
+  ``predict_proba`` of one row and of ``--batch-rows`` rows
+- ``inverse_encode_symptoms``: top-k labels -> disease names
+- ``get_disease_description.hit``: a description already in the store
+
+Cases are training rows of ``ml/MultiDiseaseDataset.csv`` with a random
+subset of their symptoms kept, so requests carry 1 to 17 symptoms. Like asv,
+each benchmark is calibrated so one sample lasts about ``--sample-ms``, and
+the median and interquartile range of ``--samples`` samples are reported in
+microseconds per call.
+
+Each run is compared with the median, per benchmark, of the last
+``--baseline-runs`` runs recorded in ``--history`` on the same machine, and
+exits with status 1 if a median grew by more than ``--threshold`` (default
+20%). Comparing with several runs rather than the previous one keeps small
+slowdowns from adding up run after run. Only passing runs are appended to
+the history (JSON, one entry per run with the commit and library versions),
+so a regression never becomes the baseline. The history is meant to be
+committed; ``MICRO_BENCH_HISTORY`` points it elsewhere, e.g. to a file kept
+by CI across clean checkouts.
+
+    python -m benchmarks.micro_bench --history benchmarks/micro_history.json
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import sklearn
+
+from benchmarks.common import (
+    load_dataset,
+    load_model,
+    silence_sklearn_warnings,
+    skewed_rows,
+    write_report,
+)
+from benchmarks.load_test import sample_cases
+from benchmarks.stub_gemini import fake_description
+from src.utils import descriptions
+from src.utils.data import diseases
+from src.utils.description_store import DescriptionStore
+from src.utils.inference import BACKENDS, create_predictor
+from src.utils.prediction_cache import TOP_K
+from src.utils.utils import encode_symptoms, get_symptoms, inverse_encode_symptoms
+
+HISTORY_PATH = os.getenv("MICRO_BENCH_HISTORY", "benchmarks/micro_history.json")
+
+
+def calibrate(call, sample_seconds):
+    """Number of calls that makes one sample last about ``sample_seconds``."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            call()
+        elapsed = time.perf_counter() - started
+        if elapsed >= sample_seconds / 10:
+            return max(1, int(number * sample_seconds / elapsed))
+        number *= 10
+
+
+def measure(make_call, inputs, samples, sample_seconds):
+    """
+    Times ``make_call(input)`` cycling over ``inputs``.
+
+    Returns:
+        dict: Median, interquartile range and minimum in µs per call.
+    """
+    calls = [make_call(value) for value in inputs]
+    position = 0
+
+    def next_call():
+        nonlocal position
+        calls[position]()
+        position = (position + 1) % len(calls)
+
+    number = calibrate(next_call, sample_seconds)
+    per_call = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        for _ in range(number):
+            next_call()
+        per_call.append((time.perf_counter() - started) / number)
+    values = np.asarray(per_call) * 1e6
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    return {
+        "median_us": round(float(median), 3),
+        "iqr_us": round(float(q3 - q1), 3),
+        "min_us": round(float(values.min()), 3),
+        "number": number,
+        "samples": samples,
+    }
+
+
+def run_benchmarks(args):
+    silence_sklearn_warnings()
+    model = load_model()
+    cases = sample_cases("partial", args.cases, keys=0, seed=args.seed)
+    names = [symptoms for symptoms, _ in cases]
+    columns = [get_symptoms(symptoms) for symptoms in names]
+    rows = [encode_symptoms(row_columns)[None, :] for row_columns in columns]
+    features, _ = load_dataset()
+    batch = skewed_rows(features, 5000, args.batch_rows, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    top_labels = [rng.choice(len(model.classes_), TOP_K) for _ in range(len(cases))]
+
+    sample_seconds = args.sample_ms / 1000
+    results = {
+        "get_symptoms": measure(
+            lambda value: lambda: get_symptoms(value),
+            names,
+            args.samples,
+            sample_seconds,
+        ),
+        "encode_symptoms": measure(
+            lambda value: lambda: encode_symptoms(value),
+            columns,
+            args.samples,
+            sample_seconds,
+        ),
+    }
+    for backend in BACKENDS:
+        predict_proba = create_predictor(model, backend).predict_proba
+        results[f"predict_single.{backend}"] = measure(
+            lambda value: lambda: predict_proba(value),
+            rows,
+            args.samples,
+            sample_seconds,
+        )
+        results[f"predict_batch.{backend}"] = measure(
+            lambda value: lambda: predict_proba(value),
+            [batch],
+            args.samples,
+            sample_seconds,
+        )
+    results["inverse_encode_symptoms"] = measure(
+        lambda value: lambda: inverse_encode_symptoms(value),
+        top_labels,
+        args.samples,
+        sample_seconds,
+    )
+
+    # A store of its own, holding every description, so each lookup is a hit
+    with tempfile.TemporaryDirectory() as directory:
+        store = DescriptionStore(
+            os.path.join(directory, "descriptions.db"),
+            model=descriptions.GEMINI_MODEL,
+            prompt_version=descriptions.PROMPT_VERSION,
+        )
+        for disease_name in set(diseases):
+            store.put(disease_name, fake_description(disease_name))
+        default_store, descriptions.store = descriptions.store, store
+        try:
+            results["get_disease_description.hit"] = measure(
+                lambda value: lambda: descriptions.get_disease_description(value),
+                [disease for _, disease in cases],
+                args.samples,
+                sample_seconds,
+            )
+        finally:
+            descriptions.store = default_store
+            store.close()
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def baseline_medians(runs):
+    """
+    Returns:
+        dict: ``{benchmark: median_us}``, the median over ``runs`` of every
+        benchmark they measured.
+    """
+    medians = {}
+    for name in {name for run in runs for name in run["results"]}:
+        values = [
+            run["results"][name]["median_us"] for run in runs if name in run["results"]
+        ]
+        medians[name] = round(float(np.median(values)), 3)
+    return medians
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns:
+        dict: ``{benchmark: ratio}`` of every median that grew by more than
+        ``threshold`` over the ``baseline_medians``.
+    """
+    regressions = {}
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        ratio = result["median_us"] / before
+        if ratio > 1 + threshold:
+            regressions[name] = round(ratio, 3)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--batch-rows", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=15)
+    parser.add_argument("--sample-ms", type=float, default=50.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument(
+        "--baseline-runs",
+        type=int,
+        default=5,
+        help="Recent runs of this machine whose median is the baseline",
+    )
+    parser.add_argument(
+        "--no-save", action="store_true", help="Compare without recording the run"
+    )
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    entry = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "sklearn": sklearn.__version__,
+        "results": run_benchmarks(args),
+    }
+
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history) as file:
+            history = json.load(file)
+    baseline_runs = [run for run in history if run["machine"] == entry["machine"]][
+        -args.baseline_runs :
+    ]
+    regressions = compare(
+        entry["results"], baseline_medians(baseline_runs), args.threshold
+    )
+    if not args.no_save and not regressions:
+        history.append(entry)
+        with open(args.history, "w") as file:
+            json.dump(history, file, indent=2)
+
+    report = {
+        **entry,
+        "baseline": [
+            {"timestamp": run["timestamp"], "commit": run["commit"]}
+            for run in baseline_runs
+        ],
+        "threshold": args.threshold,
+        "regressions": regressions,
+    }
+    write_report(report, args.output)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Size, load time and memory of the packed forest against model.joblib.
+
+Reports the size of both files and the best of ``--repeats`` in-process
+loads: unpickling the joblib file (plus flattening it, which the ``flat``
+backend does on boot) vs opening the packed file by mmap or by reading it.
+It then loads each backend in fresh interpreters, as a booting worker
+does, and reports wall time, peak RSS and whether sklearn was imported.
+The in-memory footprint is the bytes of the node arrays of sklearn's trees,
+the flat evaluator and the packed one. The script also compares prediction
+latency and ends with a parity gate against the sklearn forest: it exits
+with status 1 on any label mismatch.
+
+    python -m benchmarks.packed_forest_bench
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.common import (
+    MODEL_PATH,
+    latency_summary,
+    load_dataset,
+    load_model,
+    silence_sklearn_warnings,
+    skewed_rows,
+    write_report,
+)
+from benchmarks.parity import compare
+from src.utils import packed_forest
+from src.utils.forest import FlatForest
+from src.utils.inference import PACKED_MODEL_PATH
+
+# Boots one backend the way src/app.py does and prints what it cost
+# (ru_maxrss would include the benchmark itself, which it inherits at exec)
+BOOT_SCRIPT = """
+import json, re, sys, time
+started = time.perf_counter()
+from src.utils.inference import load_predictor
+load_predictor({path!r}, {backend!r})
+seconds = time.perf_counter() - started
+with open("/proc/self/status") as status:
+    peak_kb = int(re.search(r"VmHWM:\\s+(\\d+)", status.read()).group(1))
+print(json.dumps({{
+    "seconds": seconds,
+    "max_rss_mb": peak_kb / 1024,
+    "sklearn_imported": "sklearn" in sys.modules,
+}}))
+"""
+
+
+def best_seconds(load, repeats):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def array_bytes(forest):
+    return sum(
+        array.nbytes
+        for array in (
+            forest.feature,
+            forest.threshold,
+            forest.children,
+            forest.value,
+            forest.roots,
+        )
+    )
+
+
+def boot(backend, repeats):
+    """Best wall time and its RSS of loading a backend in new interpreters."""
+    runs = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                BOOT_SCRIPT.format(path=MODEL_PATH, backend=backend),
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=dict(os.environ, PYTHONWARNINGS="ignore"),
+        )
+        runs.append(json.loads(result.stdout.splitlines()[-1]))
+    best = min(runs, key=lambda run: run["seconds"])
+    return {
+        "load_ms": round(best["seconds"] * 1000, 1),
+        "max_rss_mb": round(best["max_rss_mb"], 1),
+        "sklearn_imported": best["sklearn_imported"],
+    }
+
+
+def predict_latency(predictor, rows, batch):
+    single = []
+    for row in rows:
+        started = time.perf_counter()
+        predictor.predict_proba(row[None, :])
+        single.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    predictor.predict_proba(batch)
+    return {
+        "single_row": latency_summary(single),
+        "batch_rows": len(batch),
+        "batch_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    silence_sklearn_warnings()
+    model = load_model()
+    flat = FlatForest.from_sklearn(model)
+    packed = packed_forest.load(PACKED_MODEL_PATH, source=MODEL_PATH)
+
+    features, _ = load_dataset()
+    rows = skewed_rows(features, 500, 500)
+    batch = skewed_rows(features, 5000, 10000, seed=1)
+    parity = {
+        "dataset": compare(model, packed, features),
+        "perturbed": compare(model, packed, batch),
+    }
+
+    report = {
+        "file_bytes": {
+            "joblib": os.path.getsize(MODEL_PATH),
+            "packed": os.path.getsize(PACKED_MODEL_PATH),
+        },
+        "in_process_load_ms": {
+            "joblib": round(best_seconds(load_model, args.repeats) * 1000, 2),
+            "joblib_then_flatten": round(
+                best_seconds(
+                    lambda: FlatForest.from_sklearn(load_model()), args.repeats
+                )
+                * 1000,
+                2,
+            ),
+            "packed_mmap": round(
+                best_seconds(
+                    lambda: packed_forest.load(PACKED_MODEL_PATH), args.repeats
+                )
+                * 1000,
+                3,
+            ),
+            "packed_read": round(
+                best_seconds(
+                    lambda: packed_forest.load(PACKED_MODEL_PATH, use_mmap=False),
+                    args.repeats,
+                )
+                * 1000,
+                3,
+            ),
+        },
+        "fresh_interpreter_load": {
+            backend: boot(backend, args.repeats) for backend in ("flat", "packed")
+        },
+        "memory_bytes": {
+            "sklearn_tree_arrays": sum(
+                estimator.tree_.__getstate__()["nodes"].nbytes
+                + estimator.tree_.value.nbytes
+                for estimator in model.estimators_
+            ),
+            "flat_arrays": array_bytes(flat),
+            "packed_arrays": array_bytes(packed),
+        },
+        "predict": {
+            "flat": predict_latency(flat, rows, batch),
+            "packed": predict_latency(packed, rows, batch),
+        },
+        "parity": parity,
+    }
+    report["passed"] = all(part["label_mismatches"] == 0 for part in parity.values())
+    write_report(report, args.output)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
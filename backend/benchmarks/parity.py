@@ -0,0 +1,87 @@
+"""
+Parity gate between an inference backend and the sklearn forest.
+
+Scores every row of ml/MultiDiseaseDataset.csv, plus perturbed rows the
+forest never saw, with both the sklearn model and the chosen backend, and
+exits non-zero if any predicted label differs or any probability differs by
+more than the tolerance.
+
+    python -m benchmarks.parity --backend flat
+    python -m benchmarks.parity --backend onnx
+    python -m benchmarks.parity --backend packed
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from benchmarks.common import (
+    MODEL_PATH,
+    load_dataset,
+    load_model,
+    silence_sklearn_warnings,
+    skewed_rows,
+    write_report,
+)
+from src.utils.inference import BACKENDS, create_predictor
+
+# onnxruntime sums the leaf probabilities in float32; packed leaves are float16
+TOLERANCES = {"onnx": 1e-6, "packed": 1e-4}
+# A backend that fell back to another one would pass trivially
+PREDICTORS = {
+    "flat": "FlatForest",
+    "sklearn": "RandomForestClassifier",
+    "onnx": "OnnxForest",
+    "packed": "PackedForest",
+}
+
+
+def compare(model, predictor, features):
+    expected = model.predict_proba(features)
+    actual = predictor.predict_proba(features)
+    expected_labels = model.classes_[np.argmax(expected, axis=1)]
+    actual_labels = model.classes_[np.argmax(actual, axis=1)]
+    return {
+        "rows": len(features),
+        "label_mismatches": int(np.count_nonzero(expected_labels != actual_labels)),
+        "max_abs_proba_diff": float(np.abs(expected - actual).max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=BACKENDS, default="flat")
+    parser.add_argument(
+        "--tolerance", type=float, help="Default: 1e-6 onnx, 1e-4 packed, 1e-9 else"
+    )
+    parser.add_argument("--unseen-rows", type=int, default=10000)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    if args.tolerance is None:
+        args.tolerance = TOLERANCES.get(args.backend, 1e-9)
+
+    silence_sklearn_warnings()
+    model = load_model()
+    predictor = create_predictor(model, args.backend, source=MODEL_PATH)
+    features, _ = load_dataset()
+    unseen = skewed_rows(features, args.unseen_rows, args.unseen_rows, seed=1)
+
+    report = {
+        "backend": args.backend,
+        "predictor": type(predictor).__name__,
+        "tolerance": args.tolerance,
+        "dataset": compare(model, predictor, features),
+        "perturbed": compare(model, predictor, unseen),
+    }
+    report["passed"] = report["predictor"] == PREDICTORS[args.backend] and all(
+        part["label_mismatches"] == 0 and part["max_abs_proba_diff"] <= args.tolerance
+        for part in (report["dataset"], report["perturbed"])
+    )
+    write_report(report, args.output)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Per-worker LRU vs host-wide shared-memory prediction cache.
+
+Forks N worker processes that split one Zipf-skewed request stream, the way
+gunicorn's sync workers split incoming traffic, and reports the hit rate and
+request latency of each cache mode.
+
+    python -m benchmarks.prediction_cache_bench --workers 1 4 16
+"""
+
+import argparse
+import multiprocessing
+import time
+
+from benchmarks.common import (
+    latency_summary,
+    load_dataset,
+    load_model,
+    row_mask,
+    silence_sklearn_warnings,
+    skewed_rows,
+    write_report,
+)
+from src.utils.prediction_cache import PredictionCache, cached_predictions
+from src.utils.shared_cache import SharedPredictionCache
+
+
+def _serve(model, cache_factory, rows, results):
+    silence_sklearn_warnings()
+    cache = cache_factory()
+    cache.bind_model(("bench",))
+    latencies = []
+    for row in rows:
+        started = time.perf_counter()
+        mask = row_mask(row)
+        if cache.get(mask) is None:
+            cache.put(mask, cached_predictions(model.predict_proba(row[None, :]))[0])
+        latencies.append(time.perf_counter() - started)
+    stats = cache.stats()
+    results.put((latencies, stats["hits"], stats["misses"]))
+
+
+def run(mode, n_workers, model, stream, cache_size):
+    context = multiprocessing.get_context("fork")
+    shared = None
+    if mode == "shared":
+        shared = SharedPredictionCache.create(cache_size)
+        cache_factory = lambda: shared
+    else:
+        cache_factory = lambda: PredictionCache(cache_size)
+
+    results = context.Queue()
+    workers = [
+        context.Process(
+            target=_serve, args=(model, cache_factory, stream[i::n_workers], results)
+        )
+        for i in range(n_workers)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    collected = [results.get() for _ in workers]
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    if shared is not None:
+        shared.close()
+
+    latencies = [latency for part in collected for latency in part[0]]
+    hits = sum(part[1] for part in collected)
+    misses = sum(part[2] for part in collected)
+    return {
+        "mode": mode,
+        "workers": n_workers,
+        "requests": len(latencies),
+        "hit_rate": round(hits / max(hits + misses, 1), 4),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--keys", type=int, default=2000)
+    parser.add_argument("--cache-size", type=int, default=1024)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    silence_sklearn_warnings()
+    model = load_model()
+    features, _ = load_dataset()
+    stream = skewed_rows(features, args.keys, args.requests)
+
+    report = [
+        run(mode, n_workers, model, stream, args.cache_size)
+        for n_workers in args.workers
+        for mode in ("local", "shared")
+    ]
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Checks the opt-in request profiler and measures what it costs.
+
+Drives the Flask app in process with fresh profilers: no profile without a
+sample rate or with a wrong ``X-Profile`` header, a collapsed-stack and a
+speedscope file naming the route's view function for a request carrying the
+admin password, and far fewer profiles than batch requests once the
+overhead cap is reached. Exits with status 1 if a check fails. The report
+also has ``/predict`` latency at sample rates 0, 1% and 100%.
+
+    python -m benchmarks.profiling_check --requests 2000
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import latency_summary, write_report
+from benchmarks.serialization_bench import random_cases
+from src.app import app
+from src.utils import profiling
+
+PASSWORD = "profile-check"
+
+
+def use_profiler(directory, **options):
+    """Installs a new profiler writing to ``directory`` and returns it."""
+    shutil.rmtree(directory, ignore_errors=True)
+    profiling.profiler = profiling.RequestProfiler(
+        directory=directory, password=PASSWORD, **options
+    )
+    return profiling.profiler
+
+
+def wait_idle(profiler):
+    """Waits until the last sampler has written its file."""
+    while profiler._busy.locked():
+        time.sleep(0.001)
+
+
+def files(directory):
+    return sorted(glob.glob(os.path.join(directory, "*")))
+
+
+def timed_predictions(client, cases):
+    timings = []
+    for case in cases:
+        started = time.perf_counter()
+        response = client.post("/predict", json={"symptoms": case})
+        timings.append(time.perf_counter() - started)
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    client = app.test_client()
+    directory = tempfile.mkdtemp()
+    batch = {"cases": random_cases(2000, seed=1)}
+    checks = {}
+    try:
+        profiler = use_profiler(directory)
+        timed_predictions(client, random_cases(50))
+        client.post("/predict/batch", json=batch, headers={"X-Profile": "wrong"})
+        wait_idle(profiler)
+        checks["no profile unless asked"] = files(directory) == []
+
+        for output_format in ("collapsed", "speedscope"):
+            profiler = use_profiler(directory, output_format=output_format)
+            client.post("/predict/batch", json=batch, headers={"X-Profile": PASSWORD})
+            wait_idle(profiler)
+            written = files(directory)
+            content = open(written[0]).read() if len(written) == 1 else ""
+            if output_format == "speedscope" and content:
+                frames = json.loads(content)["shared"]["frames"]
+                content = "\n".join(frame["name"] for frame in frames)
+            checks[f"{output_format} profile from header"] = (
+                "POST-predict-batch" in "".join(written)
+                and "predict_batch_route (src/app.py" in content
+            )
+
+        # Batches of 200 run long enough for every profile to get samples
+        profiler = use_profiler(directory, sample_rate=1.0, max_overhead=0.001)
+        cases = random_cases(40000, seed=2)
+        for start in range(0, len(cases), 200):
+            client.post("/predict/batch", json={"cases": cases[start : start + 200]})
+        wait_idle(profiler)
+        capped = len(files(directory))
+        checks["overhead cap limits profiles"] = 0 < capped < 200
+
+        latency = {}
+        profiled = {}
+        for rate in (0.0, 0.01, 1.0):
+            profiler = use_profiler(directory, sample_rate=rate)
+            cases = random_cases(args.requests, seed=3)
+            timings = timed_predictions(client, cases)
+            wait_idle(profiler)
+            latency[str(rate)] = latency_summary(timings)
+            profiled[str(rate)] = profiler.requests_profiled
+            overhead = profiler.overhead_seconds
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "checks": checks,
+        "profiles_under_cap_of_200_batches": capped,
+        "requests_per_rate": args.requests,
+        "requests_profiled": profiled,
+        "sampler_seconds_at_rate_1": round(overhead, 4),
+        "predict_latency": latency,
+    }
+    write_report(report, args.output)
+    sys.exit(0 if all(checks.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Bytes on the wire and serialisation CPU time per JSON provider and
+content encoding.
+
+Runs the Flask app in process with a description database filled from the
+local Gemini stub and sends single predictions, batch predictions and cached
+description requests with each combination of ``default``/``orjson``
+provider and identity/gzip/br ``Accept-Encoding``. CPU time is thread time
+spent in JSON encoding, JSON decoding and compression, per request.
+Descriptions are measured both pre-compressed (as served) and compressed per
+request.
+
+    python -m benchmarks.serialization_bench --requests 300 --batch-size 1000
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import write_report
+from benchmarks.stub_gemini import start_stub
+
+
+class CPUTimer:
+    """Wraps a callable and adds up the thread CPU time spent in it."""
+
+    def __init__(self, function):
+        self.function = function
+        self.seconds = 0.0
+
+    def __call__(self, *args, **kwargs):
+        started = time.thread_time()
+        try:
+            return self.function(*args, **kwargs)
+        finally:
+            self.seconds += time.thread_time() - started
+
+
+def random_cases(n_cases, seed=0):
+    """Symptom lists of 1 to 17 display names, like real requests."""
+    from src.utils.data import display_named_symptoms
+
+    names = list(display_named_symptoms)
+    rng = np.random.default_rng(seed)
+    return [
+        [str(name) for name in rng.choice(names, rng.integers(1, 18), replace=False)]
+        for _ in range(n_cases)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=0.0)
+    directory = tempfile.mkdtemp()
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["DESCRIPTION_DB_PATH"] = os.path.join(directory, "descriptions.db")
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+    from flask.json.provider import DefaultJSONProvider
+
+    from src import app as app_module
+    from src.utils import compression, descriptions
+    from src.utils.data import diseases
+    from src.utils.json_provider import OrjsonProvider
+
+    app = app_module.app
+    client = app.test_client()
+    disease_name = diseases[0]
+    client.get(f"/disease_description?disease_name={disease_name}")
+    cases = random_cases(args.requests)
+    batch = random_cases(args.batch_size, seed=1)
+
+    scenarios = {
+        "predict": lambda i, headers: client.post(
+            "/predict?top_k=5", json={"symptoms": cases[i]}, headers=headers
+        ),
+        "predict_batch": lambda i, headers: client.post(
+            "/predict/batch?top_k=5", json={"cases": batch}, headers=headers
+        ),
+        "disease_description": lambda i, headers: client.get(
+            f"/disease_description?disease_name={disease_name}", headers=headers
+        ),
+    }
+    providers = {"default": DefaultJSONProvider, "orjson": OrjsonProvider}
+    encodings = [None] + compression.ENCODINGS
+    precompressed_lookup = descriptions.store.get_encoded
+
+    report = []
+    for provider_name, provider in providers.items():
+        app.json = provider(app)
+        timers = {
+            "encode": CPUTimer(app.json.response),
+            "decode": CPUTimer(app.json.loads),
+            "compress": CPUTimer(compression.compress),
+        }
+        app.json.response = timers["encode"]
+        app.json.loads = timers["decode"]
+        compression.compress = timers["compress"]
+        for route, send in scenarios.items():
+            variants = [True, False] if route == "disease_description" else [None]
+            for encoding in encodings:
+                for precompressed in variants:
+                    if precompressed is False:
+                        descriptions.store.get_encoded = lambda digest, encoding: None
+                    headers = {"Accept-Encoding": encoding or "identity"}
+                    # Batches are slow to predict; a few are enough for averages
+                    n = (
+                        max(args.requests // 30, 3)
+                        if route == "predict_batch"
+                        else args.requests
+                    )
+                    for timer in timers.values():
+                        timer.seconds = 0.0
+                    sizes = []
+                    started = time.perf_counter()
+                    for i in range(n):
+                        response = send(i, headers)
+                        assert response.status_code == 200, response.data
+                        sizes.append(len(response.data))
+                        sent = response.headers.get("Content-Encoding", "identity")
+                    wall = time.perf_counter() - started
+                    descriptions.store.get_encoded = precompressed_lookup
+                    result = {
+                        "route": route,
+                        "json_provider": provider_name,
+                        "accept_encoding": encoding or "identity",
+                        # Bodies under COMPRESS_MIN_SIZE are sent as they are
+                        "sent_encoding": sent,
+                        "requests": n,
+                        "wire_bytes": int(np.mean(sizes)),
+                        "cpu_us_per_request": {
+                            name: round(timer.seconds / n * 1e6, 1)
+                            for name, timer in timers.items()
+                        },
+                        "wall_ms_per_request": round(wall / n * 1000, 3),
+                    }
+                    if precompressed is not None:
+                        result["precompressed"] = precompressed
+                    report.append(result)
+        compression.compress = timers["compress"].function
+
+    stub.shutdown()
+    shutil.rmtree(directory)
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
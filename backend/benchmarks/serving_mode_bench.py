@@ -0,0 +1,191 @@
+"""
+Sync vs async serving under a mix of cached predictions and cold
+description requests.
+
+Starts a stub Gemini server with a fixed latency, then for each serving mode
+runs the real gunicorn config and fires one cold description request per
+disease while prediction clients keep calling ``/predict``. It reports
+prediction latency during the burst and how long descriptions took.
+``--description-route`` picks the route the descriptions are asked from:
+``post`` and ``get`` (``/disease_description``) or ``stream``
+(``/disease_description/stream``, read to the end).
+
+    python -m benchmarks.serving_mode_bench --latency 2 --workers 4
+    python -m benchmarks.serving_mode_bench --modes async --workers 1 \
+        --description-route stream --latency 3
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import quote
+
+from benchmarks.common import latency_summary, write_report
+from benchmarks.stub_gemini import start_stub
+from src.utils.data import diseases
+
+MODES = {
+    "sync": ["wsgi:app"],
+    "gthread": ["--worker-class", "gthread", "--threads", "32", "wsgi:app"],
+    "async": ["--worker-class", "uvicorn_worker.UvicornWorker", "asgi:app"],
+}
+PREDICTION_BODIES = [["Itching", "Skin Rash"], ["Cough", "High Fever"], ["Headache"]]
+DESCRIPTION_ROUTES = ["post", "get", "stream"]
+
+
+def request(port, method, path, body=None, timeout=60):
+    """Sends one request and returns (status, seconds)."""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    started = time.perf_counter()
+    try:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        payload = json.dumps(body) if body is not None else None
+        connection.request(method, path, payload, headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - started
+    except OSError:
+        return 0, time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def start_server(mode, port, workers, env):
+    cmd = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--config",
+        "gunicorn.conf.py",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "--pid",
+        os.path.join(tempfile.gettempdir(), f"bench-{port}.pid"),
+        *MODES[mode],
+    ]
+    server = subprocess.Popen(
+        cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while request(port, "GET", "/health", timeout=1)[0] != 200:
+        if time.monotonic() > deadline:
+            server.kill()
+            raise TimeoutError(f"{mode} server did not start")
+        time.sleep(0.2)
+    return server
+
+
+def run(mode, args, stub_url):
+    directory = tempfile.mkdtemp()
+    env = dict(
+        os.environ,
+        GEMINI_BASE_URL=stub_url,
+        GEMINI_API_KEY="stub",
+        DESCRIPTION_DB_PATH=os.path.join(directory, "descriptions.db"),
+    )
+    server = start_server(mode, args.port, args.workers, env)
+    try:
+        for body in PREDICTION_BODIES * args.workers:
+            request(args.port, "POST", "/predict", body)
+
+        prediction_latencies = []
+        description_latencies = []
+        description_errors = []
+        stop = threading.Event()
+
+        def predict_loop(offset):
+            i = offset
+            while not stop.is_set():
+                body = PREDICTION_BODIES[i % len(PREDICTION_BODIES)]
+                status, seconds = request(args.port, "POST", "/predict", body)
+                if status == 200:
+                    prediction_latencies.append(seconds)
+                i += 1
+
+        def describe(disease_name):
+            if args.description_route == "post":
+                status, seconds = request(
+                    args.port,
+                    "POST",
+                    "/disease_description",
+                    {"disease_name": disease_name},
+                )
+            else:
+                path = "/disease_description" + (
+                    "/stream" if args.description_route == "stream" else ""
+                )
+                status, seconds = request(
+                    args.port, "GET", f"{path}?disease_name={quote(disease_name)}"
+                )
+            if status == 200:
+                description_latencies.append(seconds)
+            else:
+                description_errors.append(status)
+
+        predictors = [
+            threading.Thread(target=predict_loop, args=(i,))
+            for i in range(args.prediction_clients)
+        ]
+        describers = [
+            threading.Thread(target=describe, args=(name,)) for name in diseases
+        ]
+        started = time.perf_counter()
+        for thread in predictors + describers:
+            thread.start()
+        for thread in describers:
+            thread.join()
+        descriptions_done = time.perf_counter() - started
+        stop.set()
+        for thread in predictors:
+            thread.join()
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+        shutil.rmtree(directory)
+
+    return {
+        "mode": mode,
+        "workers": args.workers,
+        "description_route": args.description_route,
+        "gemini_latency_s": args.latency,
+        "cold_descriptions": len(diseases),
+        "descriptions_done_s": round(descriptions_done, 2),
+        "description_errors": len(description_errors),
+        "description_latency": latency_summary(description_latencies or [0]),
+        "predictions_during_burst": len(prediction_latencies),
+        "prediction_latency": latency_summary(prediction_latencies or [0]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["sync", "async"])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument(
+        "--description-route", choices=DESCRIPTION_ROUTES, default="post"
+    )
+    parser.add_argument("--prediction-clients", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency)
+    stub_url = f"http://127.0.0.1:{stub.server_port}"
+    report = [run(mode, args, stub_url) for mode in args.modes]
+    stub.shutdown()
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
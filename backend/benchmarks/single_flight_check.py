@@ -0,0 +1,233 @@
+"""
+Counts Gemini calls made by concurrent misses for the same descriptions.
+
+Points the backend at the local Gemini stub, forks worker processes that
+each fire threads (or coroutines) requesting uncached descriptions at the
+same moment, and reads back how many calls the stub received per disease.
+``mixed`` workers run threads and an event loop side by side, like the WSGI
+routes and the native routes of the async mode. In ``abort``, one worker's
+streaming leader is closed after its first chunk, as on a client disconnect,
+while callers in every worker wait for it: they must still get the
+description, at the cost of exactly one more call. Exits with status 1 unless every disease was generated
+exactly once (twice for ``abort``) and every waiter got its description.
+
+    python -m benchmarks.single_flight_check --workers 4 --requests 100
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import write_report
+from benchmarks.stub_gemini import start_stub
+
+
+def _sync_worker(disease_names, barrier, per_worker):
+    from src.utils.descriptions import get_disease_description
+
+    threads = [
+        threading.Thread(
+            target=get_disease_description,
+            args=(disease_names[i % len(disease_names)],),
+        )
+        for i in range(per_worker)
+    ]
+    barrier.wait()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _async_worker(disease_names, barrier, per_worker):
+    from src.utils.descriptions import get_disease_description_async
+
+    async def burst():
+        await asyncio.gather(
+            *(
+                get_disease_description_async(disease_names[i % len(disease_names)])
+                for i in range(per_worker)
+            )
+        )
+
+    barrier.wait()
+    asyncio.run(burst())
+
+
+def _mixed_worker(disease_names, barrier, per_worker):
+    from src.utils.descriptions import (
+        get_disease_description,
+        get_disease_description_async,
+    )
+
+    threads = [
+        threading.Thread(
+            target=get_disease_description,
+            args=(disease_names[i % len(disease_names)],),
+        )
+        for i in range(per_worker // 2)
+    ]
+
+    async def burst():
+        await asyncio.gather(
+            *(
+                get_disease_description_async(disease_names[i % len(disease_names)])
+                for i in range(per_worker - len(threads))
+            )
+        )
+
+    barrier.wait()
+    for thread in threads:
+        thread.start()
+    asyncio.run(burst())
+    for thread in threads:
+        thread.join()
+
+
+def _abort_worker(disease_names, barrier, per_worker):
+    """
+    Exits with status 1 if a waiter of an aborted leader got no description.
+
+    Only one worker aborts: were every worker to stream and abort its own
+    leader, the next one to take the lock could abort again, making the call
+    count a race.
+    """
+    from src.utils.descriptions import (
+        get_disease_description,
+        stream_disease_description,
+    )
+
+    failures = []
+
+    def wait_for(disease_name):
+        try:
+            if not get_disease_description(disease_name).startswith("**"):
+                failures.append(disease_name)
+        except BaseException:
+            failures.append(disease_name)
+
+    aborting = barrier.wait() == 0
+    for disease_name in disease_names:
+        if aborting:
+            leader = stream_disease_description(disease_name)
+            next(leader)
+        # The other workers start waiting once the leader holds the lock
+        barrier.wait()
+        waiters = [
+            threading.Thread(target=wait_for, args=(disease_name,))
+            for _ in range(per_worker)
+        ]
+        for thread in waiters:
+            thread.start()
+        if aborting:
+            time.sleep(0.1)
+            leader.close()
+        for thread in waiters:
+            thread.join()
+    sys.exit(1 if failures else 0)
+
+
+def _uncoalesced_worker(disease_names, barrier, per_worker):
+    """The previous behaviour: every miss calls Gemini itself."""
+    from src.utils.descriptions import _generate
+
+    threads = [
+        threading.Thread(
+            target=_generate, args=(disease_names[i % len(disease_names)],)
+        )
+        for i in range(per_worker)
+    ]
+    barrier.wait()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+WORKERS = {
+    "sync": _sync_worker,
+    "async": _async_worker,
+    "mixed": _mixed_worker,
+    "abort": _abort_worker,
+    "uncoalesced": _uncoalesced_worker,
+}
+
+
+def run(stub, mode, disease_names, workers, requests):
+    from src.utils.descriptions import store
+
+    store.clear()
+    store.close()
+    stub.calls_by_disease = {}
+    context = multiprocessing.get_context("fork")
+    barrier = context.Barrier(workers)
+    processes = [
+        context.Process(
+            target=WORKERS[mode],
+            args=(disease_names, barrier, requests // workers),
+        )
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    calls = dict(stub.calls_by_disease)
+    return {
+        "mode": mode,
+        "requests": requests,
+        "diseases": len(disease_names),
+        "gemini_calls": sum(calls.values()),
+        "calls_by_disease": calls,
+        "stored": sum(store.get(name) is not None for name in disease_names),
+        "worker_failures": sum(process.exitcode != 0 for process in processes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency)
+    directory = tempfile.mkdtemp()
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["DESCRIPTION_DB_PATH"] = os.path.join(directory, "descriptions.db")
+    from src.utils.data import diseases
+
+    scenarios = [
+        (mode, names)
+        for mode in ("sync", "async", "mixed")
+        for names in (diseases[:1], diseases[:5])
+    ] + [("abort", diseases[:3]), ("uncoalesced", diseases[:1])]
+    report = [
+        run(stub, mode, names, args.workers, args.requests) for mode, names in scenarios
+    ]
+    stub.shutdown()
+    write_report(report, args.output)
+
+    failed = [
+        result
+        for result in report
+        if result["mode"] != "uncoalesced"
+        and (
+            result["gemini_calls"]
+            != result["diseases"] * (2 if result["mode"] == "abort" else 1)
+            or result["stored"] != result["diseases"]
+            or result["worker_failures"]
+        )
+    ]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Local stand-in for the Gemini API, for offline benchmarks.
+
+Answers ``generateContent`` after a configurable delay with a canned
+markdown description and counts the calls it received (``GET /stats``).
+``streamGenerateContent`` emits the same text in chunks spread over the
+delay. Batched prompts (see ``build_batch_prompt``) get one section per disease,
+and ``--error-rate`` makes a share of calls fail with 503 to exercise
+retries.
+Point the backend at it with ``GEMINI_BASE_URL=http://127.0.0.1:<port>``.
+
+    python -m benchmarks.stub_gemini --port 8700 --latency 2.0
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_PATH = re.compile(r"/v1beta/models/([^/:]+):(\w+)")
+DISEASE_LINE = re.compile(r"overview of the disease: (.+?)\.\s*$", re.MULTILINE)
+# Chunks a streamed response is split into
+STREAM_CHUNKS = 20
+BATCH_HEADING = re.compile(r"^\s*(=== .+ ===)\s*$", re.MULTILINE)
+
+
+def fake_description(disease_name):
+    """Markdown shaped like a real description, a few kilobytes long."""
+    sections = ["Description", "Symptoms", "Causes", "Precautions", "Medication"]
+    filler = f"Details about {disease_name} for local benchmarking. " * 12
+    return "\n\n".join(f"**{section}**\n{filler}" for section in sections)
+
+
+def _prompt_text(body):
+    parts = body["contents"][0]["parts"]
+    return " ".join(part.get("text", "") for part in parts)
+
+
+def response_payload(text):
+    return {
+        "candidates": [
+            {
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+                "index": 0,
+            }
+        ],
+        "usageMetadata": {"promptTokenCount": 60, "candidatesTokenCount": 400},
+    }
+
+
+class StubGeminiServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, latency, error_rate=0.0):
+        super().__init__(address, StubGeminiHandler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.errors = 0
+        self.calls = 0
+        self.calls_by_disease = {}
+        self._lock = threading.Lock()
+
+    def record_call(self, disease_names):
+        with self._lock:
+            self.calls += 1
+            for name in disease_names:
+                self.calls_by_disease[name] = self.calls_by_disease.get(name, 0) + 1
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            return self._send_json(
+                {
+                    "calls": self.server.calls,
+                    "errors": self.server.errors,
+                    "calls_by_disease": self.server.calls_by_disease,
+                }
+            )
+        self._send_json({"error": "not found"}, 404)
+
+    def do_POST(self):
+        match = MODEL_PATH.match(self.path)
+        if not match:
+            return self._send_json({"error": "not found"}, 404)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = _prompt_text(body)
+        headings = BATCH_HEADING.findall(prompt)
+        if headings:
+            names = [heading[4:-4] for heading in headings]
+        else:
+            found = DISEASE_LINE.search(prompt)
+            names = [found.group(1) if found else "unknown"]
+        self.server.record_call(names)
+        if match.group(2) == "streamGenerateContent":
+            return self._stream(fake_description(names[0]))
+        time.sleep(self.server.latency)
+        if random.random() < self.server.error_rate:
+            self.server.errors += 1
+            error = {"code": 503, "message": "Overloaded", "status": "UNAVAILABLE"}
+            return self._send_json({"error": error}, 503)
+        if headings:
+            text = "\n\n".join(
+                f"{heading}\n{fake_description(name)}"
+                for heading, name in zip(headings, names)
+            )
+        else:
+            text = fake_description(names[0])
+        self._send_json(response_payload(text))
+
+    def _stream(self, text):
+        """Emits the text as SSE chunks spread evenly over the latency."""
+        words = text.split(" ")
+        step = max(len(words) // STREAM_CHUNKS, 1)
+        chunks = [
+            " ".join(words[start : start + step]) + " "
+            for start in range(0, len(words), step)
+        ]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for chunk in chunks:
+            time.sleep(self.server.latency / len(chunks))
+            event = json.dumps(response_payload(chunk))
+            self.wfile.write(f"data: {event}\r\n\r\n".encode())
+            self.wfile.flush()
+
+
+def start_stub(port=0, latency=1.0, error_rate=0.0):
+    """
+    Runs the stub on a background thread.
+
+    Returns:
+        StubGeminiServer: Running server; its base URL is
+        ``f"http://127.0.0.1:{server.server_port}"``.
+    """
+    server = StubGeminiServer(("127.0.0.1", port), latency, error_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = StubGeminiServer(("127.0.0.1", args.port), args.latency, args.error_rate)
+    print(f"Stub Gemini listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
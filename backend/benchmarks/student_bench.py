@@ -0,0 +1,122 @@
+"""
+Coverage, fidelity and latency of the student fast path.
+
+Walks ``src/model/student.json`` (``ml/distill.py``) on the symptom bitmask
+of every dataset row and of an unseen stream of one-symptom changes, and
+compares each answer with the flat forest it stands in for. Reports how many
+rows the student answers, how many of those answers differ from the
+forest's, the accuracy of what would be served on the dataset rows, and
+per-row latency of the student, of the forest and of the combination (the
+student, then the forest on the rows it leaves). Exits with status 1 when the
+fidelity of the answered rows is below ``--min-fidelity``.
+
+    python -m benchmarks.student_bench
+    python -m benchmarks.student_bench --min-confidence 0.9
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import (
+    MODEL_PATH,
+    latency_summary,
+    load_dataset,
+    load_model,
+    row_mask,
+    skewed_rows,
+    write_report,
+)
+from src.utils.forest import FlatForest
+from src.utils.hashing import file_digest
+from src.utils.student import StudentTree
+
+STUDENT_PATH = "src/model/student.json"
+
+
+def timed(function, items):
+    seconds = []
+    results = []
+    for item in items:
+        started = time.perf_counter()
+        results.append(function(item))
+        seconds.append(time.perf_counter() - started)
+    return results, seconds
+
+
+def bench_stream(student, forest, rows, labels=None):
+    masks = [row_mask(row) for row in rows]
+    expected = forest.predict(rows)
+    answers, student_seconds = timed(student.get, masks)
+    _, forest_seconds = timed(lambda row: forest.predict_proba(row[None, :]), rows)
+
+    answered = np.array([answer is not None for answer in answers])
+    served = np.array(
+        [
+            answer.label if answer is not None else label
+            for answer, label in zip(answers, expected)
+        ]
+    )
+    mismatches = int(np.count_nonzero(served != expected))
+    report = {
+        "rows": len(rows),
+        "answered": int(answered.sum()),
+        "coverage": round(float(answered.mean()), 4),
+        "label_mismatches": mismatches,
+        "fidelity": round(1 - mismatches / max(int(answered.sum()), 1), 6),
+        "student": latency_summary(student_seconds),
+        "forest": latency_summary(forest_seconds),
+        "served_mean_ms": round(
+            float(
+                np.mean(
+                    np.array(student_seconds)
+                    + np.where(answered, 0.0, np.array(forest_seconds))
+                )
+                * 1000
+            ),
+            4,
+        ),
+    }
+    if labels is not None:
+        report["forest_accuracy"] = round(float((expected == labels).mean()), 4)
+        report["served_accuracy"] = round(float((served == labels).mean()), 4)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--min-confidence", type=float, help="Default: the student's own"
+    )
+    parser.add_argument("--unseen-rows", type=int, default=10000)
+    parser.add_argument("--min-fidelity", type=float, default=0.99)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    forest = FlatForest.from_sklearn(load_model())
+    student = StudentTree.load(
+        STUDENT_PATH,
+        teacher_sha256=file_digest(MODEL_PATH),
+        min_confidence=args.min_confidence,
+    )
+    features, labels = load_dataset()
+    unseen = skewed_rows(features, args.unseen_rows, args.unseen_rows, seed=1)
+
+    report = {
+        "min_confidence": student.min_confidence,
+        "confident_leaves": len(student),
+        "dataset": bench_stream(student, forest, features, labels),
+        "unseen": bench_stream(student, forest, unseen),
+    }
+    report["passed"] = all(
+        report[stream]["fidelity"] >= args.min_fidelity
+        for stream in ("dataset", "unseen")
+    )
+    write_report(report, args.output)
+    sys.exit(0 if report["passed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Offline run of ``start.py warm-cache`` against the local Gemini stub.
+
+Fills an empty temporary description database once per configuration and
+reports wall-clock time, Gemini calls, injected failures that were retried
+and per-disease timings.
+
+    python -m benchmarks.warm_cache_bench --latency 1 --error-rate 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+
+from benchmarks.common import latency_summary, write_report
+from benchmarks.stub_gemini import start_stub
+
+# (concurrency, batch size)
+CONFIGS = [(1, 1), (8, 1), (8, 4), (16, 4)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.1)
+    parser.add_argument("--backoff", type=float, default=0.2)
+    parser.add_argument(
+        "--per-disease", action="store_true", help="Include every disease's timing"
+    )
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    stub = start_stub(latency=args.latency, error_rate=args.error_rate)
+    directory = tempfile.mkdtemp()
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{stub.server_port}"
+    os.environ["GEMINI_API_KEY"] = "stub"
+    os.environ["DESCRIPTION_DB_PATH"] = os.path.join(directory, "descriptions.db")
+    from src.utils.descriptions import store
+    from src.utils.warm_cache import warm_cache
+
+    report = []
+    for concurrency, batch_size in CONFIGS:
+        store.clear()
+        stub.calls, stub.errors = 0, 0
+        result = asyncio.run(
+            warm_cache(
+                concurrency=concurrency, batch_size=batch_size, backoff=args.backoff
+            )
+        )
+        per_disease = result.pop("per_disease")
+        result["gemini_calls"] = stub.calls
+        result["injected_errors"] = stub.errors
+        result["disease_seconds"] = latency_summary(
+            [timing["seconds"] for timing in per_disease.values()] or [0]
+        )
+        if args.per_disease:
+            result["per_disease"] = per_disease
+        report.append(result)
+
+    stub.shutdown()
+    shutil.rmtree(directory)
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
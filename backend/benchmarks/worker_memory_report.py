@@ -0,0 +1,143 @@
+"""
+Per-worker memory and spawn time of gunicorn with and without preload_app.
+
+Starts the real gunicorn.conf.py twice (GUNICORN_PRELOAD=0 and =1), sends a
+little traffic, then reads RSS, PSS and USS of every worker from
+/proc/<pid>/smaps_rollup. It also recycles one worker to time how long a
+replacement takes to boot. Linux only.
+
+    python -m benchmarks.worker_memory_report --workers 4
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from benchmarks.common import write_report
+
+BOOT_LINE = re.compile(r"Worker (\d+) booted in ([\d.]+) ms")
+
+
+def _smaps(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": round(fields["Rss"], 1),
+        "pss_mb": round(fields["Pss"], 1),
+        "uss_mb": round(fields["Private_Clean"] + fields["Private_Dirty"], 1),
+    }
+
+
+def _children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as file:
+        return [int(child) for child in file.read().split()]
+
+
+def _boots(log_path):
+    with open(log_path) as file:
+        return [(int(pid), float(ms)) for pid, ms in BOOT_LINE.findall(file.read())]
+
+
+def _wait_for(condition, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return
+        time.sleep(0.1)
+    raise TimeoutError("gunicorn did not become ready in time")
+
+
+def _post(url, body):
+    request = urllib.request.Request(
+        url, json.dumps(body).encode(), {"Content-Type": "application/json"}
+    )
+    urllib.request.urlopen(request, timeout=10).read()
+
+
+def measure(preload, n_workers, port, requests):
+    env = dict(os.environ, GUNICORN_PRELOAD="1" if preload else "0")
+    env.setdefault("GEMINI_API_KEY", "unused")
+    log = tempfile.NamedTemporaryFile("w+", suffix=".log", delete=False)
+    cmd = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--config",
+        "gunicorn.conf.py",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(n_workers),
+        "--pid",
+        log.name + ".pid",
+        "wsgi:app",
+    ]
+    started = time.monotonic()
+    master = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        _wait_for(lambda: len(_boots(log.name)) >= n_workers)
+        ready_s = time.monotonic() - started
+        for i in range(requests):
+            _post(
+                f"http://127.0.0.1:{port}/predict",
+                ["Itching", "Skin Rash"][: 1 + i % 2],
+            )
+
+        workers = {pid: _smaps(pid) for pid in _children(master.pid)}
+        master_memory = _smaps(master.pid)
+        initial_boots = [ms for _, ms in _boots(log.name)]
+
+        victim = next(iter(workers))
+        os.kill(victim, signal.SIGTERM)
+        _wait_for(lambda: len(_boots(log.name)) > len(initial_boots))
+        recycle_ms = _boots(log.name)[-1][1]
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait(timeout=30)
+        os.unlink(log.name)
+
+    return {
+        "preload_app": preload,
+        "workers": n_workers,
+        "ready_s": round(ready_s, 2),
+        "worker_boot_ms": initial_boots,
+        "recycled_worker_boot_ms": recycle_ms,
+        "master": master_memory,
+        "per_worker": list(workers.values()),
+        "total_pss_mb": round(
+            master_memory["pss_mb"] + sum(w["pss_mb"] for w in workers.values()), 1
+        ),
+        "mean_worker_uss_mb": round(
+            sum(w["uss_mb"] for w in workers.values()) / len(workers), 1
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--output", help="Also write the JSON report here")
+    args = parser.parse_args()
+
+    report = [
+        measure(preload, args.workers, args.port, args.requests)
+        for preload in (False, True)
+    ]
+    write_report(report, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,10 @@
 # Gunicorn configuration file
+import gc
+import glob
+import os
+import shutil
+import tempfile
+import time
 
 # Server socket
 bind = "127.0.0.1:8000"
@@ -6,7 +12,11 @@ backlog = 2048
 
 # Worker processes
 workers = 4
-worker_class = "sync"
+# "sync" by default; "gthread" (with GUNICORN_THREADS > 1) lets a worker keep
+# serving predictions while other threads wait on Gemini. `start.py async`
+# overrides this with Uvicorn workers.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
 worker_connections = 1000
 timeout = 30
 keepalive = 2
@@ -15,6 +25,12 @@ keepalive = 2
 max_requests = 1000
 max_requests_jitter = 100
 
+# Load the app (and the model) once in the master. Workers, including the
+# ones that replace recycled workers, are forked with the model already in
+# memory and share its pages copy-on-write. Set GUNICORN_PRELOAD=0 to load
+# the app in every worker instead.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") != "0"
+
 # Logging
 accesslog = "-"
 errorlog = "-"
@@ -30,6 +46,71 @@ user = None
 group = None
 tmp_upload_dir = None
 
+# Prometheus metrics
+# Workers write their samples to files in this directory and /metrics sums
+# them, so counts are the same whichever worker answers a scrape. It must be
+# set before the app is imported, which preload_app does right after this
+# file is read. Without PROMETHEUS_MULTIPROC_DIR a private temporary
+# directory is created and removed again on exit.
+metrics_dir_created = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+if metrics_dir_created:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(
+        prefix="disease-detector-metrics-"
+    )
+os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+# Shared prediction cache (PREDICTION_CACHE_BACKEND=shared)
+# The table is created here, before any worker is forked, and every worker
+# inherits the mapping.
+shared_prediction_cache = None
+
+
+def on_starting(server):
+    global shared_prediction_cache
+    # Samples left by a previous run would be added to this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+        os.remove(path)
+
+    if os.getenv("PREDICTION_CACHE_BACKEND", "local").lower() == "shared":
+        from src.utils import shared_cache
+
+        shared_prediction_cache = shared_cache.get_or_create(
+            int(os.getenv("SHARED_CACHE_SLOTS", "65536"))
+        )
+        server.log.info(
+            f"Shared prediction cache {shared_prediction_cache.name} "
+            f"with {shared_prediction_cache.capacity} slots"
+        )
+
+
+def pre_fork(server, worker):
+    # Move everything loaded so far out of the collector's reach, so garbage
+    # collection in the workers does not write to (and un-share) those pages
+    gc.freeze()
+    worker.spawned_at = time.monotonic()
+
+
+def post_worker_init(worker):
+    elapsed_ms = (time.monotonic() - worker.spawned_at) * 1000
+    worker.log.info(f"Worker {worker.pid} booted in {elapsed_ms:.1f} ms")
+
+
+def child_exit(server, worker):
+    # Drops the live-process samples of gauges of the worker; its counters
+    # and histograms keep counting towards the totals
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if shared_prediction_cache is not None:
+        shared_prediction_cache.close()
+    if metrics_dir_created:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+
+
 # SSL (uncomment and configure if needed)
 # keyfile = None
 # certfile = None
@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # Disease Detector Backend Server Launcher
-# Usage: ./run.sh [dev|prod] [options]
+# Usage: ./run.sh [dev|prod|async|warm-cache|pack-model|test] [options]
 
 set -e
 
@@ -31,17 +31,37 @@ case "$MODE" in
         echo ""
         uv run python start.py prod
         ;;
+    "async")
+        echo "🚀 Starting async production server with Gunicorn + Uvicorn workers..."
+        echo "Server will be available at: http://127.0.0.1:8000"
+        echo "Press Ctrl+C to stop the server"
+        echo ""
+        uv run python start.py async
+        ;;
+    "warm-cache")
+        echo "🔥 Generating every missing disease description..."
+        shift
+        uv run python start.py warm-cache "$@"
+        ;;
+    "pack-model")
+        echo "📦 Packing the trained forest..."
+        shift
+        uv run python start.py pack-model "$@"
+        ;;
     "test")
         echo "🧪 Testing server startup..."
         echo "This will start the server for 5 seconds and then stop"
         timeout 5 uv run python start.py dev || echo "✅ Server test completed"
         ;;
     *)
-        echo "Usage: $0 [dev|prod|test]"
+        echo "Usage: $0 [dev|prod|async|warm-cache|pack-model|test]"
         echo ""
         echo "Modes:"
         echo "  dev   - Development mode with Flask's built-in server (default)"
         echo "  prod  - Production mode with Gunicorn WSGI server"
+        echo "  async - Production mode with Uvicorn workers (non-blocking descriptions)"
+        echo "  warm-cache - Pre-generate all missing disease descriptions"
+        echo "  pack-model - Write src/model/model.forest for INFERENCE_BACKEND=packed"
         echo "  test  - Test server startup and shutdown"
         echo ""
         echo "Examples:"
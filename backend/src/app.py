@@ -1,14 +1,43 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from src.utils.utils import (
     encode_symptoms,
+    encode_symptoms_batch,
     get_symptoms,
     inverse_encode_symptoms,
+)
+from src.utils.descriptions import (
+    get_description_stat,
     get_disease_description,
+    get_encoded_description,
+    stream_disease_description,
     clear_cache,
 )
-from joblib import load
+from src.utils.data import display_named_symptoms, diseases
+from src.utils.registry import UnknownSymptomError, disease_names, symptom_mask
+from src.utils.http_cache import cache_headers, is_not_modified, not_modified
+from src.utils.compression import (
+    COMPRESS_MIN_SIZE,
+    ENCODINGS,
+    compress,
+    compress_response,
+    encoded_response,
+    negotiate_encoding,
+)
+from src.utils.json_provider import create_json_provider
+from src.utils import metrics, profiling
+from src.utils import data as data_module
+from src.utils.prediction_cache import TOP_K, PredictionCache, cached_predictions
+from src.utils import shared_cache
+from src.utils.inference import load_predictor
+from src.utils.batching import MicroBatcher
+from src.utils.case_index import CaseIndex
+from src.utils.hashing import file_digest
+from src.utils.student import StudentTree
+import atexit
+import hashlib
 import logging
+import os
 import time
 
 # Configure logging
@@ -16,17 +45,172 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = create_json_provider(app)
+app.before_request(metrics.start_request_timer)
+# after_request hooks run in reverse order, so latency includes compression
+app.after_request(metrics.observe_request)
+app.after_request(compress_response)
+# Opt-in: PROFILE_SAMPLE_RATE or an X-Profile header with the admin password
+app.before_request(profiling.start_request_profile)
+app.teardown_request(profiling.stop_request_profile)
 
 # Configure CORS
 CORS(app, origins=["*"])  # Configure this properly for production
 
+# Upper bound on the number of cases accepted by /predict/batch
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+MODEL_PATH = "src/model/model.joblib"
+CASE_INDEX_PATH = "src/model/case_index.json"
+STUDENT_PATH = "src/model/student.json"
+
+# Engine that evaluates the forest, see src/utils/inference.py
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "flat").lower()
+# Concurrent predictions of a worker wait up to this long to share one model
+# call (0 disables batching, see src/utils/batching.py)
+INFERENCE_BATCH_WINDOW_US = float(os.getenv("INFERENCE_BATCH_WINDOW_US", "0"))
+INFERENCE_BATCH_MAX_ROWS = int(os.getenv("INFERENCE_BATCH_MAX_ROWS", "64"))
+# Leaf confidence the student needs to answer (empty: the distilled default)
+STUDENT_MIN_CONFIDENCE = os.getenv("STUDENT_MIN_CONFIDENCE", "")
+
+# Seconds clients and proxies may reuse GET responses without revalidating
+DESCRIPTION_MAX_AGE = int(os.getenv("DESCRIPTION_MAX_AGE", "3600"))
+METADATA_MAX_AGE = int(os.getenv("METADATA_MAX_AGE", "86400"))
+
+
+def create_prediction_cache():
+    """
+    Build the prediction cache selected by ``PREDICTION_CACHE_BACKEND``.
+
+    ``local`` (default) is a per-worker LRU of ``PREDICTION_CACHE_SIZE``
+    entries. ``shared`` uses the host-wide table created by gunicorn's master
+    before fork, or creates one when running outside gunicorn.
+    """
+    backend = os.getenv("PREDICTION_CACHE_BACKEND", "local").lower()
+    if backend == "shared":
+        cache = shared_cache.get_or_create(
+            int(os.getenv("SHARED_CACHE_SLOTS", "65536"))
+        )
+        atexit.register(cache.close)
+        return cache
+    return PredictionCache(int(os.getenv("PREDICTION_CACHE_SIZE", "1024")))
+
+
+prediction_cache = create_prediction_cache()
+
+
+def load_model(path=MODEL_PATH):
+    """Load the model, build its inference backend and rebind the cache to it"""
+    global model, predictor
+    model, predictor = load_predictor(path, INFERENCE_BACKEND)
+    if INFERENCE_BATCH_WINDOW_US > 0:
+        predictor = MicroBatcher(
+            predictor, INFERENCE_BATCH_WINDOW_US, INFERENCE_BATCH_MAX_ROWS
+        )
+    stat = os.stat(path)
+    prediction_cache.bind_model((path, stat.st_mtime_ns, stat.st_size))
+    return model
+
+
 # Load model with error handling
 try:
-    model = load("src/model/model.joblib")
+    load_model()
     logger.info("Model loaded successfully")
 except Exception as e:
     logger.error(f"Failed to load model: {e}")
     model = None
+    predictor = None
+
+# Exact-match answers for training presentations (CASE_INDEX=0 disables it)
+case_index = None
+if os.getenv("CASE_INDEX", "1") != "0":
+    try:
+        case_index = CaseIndex.load(CASE_INDEX_PATH)
+        logger.info(f"Case index loaded with {len(case_index)} cases")
+    except Exception as e:
+        logger.error(f"Failed to load case index: {e}")
+
+# Opt-in: single-tree student of the forest answers its confident leaves
+# (STUDENT=1, see src/utils/student.py and ml/distill.py)
+student = None
+if os.getenv("STUDENT", "0") == "1" and model is not None:
+    try:
+        student = StudentTree.load(
+            STUDENT_PATH,
+            teacher_sha256=file_digest(MODEL_PATH),
+            min_confidence=(
+                float(STUDENT_MIN_CONFIDENCE) if STUDENT_MIN_CONFIDENCE else None
+            ),
+        )
+        logger.info(
+            f"Student loaded with {len(student)} leaves at confidence "
+            f">= {student.min_confidence}"
+        )
+    except Exception as e:
+        logger.error(f"Failed to load student: {e}")
+
+
+def lookup_known(mask, use_case_index=True):
+    """
+    Answer a symptom bitmask without the model when possible.
+
+    The case index only records the diagnoses seen in training and the
+    student only its label, so callers asking for a ranked differential pass
+    ``use_case_index=False`` to get the forest's probabilities instead.
+    Student answers are not cached: the cache holds the forest's
+    differentials, and walking the student costs about as much as a probe.
+
+    Returns:
+        tuple: (CachedPrediction or None,
+        "case_index" / "cache" / "student" / None)
+    """
+    if use_case_index and case_index is not None:
+        cached = case_index.get(mask)
+        if cached is not None:
+            return cached, "case_index"
+    cached = prediction_cache.get(mask)
+    if cached is not None:
+        return cached, "cache"
+    if use_case_index and student is not None:
+        cached = student.get(mask)
+        if cached is not None:
+            return cached, "student"
+    return None, None
+
+
+def _symptom_list(data):
+    """
+    Symptoms of a request, given as a bare list or as ``{"symptoms": [...]}``.
+
+    Returns:
+        list: The symptoms, or None when they are missing, not a list or
+        empty, since an all-zero row still gets a confident prediction.
+    """
+    symptoms = data.get("symptoms") if isinstance(data, dict) else data
+    if not isinstance(symptoms, list) or not symptoms:
+        return None
+    return symptoms
+
+
+def _requested_top_k():
+    """Read ``?top_k=N`` (1..TOP_K); None when the caller did not ask for it"""
+    raw = request.args.get("top_k")
+    if raw is None:
+        return None
+    top_k = int(raw)
+    if not 1 <= top_k <= TOP_K:
+        raise ValueError(f"top_k must be between 1 and {TOP_K}")
+    return top_k
+
+
+def _differential(cached, top_k):
+    """Most likely diseases of a prediction with their probabilities"""
+    names = inverse_encode_symptoms(cached.top_classes[:top_k])
+    return [
+        {"disease": str(name), "probability": round(float(probability), 4)}
+        for name, probability in zip(names, cached.top_probabilities[:top_k])
+        if probability > 0
+    ]
 
 
 @app.route("/")
@@ -34,24 +218,132 @@ def index():
     return jsonify(message="Welcome to the Flask API!")
 
 
+predict_stages = metrics.predict_stages("/predict")
+predict_batch_stages = metrics.predict_stages("/predict/batch")
+
+
 @app.route("/predict", methods=["POST"])
 def encode_symptoms_route():
     if model is None:
         return jsonify(error="Model not available"), 503
 
-    data = request.get_json()
+    with predict_stages["json_parse"].time():
+        data = request.get_json()
     if not data:
         return jsonify(error="No data provided"), 400
+    symptoms = _symptom_list(data)
+    if symptoms is None:
+        return jsonify(error="No symptoms provided"), 400
+
+    try:
+        top_k = _requested_top_k()
+    except ValueError:
+        return jsonify(error=f"top_k must be an integer between 1 and {TOP_K}"), 400
+
+    try:
+        with predict_stages["get_symptoms"].time():
+            symptom_columns = get_symptoms(symptoms)
+    except UnknownSymptomError as e:
+        return jsonify(error="Unknown symptoms", unknown=e.unknown), 400
 
     try:
-        encoded_symptoms = encode_symptoms(get_symptoms(data))
-        prediction = model.predict([encoded_symptoms])
-        return jsonify(disease=str(inverse_encode_symptoms(prediction)[0]))
+        with predict_stages["cache_lookup"].time():
+            mask = symptom_mask(symptom_columns)
+            cached, source = lookup_known(mask, use_case_index=top_k is None)
+        if cached is None:
+            with predict_stages["encode_symptoms"].time():
+                encoded_symptoms = encode_symptoms(symptom_columns)
+            with predict_stages["model_predict"].time():
+                probabilities = predictor.predict_proba([encoded_symptoms])
+                cached = cached_predictions(probabilities)[0]
+            prediction_cache.put(mask, cached)
+            source = "model"
+        with predict_stages["decode"].time():
+            response = {
+                "disease": str(inverse_encode_symptoms([cached.label])[0]),
+                "source": source,
+            }
+            if top_k is not None:
+                response["top_k"] = _differential(cached, top_k)
+        return jsonify(response)
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return jsonify(error="Prediction failed"), 500
 
 
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch_route():
+    """Predict diseases for many symptom lists with a single model call"""
+    if model is None:
+        return jsonify(error="Model not available"), 503
+
+    with predict_batch_stages["json_parse"].time():
+        data = request.get_json()
+    if not data:
+        return jsonify(error="No data provided"), 400
+
+    cases = data.get("cases") if isinstance(data, dict) else data
+    if not isinstance(cases, list) or not cases:
+        return jsonify(error="No cases provided"), 400
+    if len(cases) > MAX_BATCH_SIZE:
+        return jsonify(error=f"Batch exceeds {MAX_BATCH_SIZE} cases"), 413
+    case_symptoms = [_symptom_list(case) for case in cases]
+    for index, symptoms in enumerate(case_symptoms):
+        if symptoms is None:
+            return jsonify(error="Case has no symptoms", case=index), 400
+
+    try:
+        top_k = _requested_top_k()
+    except ValueError:
+        return jsonify(error=f"top_k must be an integer between 1 and {TOP_K}"), 400
+
+    try:
+        with predict_batch_stages["get_symptoms"].time():
+            symptom_lists = [get_symptoms(symptoms) for symptoms in case_symptoms]
+    except UnknownSymptomError as e:
+        return jsonify(error="Unknown symptoms", unknown=e.unknown), 400
+
+    try:
+        with predict_batch_stages["cache_lookup"].time():
+            masks = [symptom_mask(symptom_columns) for symptom_columns in symptom_lists]
+            results, sources = map(
+                list,
+                zip(
+                    *[
+                        lookup_known(mask, use_case_index=top_k is None)
+                        for mask in masks
+                    ]
+                ),
+            )
+        missing = [row for row, cached in enumerate(results) if cached is None]
+        if missing:
+            with predict_batch_stages["encode_symptoms"].time():
+                encoded_symptoms = encode_symptoms_batch(
+                    [symptom_lists[row] for row in missing]
+                )
+            with predict_batch_stages["model_predict"].time():
+                probabilities = predictor.predict_proba(encoded_symptoms)
+                computed = cached_predictions(probabilities)
+            for row, cached in zip(missing, computed):
+                results[row] = cached
+                sources[row] = "model"
+                prediction_cache.put(masks[row], cached)
+        with predict_batch_stages["decode"].time():
+            labels = [cached.label for cached in results]
+            response = {
+                "diseases": [
+                    str(disease) for disease in inverse_encode_symptoms(labels)
+                ],
+                "sources": sources,
+            }
+            if top_k is not None:
+                response["top_k"] = [_differential(cached, top_k) for cached in results]
+        return jsonify(response)
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        return jsonify(error="Prediction failed"), 500
+
+
 @app.route("/disease_description", methods=["POST"])
 def disease_description_route():
     data = request.get_json()
@@ -62,7 +354,9 @@ def disease_description_route():
         disease_name = data["disease_name"]
         description = get_disease_description(disease_name)
         if description:
-            return jsonify(description=str(description))
+            return _description_response(
+                description, get_description_stat(disease_name)
+            )
         else:
             return jsonify(error="Description not found for the given disease"), 404
     except Exception as e:
@@ -70,15 +364,155 @@ def disease_description_route():
         return jsonify(error="Description lookup failed"), 500
 
 
+@app.route("/disease_description", methods=["GET"])
+def disease_description_get_route():
+    """
+    Cacheable variant of the POST route taking ``?disease_name=``.
+
+    Revalidations are answered from the stored content digest, so a 304
+    neither reads nor generates the description.
+    """
+    try:
+        response = description_get_shortcut()
+        if response is not None:
+            return response
+        disease_name = request.args["disease_name"]
+        description = get_disease_description(disease_name)
+        return description_get_response(disease_name, description)
+    except Exception as e:
+        logger.error(f"Description lookup error: {e}")
+        return jsonify(error="Description lookup failed"), 500
+
+
+def description_get_shortcut():
+    """
+    The answers of ``GET /disease_description`` that need no description:
+    a missing or unknown disease, or a 304 for a current cached copy.
+    Shared with the async route in asgi.py.
+
+    Returns:
+        The response, or None when the description has to be looked up.
+    """
+    disease_name = request.args.get("disease_name")
+    if not disease_name:
+        return jsonify(error="No disease name provided"), 400
+    if disease_name not in diseases:
+        return jsonify(error="Description not found for the given disease"), 404
+    stat = get_description_stat(disease_name)
+    if stat is not None and is_not_modified(stat.digest, stat.created_at):
+        return not_modified(stat.digest, stat.created_at, _description_max_age(stat))
+    return None
+
+
+def description_get_response(disease_name, description):
+    """
+    Full response of ``GET /disease_description``, with its validators and
+    Cache-Control. Shared with the async route in asgi.py.
+    """
+    stat = get_description_stat(disease_name)
+    response = _description_response(description, stat)
+    if stat is None:
+        # Not stored, e.g. Gemini returned no candidates: do not cache it
+        response.headers["Cache-Control"] = "no-store"
+        return response
+    return cache_headers(
+        response, stat.digest, stat.created_at, _description_max_age(stat)
+    )
+
+
+def _description_response(description, stat):
+    """
+    JSON response of a description, sent as stored pre-compressed when the
+    client accepts one of the stored encodings.
+    """
+    encoding = negotiate_encoding()
+    if stat is not None and encoding is not None:
+        body = get_encoded_description(stat, encoding)
+        if body is not None:
+            return encoded_response(body, encoding)
+    return jsonify(description=str(description))
+
+
+def _description_max_age(stat):
+    """DESCRIPTION_MAX_AGE, shortened so caches never outlive the entry's TTL"""
+    if stat.expires_at is None:
+        return DESCRIPTION_MAX_AGE
+    return min(DESCRIPTION_MAX_AGE, stat.expires_at - time.time())
+
+
+def _sse(data, event=None):
+    """Formats one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {app.json.dumps(data)}\n\n"
+
+
+def description_event(chunk=None, error=None):
+    """
+    One event of the description stream: ``{"text": chunk}``, an ``error``
+    event when ``error`` is given, or else the closing ``done`` event.
+    Shared with the async route in asgi.py.
+    """
+    if error is not None:
+        logger.error(f"Description stream error: {error}")
+        return _sse({"error": "Description lookup failed"}, event="error")
+    if chunk is None:
+        return _sse({}, event="done")
+    return _sse({"text": chunk})
+
+
+def event_stream_response(events, response_class=Response):
+    """
+    Server-Sent Events response sending ``events`` as they are produced.
+    ``response_class`` lets asgi.py pass its async stream response.
+    """
+    return response_class(
+        events,
+        mimetype="text/event-stream",
+        # X-Accel-Buffering stops nginx from holding chunks back
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/disease_description/stream", methods=["GET", "POST"])
+def disease_description_stream_route():
+    """
+    Streams the description as Server-Sent Events: one ``{"text": ...}``
+    event per chunk, then a ``done`` event, or an ``error`` event on failure.
+    Accepts ``disease_name`` in a JSON body or as a query parameter.
+    """
+    data = request.get_json(silent=True) or request.args
+    if not data or "disease_name" not in data:
+        return jsonify(error="No disease name provided"), 400
+    disease_name = data["disease_name"]
+
+    def events():
+        try:
+            for chunk in stream_disease_description(disease_name):
+                yield description_event(chunk)
+            yield description_event()
+        except Exception as e:
+            yield description_event(error=e)
+
+    return event_stream_response(stream_with_context(events()))
+
+
 @app.route("/clear_cache", methods=["POST"])
 def clear_cache_route():
-    """Endpoint to clear the disease descriptions cache"""
+    """
+    Endpoint to clear the disease descriptions cache, optionally only for
+    one ``disease_name`` and/or ``prompt_version``
+    """
     password = request.json.get("password")
     if not password:
         return jsonify(error="Password is required"), 400
     try:
-        if clear_cache(password=password):
-            return jsonify(message="Cache cleared successfully"), 200
+        removed = clear_cache(
+            password=password,
+            disease_name=request.json.get("disease_name"),
+            prompt_version=request.json.get("prompt_version"),
+        )
+        if removed is not None:
+            return jsonify(message="Cache cleared successfully", removed=removed), 200
         else:
             return jsonify(error="Failed to clear cache. Enter correct password"), 500
     except Exception as e:
@@ -86,6 +520,57 @@ def clear_cache_route():
         return jsonify(error="Cache clearing failed"), 500
 
 
+class StaticJSON:
+    """
+    A JSON body that never changes while the worker runs, with its ETag,
+    compressed once in every supported encoding when it is large enough
+    """
+
+    def __init__(self, payload):
+        self.body = app.json.dumps(payload).encode("utf-8")
+        self.encoded = {
+            encoding: compress(self.body, encoding, best=True)
+            for encoding in ENCODINGS
+            if len(self.body) >= COMPRESS_MIN_SIZE
+        }
+        self.etag = hashlib.sha256(self.body).hexdigest()
+        # Same in every worker, unlike the time the worker started
+        self.last_modified = os.path.getmtime(data_module.__file__)
+
+    def response(self):
+        if is_not_modified(self.etag, self.last_modified):
+            return not_modified(self.etag, self.last_modified, METADATA_MAX_AGE)
+        encoding = negotiate_encoding()
+        if encoding in self.encoded:
+            response = encoded_response(self.encoded[encoding], encoding)
+        else:
+            response = Response(self.body, mimetype="application/json")
+        return cache_headers(response, self.etag, self.last_modified, METADATA_MAX_AGE)
+
+
+symptoms_metadata = StaticJSON({"symptoms": list(display_named_symptoms)})
+diseases_metadata = StaticJSON({"diseases": [str(name) for name in disease_names]})
+
+
+@app.route("/symptoms", methods=["GET"])
+def symptoms_route():
+    """Display names of every symptom /predict accepts"""
+    return symptoms_metadata.response()
+
+
+@app.route("/diseases", methods=["GET"])
+def diseases_route():
+    """Every disease the model can predict, in label order"""
+    return diseases_metadata.response()
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Prometheus metrics, summed over all gunicorn workers"""
+    body, content_type = metrics.render()
+    return Response(body, content_type=content_type)
+
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for monitoring"""
@@ -93,6 +578,9 @@ def health_check():
         {
             "status": "healthy",
             "model_loaded": model is not None,
+            "case_index_size": len(case_index) if case_index is not None else 0,
+            "student_leaves": len(student) if student is not None else 0,
+            "prediction_cache": prediction_cache.stats(),
             "timestamp": str(int(time.time())),
         }
     )
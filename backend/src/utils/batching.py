@@ -0,0 +1,121 @@
+"""
+Micro-batching of concurrent single-row predictions.
+
+Walking the forest costs nearly the same for one row as for dozens, so when
+several requests of a worker need the model at the same time it is cheaper
+to stack their rows and call ``predict_proba`` once. ``MicroBatcher`` wraps a
+predictor and does that: the first caller of a batch waits up to
+``max_wait_us`` microseconds, or until ``max_rows`` rows are queued, then
+runs the whole batch and hands every other caller its own rows back.
+
+Batching only pays off when a worker serves predictions concurrently, which
+means gthread workers. A sync worker never has two requests in flight, and
+neither does the async mode for predictions: ``asgi.py`` hands them to the
+Flask app through ``WsgiToAsgi``, one at a time per worker. Those should run
+with ``INFERENCE_BATCH_WINDOW_US=0``, which disables batching.
+The batch is run by the first caller rather than a background thread, so
+nothing has to be restarted after gunicorn forks the workers.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from src.utils import metrics
+
+
+class _Pending:
+    """Rows of one caller and, once the batch ran, their probabilities."""
+
+    __slots__ = ("rows", "done", "result", "error")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """Predictor that batches concurrent ``predict_proba`` calls."""
+
+    def __init__(self, predictor, max_wait_us=500, max_rows=64):
+        """
+        Args:
+            predictor: Object with a ``predict_proba(X)`` method.
+            max_wait_us (float): Longest time the first row of a batch waits
+                for others, in microseconds.
+            max_rows (int): Rows that close a batch without waiting longer.
+                Calls with at least this many rows skip batching.
+        """
+        self.predictor = predictor
+        self.max_wait = max_wait_us / 1e6
+        self.max_rows = max_rows
+        self._pending = []
+        self._rows = 0
+        self._leader = False
+        self._condition = threading.Condition()
+
+    def __getattr__(self, name):
+        # classes_, n_features_in_ and friends come from the wrapped predictor
+        return getattr(self.predictor, name)
+
+    def predict_proba(self, X):
+        """
+        Same result as the wrapped predictor's ``predict_proba``.
+
+        Args:
+            X (array-like): Matrix of shape (n_rows, n_features).
+
+        Returns:
+            numpy.ndarray: Class probabilities of shape (n_rows, n_classes).
+        """
+        X = np.asarray(X)
+        if len(X) >= self.max_rows:
+            return self.predictor.predict_proba(X)
+
+        pending = _Pending(X)
+        with self._condition:
+            self._pending.append(pending)
+            self._rows += len(X)
+            leader = not self._leader
+            if leader:
+                self._leader = True
+                deadline = time.perf_counter() + self.max_wait
+                while self._rows < self.max_rows:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch, self._pending = self._pending, []
+                self._rows = 0
+                self._leader = False
+            elif self._rows >= self.max_rows:
+                self._condition.notify()
+
+        if leader:
+            self._run(batch)
+        else:
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _run(self, batch):
+        """Predicts a whole batch and scatters the rows back to each caller."""
+        metrics.observe_inference_batch(sum(len(item.rows) for item in batch))
+        try:
+            probabilities = self.predictor.predict_proba(
+                np.concatenate([item.rows for item in batch])
+            )
+        except Exception as e:
+            for item in batch:
+                item.error = e
+        else:
+            start = 0
+            for item in batch:
+                item.result = probabilities[start : start + len(item.rows)]
+                start += len(item.rows)
+        for item in batch:
+            item.done.set()
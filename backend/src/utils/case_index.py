@@ -0,0 +1,62 @@
+"""
+Exact-match lookup of textbook presentations from the training dataset.
+
+``ml/build_case_index.py`` stores every distinct training symptom vector with
+the distribution of diagnoses it was labelled with. A request whose symptom
+bitmask is in the index is answered with one dict probe and never reaches
+the forest.
+"""
+
+import json
+
+import numpy as np
+
+from src.utils.data import symptoms
+from src.utils.prediction_cache import cached_predictions
+from src.utils.registry import disease_names
+
+
+class CaseIndex:
+    """Mapping of symptom bitmask -> CachedPrediction built from label counts."""
+
+    def __init__(self, cases):
+        self._cases = cases
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads an index written by ``ml/build_case_index.py``.
+
+        Args:
+            path (str): Path of case_index.json.
+
+        Returns:
+            CaseIndex: The loaded index.
+
+        Raises:
+            ValueError: If the file was built for different symptom columns or
+            disease labels than the ones this backend encodes.
+        """
+        with open(path, "r") as file:
+            data = json.load(file)
+        if data["columns"] != list(symptoms):
+            raise ValueError("Case index columns do not match the model's symptoms")
+        if data["classes"] != list(disease_names):
+            raise ValueError("Case index classes do not match the model's labels")
+
+        masks = [int(mask, 16) for mask in data["cases"]]
+        counts = np.zeros((len(masks), len(disease_names)))
+        for row, distribution in enumerate(data["cases"].values()):
+            for label, count in distribution.items():
+                counts[row, int(label)] = count
+        distributions = counts / counts.sum(axis=1, keepdims=True)
+        return cls(dict(zip(masks, cached_predictions(distributions))))
+
+    def __len__(self):
+        return len(self._cases)
+
+    def get(self, mask):
+        """
+        Returns the CachedPrediction recorded for ``mask`` or None.
+        """
+        return self._cases.get(mask)
@@ -0,0 +1,109 @@
+"""
+Negotiated gzip/brotli compression of API responses.
+
+``compress_response`` runs after every request and compresses JSON and text
+bodies of at least ``COMPRESS_MIN_SIZE`` bytes with the best encoding the
+client accepts, at a fast level. Bodies that are served often and never
+change, such as stored descriptions, are compressed once at the highest
+level instead (``compress(..., best=True)``) and sent with
+``encoded_response``, which the hook leaves alone.
+
+Brotli is used when the ``brotli`` package is installed, gzip otherwise.
+Compressed responses get a weak ETag, since their bytes differ from the
+identity encoding the strong validator describes.
+"""
+
+import gzip
+import os
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+
+# Supported encodings, preferred first when the client rates them equally
+ENCODINGS = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/plain", "text/html"}
+
+# (per request, once at storage time)
+GZIP_LEVELS = (6, 9)
+BROTLI_QUALITIES = (5, 11)
+
+
+def compress(body, encoding, best=False):
+    """
+    Compresses ``body`` with one of ENCODINGS.
+
+    Args:
+        body (bytes): Data to compress.
+        encoding (str): ``"br"`` or ``"gzip"``.
+        best (bool): Use the slowest, smallest setting, for bodies that
+            are compressed once and sent many times.
+
+    Returns:
+        bytes: Compressed body.
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITIES[best])
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(body, compresslevel=GZIP_LEVELS[best], mtime=0)
+
+
+def negotiate_encoding():
+    """Best of ENCODINGS for the current request's Accept-Encoding, or None"""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def encoded_response(body, encoding, mimetype="application/json"):
+    """Response for a body that is already compressed with ``encoding``"""
+    response = Response(body, mimetype=mimetype)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _compressible(response):
+    return (
+        response.mimetype in COMPRESSIBLE_MIMETYPES
+        and not response.is_streamed
+        and not response.direct_passthrough
+    )
+
+
+def compress_response(response):
+    """
+    ``after_request`` hook compressing eligible responses.
+
+    Args:
+        response (Response): Response returned by the view.
+
+    Returns:
+        Response: The same response, compressed when worthwhile.
+    """
+    encoding = response.headers.get("Content-Encoding")
+    if encoding is None and _compressible(response):
+        if response.status_code in (200, 304):
+            # Also on identity bodies, so caches keep encodings apart
+            response.vary.add("Accept-Encoding")
+        if response.status_code == 200:
+            body = response.get_data()
+            if len(body) < COMPRESS_MIN_SIZE:
+                return response
+            encoding = negotiate_encoding()
+            if encoding is not None:
+                response.set_data(compress(body, encoding))
+                response.headers["Content-Encoding"] = encoding
+        elif response.status_code == 304:
+            # Same validators as the compressed 200 being revalidated
+            encoding = negotiate_encoding()
+    if encoding in ENCODINGS:
+        response.vary.add("Accept-Encoding")
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+    return response
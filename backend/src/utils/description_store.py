@@ -0,0 +1,314 @@
+"""
+SQLite store for generated disease descriptions.
+
+Each description is keyed by (disease, prompt version, model), so changing
+the prompt or the Gemini model never serves text generated for the old one,
+and entries can be invalidated per disease or per prompt version. Rows carry
+their creation time, an optional TTL and a SHA-256 digest of the text, so
+HTTP validators can be answered without reading the description itself;
+expired rows read as misses. Optional encoders store each description once
+more in other forms, e.g. as compressed response bodies, addressed by that
+digest.
+
+The database runs in WAL mode, so any number of workers read concurrently
+while one writes. Every lookup is a point query on the primary key. Each
+thread of each process opens its own connection, since SQLite connections
+must not be shared across threads or forked processes.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS descriptions (
+    disease TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    model TEXT NOT NULL,
+    description TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    ttl REAL,
+    PRIMARY KEY (disease, prompt_version, model)
+);
+CREATE INDEX IF NOT EXISTS descriptions_prompt_version
+    ON descriptions (prompt_version);
+CREATE TABLE IF NOT EXISTS encoded_descriptions (
+    digest TEXT NOT NULL,
+    encoding TEXT NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (digest, encoding)
+);
+"""
+
+# Seconds a connection waits for another worker's write to finish
+BUSY_TIMEOUT = 30
+
+# Version of a stored description, as returned by DescriptionStore.stat
+DescriptionStat = namedtuple("DescriptionStat", ["digest", "created_at", "expires_at"])
+
+
+def content_digest(text):
+    """Hex SHA-256 of a description's UTF-8 text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _transaction(connection):
+    """Runs the block as one write transaction, rolled back on error."""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+class DescriptionStore:
+    """Descriptions of (disease, prompt version, model) backed by SQLite."""
+
+    def __init__(
+        self, path, model, prompt_version, ttl=None, seed_path=None, encoders=None
+    ):
+        """
+        Args:
+            path (str): Database file, created on first use.
+            model (str): Gemini model new entries are stored under.
+            prompt_version (str): Version of the prompt new entries use.
+            ttl (float): Seconds new entries stay valid; None never expires.
+            seed_path (str): JSON ``{disease: description}`` file imported
+                when the database is created, e.g. the former cache file.
+            encoders (dict): ``{encoding: function(text) -> bytes}``. Every
+                stored description is also kept encoded with each of them,
+                see get_encoded.
+        """
+        self.path = path
+        self.model = model
+        self.prompt_version = prompt_version
+        self.ttl = ttl
+        self.seed_path = seed_path
+        self.encoders = encoders or {}
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=BUSY_TIMEOUT, isolation_level=None
+            )
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema(connection)
+                    self._schema_ready = True
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _create_schema(self, connection):
+        # WAL is a property of the database file, so it is switched on once;
+        # switching it ignores the busy timeout if other workers are connected
+        if connection.execute("PRAGMA journal_mode").fetchone()[0] != "wal":
+            connection.execute("PRAGMA journal_mode=WAL")
+        with _transaction(connection):
+            exists = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table'"
+                " AND name = 'descriptions'"
+            ).fetchone()
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    connection.execute(statement)
+            if not exists and self.seed_path:
+                self._import_json(connection, self.seed_path)
+            self._encode_missing(connection)
+
+    def get(self, disease_name):
+        """
+        Returns the current description for the configured prompt version
+        and model, or None when it is missing or expired.
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT description FROM descriptions"
+                " WHERE disease = ? AND prompt_version = ? AND model = ?"
+                " AND (ttl IS NULL OR created_at + ttl > ?)",
+                (disease_name, self.prompt_version, self.model, time.time()),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def stat(self, disease_name):
+        """
+        Returns the DescriptionStat of the current description, like get
+        but without reading its text, or None when it is missing or expired.
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT digest, created_at, ttl FROM descriptions"
+                " WHERE disease = ? AND prompt_version = ? AND model = ?"
+                " AND (ttl IS NULL OR created_at + ttl > ?)",
+                (disease_name, self.prompt_version, self.model, time.time()),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return None
+        digest, created_at, ttl = row
+        return DescriptionStat(
+            digest, created_at, created_at + ttl if ttl is not None else None
+        )
+
+    def get_encoded(self, digest, encoding):
+        """
+        Returns the description with content digest ``digest`` as produced
+        by ``encoders[encoding]``, or None if it is not stored that way.
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT body FROM encoded_descriptions"
+                " WHERE digest = ? AND encoding = ?",
+                (digest, encoding),
+            )
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def __contains__(self, disease_name):
+        return self.get(disease_name) is not None
+
+    def __len__(self):
+        return (
+            self._connection()
+            .execute("SELECT COUNT(*) FROM descriptions")
+            .fetchone()[0]
+        )
+
+    def put(self, disease_name, description):
+        """
+        Stores a description under the configured prompt version and model,
+        replacing any previous one.
+        """
+        digest = content_digest(description)
+        # Encoded before the write lock is taken, so other writers never wait
+        encoded = self._encode(digest, description)
+        connection = self._connection()
+        with _transaction(connection):
+            connection.execute(
+                "INSERT OR REPLACE INTO descriptions"
+                " (disease, prompt_version, model, description, digest,"
+                " created_at, ttl) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    disease_name,
+                    self.prompt_version,
+                    self.model,
+                    description,
+                    digest,
+                    time.time(),
+                    self.ttl,
+                ),
+            )
+            self._put_encoded(connection, encoded)
+
+    def invalidate(self, disease_name=None, prompt_version=None):
+        """
+        Deletes entries for all models, optionally limited to one disease
+        and/or one prompt version. With no arguments, deletes everything.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        conditions, parameters = [], []
+        if disease_name is not None:
+            conditions.append("disease = ?")
+            parameters.append(disease_name)
+        if prompt_version is not None:
+            conditions.append("prompt_version = ?")
+            parameters.append(prompt_version)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        connection = self._connection()
+        with _transaction(connection):
+            cursor = connection.execute(f"DELETE FROM descriptions{where}", parameters)
+            connection.execute(
+                "DELETE FROM encoded_descriptions"
+                " WHERE digest NOT IN (SELECT digest FROM descriptions)"
+            )
+        return cursor.rowcount
+
+    def clear(self):
+        """Removes every description for all workers."""
+        return self.invalidate()
+
+    def close(self):
+        """
+        Closes this thread's connection. Call it before forking from a
+        process that used the store, since connections must not cross fork.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _import_json(self, connection, json_path):
+        """Copies ``{disease: description}`` entries from a JSON file."""
+        if not os.path.exists(json_path):
+            return
+        with open(json_path, "r") as file:
+            entries = json.load(file)
+        now = time.time()
+        connection.executemany(
+            "INSERT OR IGNORE INTO descriptions"
+            " (disease, prompt_version, model, description, digest, created_at,"
+            " ttl) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    name,
+                    self.prompt_version,
+                    self.model,
+                    text,
+                    content_digest(text),
+                    now,
+                    self.ttl,
+                )
+                for name, text in entries.items()
+            ],
+        )
+
+    def _encode(self, digest, description):
+        return [
+            (digest, encoding, encoder(description))
+            for encoding, encoder in self.encoders.items()
+        ]
+
+    def _put_encoded(self, connection, encoded):
+        connection.executemany(
+            "INSERT OR IGNORE INTO encoded_descriptions (digest, encoding, body)"
+            " VALUES (?, ?, ?)",
+            encoded,
+        )
+
+    def _encode_missing(self, connection):
+        """Encodes stored descriptions that lack one of the encoders' forms."""
+        for encoding, encoder in self.encoders.items():
+            rows = connection.execute(
+                "SELECT DISTINCT digest, description FROM descriptions"
+                " WHERE digest NOT IN (SELECT digest FROM encoded_descriptions"
+                " WHERE encoding = ?)",
+                (encoding,),
+            ).fetchall()
+            self._put_encoded(
+                connection,
+                [(digest, encoding, encoder(text)) for digest, text in rows],
+            )
@@ -0,0 +1,396 @@
+"""
+Disease descriptions generated with Google Gemini and cached on disk.
+
+Generated descriptions are kept in a SQLite ``DescriptionStore`` keyed by
+disease, prompt version and model, together with their JSON response body
+compressed in every supported encoding, so no request compresses them again.
+
+The Gemini SDK is heavy to import and only needed when a description is not
+cached yet, so it is imported, and the client built, on first use rather
+than when a worker boots.
+"""
+
+from functools import lru_cache
+from src.utils.data import diseases
+from src.utils.description_store import DescriptionStore
+from src.utils.compression import ENCODINGS, compress
+from src.utils import json_provider, metrics
+from src.utils.single_flight import SingleFlight
+from dotenv import load_dotenv
+import asyncio
+import os
+import threading
+
+load_dotenv()
+API_KEY = os.getenv("GEMINI_API_KEY")
+PASSWORD = os.getenv("PASSWORD")
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+# Point the SDK at another endpoint, e.g. a local stub for benchmarks
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+DESCRIPTION_DB_PATH = os.getenv("DESCRIPTION_DB_PATH", "cache/descriptions.db")
+# Seconds a generated description stays valid; unset keeps it forever
+DESCRIPTION_TTL = float(os.getenv("DESCRIPTION_TTL", "0")) or None
+# Former JSON cache, imported when the database is first created
+LEGACY_CACHE_PATH = "cache/disease_descriptions.json"
+
+# Bump whenever PROMPT_SECTIONS or either prompt changes, so old descriptions
+# are regenerated. Single and batched prompts share the version: both ask for
+# the same sections per disease, so their descriptions are interchangeable
+# and warm-cache fills the entries the routes read.
+PROMPT_VERSION = "1"
+
+# What every description contains, whichever prompt generated it
+PROMPT_SECTIONS = """
+                1. **Description** – What the disease is.
+                2. **Symptoms** – Key signs to look out for.
+                3. **Causes** – Main reasons it occurs.
+                4. **Precautions** – How to prevent or reduce risk.
+                5. **Medication** – Common treatments or medicines."""
+
+
+def description_body(description):
+    """JSON body the description routes send for ``description``"""
+    return json_provider.dumps({"description": description})
+
+
+def _body_encoder(encoding):
+    return lambda description: compress(
+        description_body(description), encoding, best=True
+    )
+
+
+store = DescriptionStore(
+    DESCRIPTION_DB_PATH,
+    model=GEMINI_MODEL,
+    prompt_version=PROMPT_VERSION,
+    ttl=DESCRIPTION_TTL,
+    seed_path=LEGACY_CACHE_PATH,
+    encoders={encoding: _body_encoder(encoding) for encoding in ENCODINGS},
+)
+# At most one Gemini call per disease at a time across all workers
+generation = SingleFlight(f"{DESCRIPTION_DB_PATH}.generate.lock")
+
+
+_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _create_client():
+    from google import genai
+    from google.genai import types
+
+    http_options = (
+        types.HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None
+    )
+    return genai.Client(api_key=API_KEY, http_options=http_options)
+
+
+def get_client():
+    """
+    Returns the process-wide Gemini client, importing the SDK on first call.
+
+    Creation is serialised: a duplicate client built by a racing thread
+    would close its connection pool as soon as it was garbage collected.
+    """
+    with _client_lock:
+        return _create_client()
+
+
+async def get_client_async():
+    """
+    ``get_client`` for coroutines: the first call imports the SDK and builds
+    the client on a thread, so the event loop keeps serving meanwhile.
+    """
+    if _create_client.cache_info().currsize:
+        return _create_client()
+    return await asyncio.to_thread(get_client)
+
+
+def build_prompt(disease_name):
+    """
+    Returns the Gemini prompt for one disease.
+    """
+    return f"""
+                Give a brief and clear overview of the disease: {disease_name}.
+                Include the following sections in order:{PROMPT_SECTIONS}
+                """
+
+
+# Heading that starts each disease's section in a batched response
+BATCH_HEADING = "=== {} ==="
+
+
+def build_batch_prompt(disease_names):
+    """
+    Returns one Gemini prompt asking for the descriptions of several diseases.
+
+    Every section starts with ``BATCH_HEADING`` so the response can be split
+    back per disease with ``split_batch_response``.
+    """
+    headings = "\n".join(BATCH_HEADING.format(name) for name in disease_names)
+    return f"""
+                Give a brief and clear overview of each disease listed below.
+                Start each overview with its heading line exactly as written,
+                then include the following sections in order:{PROMPT_SECTIONS}
+
+{headings}
+                """
+
+
+def split_batch_response(text, disease_names):
+    """
+    Splits a response to ``build_batch_prompt`` into one text per disease.
+
+    Args:
+        text (str): Response text.
+        disease_names (list): Diseases that were asked for.
+
+    Returns:
+        dict: Disease name -> description, for every disease whose section
+        was found and is not empty.
+    """
+    wanted = {BATCH_HEADING.format(name): name for name in disease_names}
+    sections = {}
+    current = None
+    for line in text.splitlines():
+        heading = line.strip().strip("#*").strip()
+        if heading in wanted:
+            current = wanted[heading]
+            sections[current] = []
+        elif current is not None:
+            sections[current].append(line)
+    return {
+        name: "\n".join(lines).strip()
+        for name, lines in sections.items()
+        if "\n".join(lines).strip()
+    }
+
+
+def _store_description(disease_name, response):
+    """Caches a Gemini response and returns the text to serve."""
+    if not response.candidates:
+        return "No description available."
+    store.put(disease_name, response.text)
+    return response.text
+
+
+def get_disease_description(disease_name):
+    """
+    Fetches the description of a disease using Google Gemini API.
+
+    Concurrent misses for the same disease share one Gemini call, even when
+    they arrive at different workers.
+
+    Args:
+        disease_name (str): Name of the disease.
+
+    Returns:
+        str: Description of the disease.
+    """
+    if disease_name not in diseases:
+        return "Disease not found."
+
+    cached = store.get(disease_name)
+    metrics.record_description_lookup(hit=cached is not None)
+    if cached is not None:
+        return cached
+    return generation.do(disease_name, lambda: _generate(disease_name))
+
+
+def get_description_stat(disease_name):
+    """
+    Returns the content digest and timestamps of the cached description,
+    without reading or generating it.
+
+    Args:
+        disease_name (str): Name of the disease.
+
+    Returns:
+        DescriptionStat: Or None if the description is not cached.
+    """
+    return store.stat(disease_name)
+
+
+def get_encoded_description(stat, encoding):
+    """
+    Returns the compressed response body stored for a description.
+
+    Args:
+        stat (DescriptionStat): Version of the description, from
+            get_description_stat.
+        encoding (str): One of compression.ENCODINGS.
+
+    Returns:
+        bytes: The body of description_body, compressed, or None.
+    """
+    return store.get_encoded(stat.digest, encoding)
+
+
+def _generate(disease_name):
+    # Another worker may have stored it while this one waited for the lock
+    cached = store.get(disease_name)
+    if cached is not None:
+        return cached
+    client = get_client()
+    with metrics.gemini_call("generate"):
+        response = client.models.generate_content(
+            model=GEMINI_MODEL, contents=[build_prompt(disease_name)]
+        )
+    return _store_description(disease_name, response)
+
+
+# Characters per chunk when streaming an already cached description
+STREAM_CHUNK_CHARS = 512
+
+
+def _chunks(text):
+    for start in range(0, len(text), STREAM_CHUNK_CHARS):
+        yield text[start : start + STREAM_CHUNK_CHARS]
+
+
+def stream_disease_description(disease_name):
+    """
+    Yields the description of a disease piece by piece.
+
+    Cached descriptions are sent at once in fixed-size chunks; otherwise the
+    text is relayed from Gemini's streaming API as it is generated and
+    stored when complete.
+
+    Args:
+        disease_name (str): Name of the disease.
+
+    Yields:
+        str: Consecutive parts of the description.
+    """
+    if disease_name not in diseases:
+        yield "Disease not found."
+        return
+
+    cached = store.get(disease_name)
+    metrics.record_description_lookup(hit=cached is not None)
+    if cached is not None:
+        yield from _chunks(cached)
+        return
+    yield from generation.stream(disease_name, lambda: _generate_stream(disease_name))
+
+
+def _generate_stream(disease_name):
+    cached = store.get(disease_name)
+    if cached is not None:
+        yield from _chunks(cached)
+        return
+    parts = []
+    client = get_client()
+    with metrics.gemini_call("stream"):
+        for response in client.models.generate_content_stream(
+            model=GEMINI_MODEL, contents=[build_prompt(disease_name)]
+        ):
+            if response.candidates and response.text:
+                parts.append(response.text)
+                yield response.text
+    if parts:
+        store.put(disease_name, "".join(parts))
+    else:
+        yield "No description available."
+
+
+async def get_disease_description_async(disease_name):
+    """
+    Async variant of get_disease_description for the ASGI entry point.
+
+    Uses the SDK's async client, so one event loop can keep many Gemini
+    calls pending without tying up a thread per call.
+
+    Args:
+        disease_name (str): Name of the disease.
+
+    Returns:
+        str: Description of the disease.
+    """
+    if disease_name not in diseases:
+        return "Disease not found."
+
+    cached = store.get(disease_name)
+    metrics.record_description_lookup(hit=cached is not None)
+    if cached is not None:
+        return cached
+    return await generation.do_async(
+        disease_name, lambda: _generate_async(disease_name)
+    )
+
+
+async def _generate_async(disease_name):
+    cached = store.get(disease_name)
+    if cached is not None:
+        return cached
+    client = await get_client_async()
+    with metrics.gemini_call("generate"):
+        response = await client.aio.models.generate_content(
+            model=GEMINI_MODEL, contents=[build_prompt(disease_name)]
+        )
+    return _store_description(disease_name, response)
+
+
+async def stream_disease_description_async(disease_name):
+    """
+    Async variant of stream_disease_description for the ASGI entry point.
+
+    Args:
+        disease_name (str): Name of the disease.
+
+    Yields:
+        str: Consecutive parts of the description.
+    """
+    if disease_name not in diseases:
+        yield "Disease not found."
+        return
+
+    cached = store.get(disease_name)
+    metrics.record_description_lookup(hit=cached is not None)
+    if cached is not None:
+        for chunk in _chunks(cached):
+            yield chunk
+        return
+    async for chunk in generation.stream_async(
+        disease_name, lambda: _generate_stream_async(disease_name)
+    ):
+        yield chunk
+
+
+async def _generate_stream_async(disease_name):
+    cached = store.get(disease_name)
+    if cached is not None:
+        for chunk in _chunks(cached):
+            yield chunk
+        return
+    parts = []
+    client = await get_client_async()
+    with metrics.gemini_call("stream"):
+        async for response in await client.aio.models.generate_content_stream(
+            model=GEMINI_MODEL, contents=[build_prompt(disease_name)]
+        ):
+            if response.candidates and response.text:
+                parts.append(response.text)
+                yield response.text
+    if parts:
+        store.put(disease_name, "".join(parts))
+    else:
+        yield "No description available."
+
+
+def clear_cache(password, disease_name=None, prompt_version=None):
+    """
+    Clears cached disease descriptions.
+
+    Args:
+        password (str): Admin password.
+        disease_name (str): Only clear this disease.
+        prompt_version (str): Only clear descriptions of this prompt version.
+
+    Returns:
+        int: Number of descriptions removed, or None if the password is wrong.
+    """
+    if password != PASSWORD:
+        return None
+    return store.invalidate(disease_name=disease_name, prompt_version=prompt_version)
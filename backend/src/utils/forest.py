@@ -0,0 +1,134 @@
+"""
+Array-based evaluator for the trained random forest.
+
+``FlatForest`` copies the nodes of every tree into a handful of flat NumPy
+arrays and walks all trees for all rows together, one tree level per step.
+This skips sklearn's per-call input validation and joblib dispatch, which
+dominate the cost of scoring a single 132-feature row.
+"""
+
+import numpy as np
+
+# Rows scored per traversal step; bounds the size of the temporaries
+CHUNK_ROWS = 1024
+
+# Below this many rows, leaf distributions are averaged with one gather;
+# above it, tree by tree, which avoids a (rows, trees, classes) temporary
+GATHER_ROWS = 64
+
+
+class FlatForest:
+    """Random forest flattened into node arrays shared by all trees."""
+
+    def __init__(
+        self, feature, threshold, children, value, roots, classes, depth, n_features
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        # children[2 * node + went_left] is the next node
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.depth = depth
+        self.n_features_in_ = n_features
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Flattens a fitted RandomForestClassifier or DecisionTreeClassifier.
+
+        Leaves point to themselves, so every row can take exactly ``depth``
+        steps regardless of where its leaf is.
+
+        Args:
+            model: Fitted sklearn forest or single tree.
+
+        Returns:
+            FlatForest: Evaluator with the same predict_proba output.
+        """
+        estimators = getattr(model, "estimators_", [model])
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            nodes = np.arange(tree.node_count)
+            is_leaf = tree.children_left < 0
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+            value = tree.value[:, 0, :]
+            values.append(value / value.sum(axis=1, keepdims=True))
+            roots.append(offset)
+            offset += tree.node_count
+            depth = max(depth, tree.max_depth)
+
+        children = np.stack([np.concatenate(rights), np.concatenate(lefts)], axis=1)
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=children.ravel().astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.array(roots, dtype=np.intp),
+            classes=np.asarray(model.classes_),
+            depth=depth,
+            n_features=model.n_features_in_,
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """
+        Returns the leaf reached by every row in every tree.
+
+        Args:
+            X (numpy.ndarray): Matrix of shape (n_rows, n_features).
+
+        Returns:
+            numpy.ndarray: Global node ids of shape (n_rows, n_trees).
+        """
+        X = np.ascontiguousarray(X)
+        flat = X.ravel()
+        row_start = (np.arange(len(X)) * X.shape[1])[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.depth):
+            go_left = flat[row_start + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_left]
+        return nodes
+
+    def predict_proba(self, X):
+        """
+        Averages the leaf class distributions of all trees.
+
+        Args:
+            X (array-like): Matrix of shape (n_rows, n_features).
+
+        Returns:
+            numpy.ndarray: Class probabilities of shape (n_rows, n_classes).
+        """
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"Expected input with {self.n_features_in_} features, got shape {X.shape}"
+            )
+        proba = np.zeros((len(X), self.value.shape[1]))
+        for start in range(0, len(X), CHUNK_ROWS):
+            leaves = self.apply(X[start : start + CHUNK_ROWS])
+            chunk = proba[start : start + CHUNK_ROWS]
+            if len(leaves) < GATHER_ROWS:
+                chunk += self.value[leaves].sum(axis=1, dtype=proba.dtype)
+            else:
+                for tree in range(self.n_trees):
+                    chunk += self.value[leaves[:, tree]]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        """
+        Returns the class with the highest averaged probability for each row.
+        """
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,16 @@
+"""
+SHA-256 of model files.
+
+The packed forest, the ONNX export and the student each record the digest
+of the ``model.joblib`` they were built from, so the backend refuses one
+built from another model. The build scripts in ``ml/`` import this module
+as well, so both sides hash the file the same way.
+"""
+
+import hashlib
+
+
+def file_digest(path):
+    """Hex SHA-256 of a file's contents, read in chunks."""
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
@@ -0,0 +1,50 @@
+"""
+Conditional GET support for read-mostly endpoints.
+
+Cacheable responses carry a strong ETag taken from a content hash, a
+Last-Modified date and a Cache-Control policy. Routes check the client's
+validators with ``is_not_modified`` before building the body, so a
+revalidation costs a header comparison and an empty 304 response.
+"""
+
+from flask import Response, request
+
+
+def is_not_modified(etag, last_modified):
+    """
+    Whether the client's copy is current, per RFC 9110: If-None-Match wins
+    over If-Modified-Since when both are sent.
+
+    Args:
+        etag (str): Unquoted entity tag of the current representation.
+        last_modified (float): Unix time the representation last changed.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return int(last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def cache_headers(response, etag, last_modified, max_age):
+    """
+    Sets ETag, Last-Modified and Cache-Control on a response.
+
+    Args:
+        response (Response): Response to update.
+        etag (str): Unquoted entity tag.
+        last_modified (float): Unix time the representation last changed.
+        max_age (int): Seconds clients and proxies may reuse it unchecked.
+
+    Returns:
+        Response: The same response.
+    """
+    response.set_etag(etag)
+    response.last_modified = int(last_modified)
+    response.headers["Cache-Control"] = f"public, max-age={max(int(max_age), 0)}"
+    return response
+
+
+def not_modified(etag, last_modified, max_age):
+    """Empty 304 response carrying the same validators as a full one."""
+    return cache_headers(Response(status=304), etag, last_modified, max_age)
@@ -0,0 +1,100 @@
+"""
+Inference backends for the disease model.
+
+Every backend exposes ``predict_proba(X)`` with the same output as the
+trained sklearn forest, so the routes do not care which one is active.
+Select one with ``INFERENCE_BACKEND``:
+
+- ``flat`` (default): ``FlatForest``, the forest flattened into NumPy arrays
+- ``sklearn``: the unpickled ``RandomForestClassifier`` itself
+- ``onnx``: ``OnnxForest``, the ONNX export run by onnxruntime with
+  ``ONNX_THREADS`` threads. Falls back to ``sklearn`` when onnxruntime or
+  an up-to-date export (``ml/export_onnx.py``) is missing.
+- ``packed``: ``PackedForest``, the ``flat`` evaluator over the compact file
+  written by ``python start.py pack-model``. ``load_predictor`` then never
+  unpickles the sklearn model. Falls back to ``flat`` when the file is
+  missing or was packed from another model.
+"""
+
+import logging
+import os
+
+from src.utils import packed_forest
+from src.utils.forest import FlatForest
+from src.utils.onnx_forest import OnnxForest
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("flat", "sklearn", "onnx", "packed")
+
+ONNX_MODEL_PATH = os.getenv("ONNX_MODEL_PATH", "src/model/model.onnx")
+# onnxruntime intra-op threads per worker
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "1"))
+PACKED_MODEL_PATH = os.getenv("PACKED_MODEL_PATH", "src/model/model.forest")
+
+
+def load_predictor(path, backend="flat"):
+    """
+    Loads the model file and its inference backend.
+
+    The ``packed`` backend is read from ``PACKED_MODEL_PATH`` alone; its
+    model is the packed forest, so the joblib file is only hashed to check
+    the packed file is current, not unpickled.
+
+    Args:
+        path (str): The sklearn model's joblib file.
+        backend (str): One of ``BACKENDS``.
+
+    Returns:
+        tuple: (model, predictor)
+    """
+    if backend == "packed":
+        try:
+            forest = packed_forest.load(PACKED_MODEL_PATH, source=path)
+            return forest, forest
+        except Exception as e:
+            logger.error(f"Packed model unavailable, using flat: {e}")
+            backend = "flat"
+    from joblib import load
+
+    model = load(path)
+    return model, create_predictor(model, backend, source=path)
+
+
+def create_predictor(model, backend="flat", source=None):
+    """
+    Wraps the loaded model in the requested inference backend.
+
+    Args:
+        model: Fitted sklearn RandomForestClassifier.
+        backend (str): One of ``BACKENDS``.
+        source (str): Path ``model`` was loaded from; the ``onnx`` and
+            ``packed`` backends only accept an export of that file.
+
+    Returns:
+        object: Predictor with a ``predict_proba`` method.
+
+    Raises:
+        ValueError: If ``backend`` is not a known backend.
+    """
+    if backend == "sklearn":
+        return model
+    if backend == "flat":
+        return FlatForest.from_sklearn(model)
+    if backend == "onnx":
+        try:
+            return OnnxForest.load(
+                ONNX_MODEL_PATH, model, source=source, threads=ONNX_THREADS
+            )
+        except Exception as e:
+            logger.error(f"ONNX backend unavailable, using sklearn: {e}")
+            return model
+    if backend == "packed":
+        try:
+            return packed_forest.load(PACKED_MODEL_PATH, source=source)
+        except Exception as e:
+            logger.error(f"Packed model unavailable, using flat: {e}")
+            return FlatForest.from_sklearn(model)
+    raise ValueError(
+        f"Unknown inference backend {backend!r}, expected one of {BACKENDS}"
+    )
@@ -0,0 +1,165 @@
+"""
+Prometheus metrics for the API, served at ``/metrics``.
+
+Covers request counts and latency per route, the stages of a prediction,
+micro-batch sizes, description cache hits and misses, and the duration of
+every Gemini call.
+
+Under gunicorn every worker is its own process, so ``gunicorn.conf.py`` sets
+``PROMETHEUS_MULTIPROC_DIR`` before the app is imported: each worker then
+writes its samples to memory-mapped files in that directory and ``/metrics``
+adds up the files of all workers, whichever worker answers the scrape.
+Without the variable (``python start.py dev``) metrics stay in process.
+"""
+
+from contextlib import contextmanager
+import os
+import time
+
+from flask import g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Whole requests: from well under a millisecond (cached) to slow LLM calls
+REQUEST_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+    10, 30,
+)  # fmt: skip
+# Single stages of a prediction take microseconds
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25,
+)  # fmt: skip
+GEMINI_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+BATCH_ROW_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route, method and status code.",
+    ["route", "method", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time to produce a response, until its headers for streamed responses.",
+    ["route", "method"],
+    buckets=REQUEST_BUCKETS,
+)
+PREDICT_STAGE_SECONDS = Histogram(
+    "predict_stage_duration_seconds",
+    "Time spent in each stage of /predict and /predict/batch.",
+    ["route", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+DESCRIPTION_CACHE = Counter(
+    "description_cache_requests_total",
+    "Description lookups answered from the store (hit) or not (miss).",
+    ["result"],
+)
+GEMINI_CALL_SECONDS = Histogram(
+    "gemini_call_duration_seconds",
+    "Duration of Gemini calls by kind and outcome.",
+    ["kind", "outcome"],
+    buckets=GEMINI_BUCKETS,
+)
+INFERENCE_BATCH_ROWS = Histogram(
+    "inference_batch_rows",
+    "Rows per model call made by the micro-batcher.",
+    buckets=BATCH_ROW_BUCKETS,
+)
+
+PREDICT_STAGES = [
+    "json_parse",
+    "get_symptoms",
+    "cache_lookup",
+    "encode_symptoms",
+    "model_predict",
+    "decode",
+]
+
+
+def predict_stages(route):
+    """
+    Histograms of the prediction stages of one route, bound once at import
+    so timing a stage does not look up its labels on every request.
+
+    Returns:
+        dict: ``{stage: histogram}``; time a stage with
+        ``with stages["json_parse"].time():``.
+    """
+    return {
+        stage: PREDICT_STAGE_SECONDS.labels(route, stage) for stage in PREDICT_STAGES
+    }
+
+
+description_hits = DESCRIPTION_CACHE.labels("hit")
+description_misses = DESCRIPTION_CACHE.labels("miss")
+
+
+def record_description_lookup(hit):
+    """Counts one description lookup as a store hit or miss."""
+    (description_hits if hit else description_misses).inc()
+
+
+def observe_inference_batch(rows):
+    """Records the size of one micro-batched model call."""
+    INFERENCE_BATCH_ROWS.observe(rows)
+
+
+@contextmanager
+def gemini_call(kind):
+    """
+    Times the enclosed Gemini call.
+
+    Args:
+        kind (str): ``generate``, ``stream`` or ``warm`` (warm-cache).
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        GEMINI_CALL_SECONDS.labels(kind, outcome).observe(time.perf_counter() - started)
+
+
+def start_request_timer():
+    """``before_request`` hook remembering when the request started."""
+    g.request_started = time.perf_counter()
+
+
+def observe_request(response):
+    """
+    ``after_request`` hook counting the request and recording its latency.
+
+    Labelled by URL rule rather than path, so query strings and unknown
+    URLs cannot create unbounded label values.
+    """
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    REQUESTS.labels(route, request.method, str(response.status_code)).inc()
+    started = g.get("request_started")
+    if started is not None:
+        REQUEST_SECONDS.labels(route, request.method).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+
+def render():
+    """
+    Returns:
+        tuple: (exposition text, content type) of all metrics, summed over
+        every worker in multiprocess mode.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
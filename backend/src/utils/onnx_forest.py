@@ -0,0 +1,80 @@
+"""
+Forest inference with onnxruntime.
+
+Runs the ONNX export of the model (``ml/export_onnx.py``) on CPU. The
+tree-ensemble operator is native code that releases the GIL while it runs,
+so the threads of a gthread worker can predict in parallel, and its
+``ONNX_THREADS`` intra-op threads can split one large batch.
+
+onnxruntime is an optional dependency and is only imported when this
+backend is selected.
+"""
+
+import numpy as np
+
+from src.utils.hashing import file_digest
+
+
+class OnnxForest:
+    """``predict_proba`` over an onnxruntime session of the exported forest."""
+
+    def __init__(self, session, classes):
+        self.session = session
+        self.classes_ = classes
+        self.n_features_in_ = session.get_inputs()[0].shape[1]
+        self._input = session.get_inputs()[0].name
+
+    @classmethod
+    def load(cls, path, model, source=None, threads=1):
+        """
+        Opens an exported model and checks it belongs to ``model``.
+
+        Args:
+            path (str): ``model.onnx`` written by ``ml/export_onnx.py``.
+            model: The fitted sklearn forest the export was made from.
+            source (str): Path of ``model``'s joblib file. When given, the
+                export must carry its SHA-256.
+            threads (int): onnxruntime intra-op threads.
+
+        Returns:
+            OnnxForest: Ready to predict.
+
+        Raises:
+            ImportError: If onnxruntime is not installed.
+            ValueError: If the export was made from another model.
+        """
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        session = onnxruntime.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+
+        shape = session.get_inputs()[0].shape
+        if shape[1] != model.n_features_in_:
+            raise ValueError(
+                f"{path} expects {shape[1]} features, "
+                f"the model has {model.n_features_in_}"
+            )
+        if source is not None:
+            exported = session.get_modelmeta().custom_metadata_map.get("source_sha256")
+            if exported != file_digest(source):
+                raise ValueError(f"{path} was not exported from {source}")
+        return cls(session, np.asarray(model.classes_))
+
+    def predict_proba(self, X):
+        """
+        Class probabilities of every row.
+
+        Args:
+            X (array-like): Matrix of shape (n_rows, n_features).
+
+        Returns:
+            numpy.ndarray: Float64 probabilities of shape (n_rows, n_classes),
+            computed in float32 by onnxruntime.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        _, probabilities = self.session.run(None, {self._input: X})
+        return probabilities.astype(np.float64)
@@ -0,0 +1,203 @@
+"""
+Compact binary format for the flattened forest.
+
+Unpickling ``model.joblib`` rebuilds a hundred sklearn estimator objects and
+is the slowest part of a worker's start. A packed forest is one file holding
+only what ``FlatForest`` walks, in the smallest dtypes that keep its
+predictions:
+
+- ``feature``: int16 feature id per node
+- ``threshold``: uint8 per node. Every input is 0 or 1, so ``x <= t`` equals
+  ``x <= floor(t)``; leaves get 255.
+- ``children``: int32 ``[right, left]`` pair per node, leaves pointing to
+  themselves
+- ``roots``: int32 first node of every tree
+- ``value``: float16 class distribution per leaf. Nodes are numbered leaves
+  first, so a leaf's node id is also its row here and inner nodes store no
+  distribution.
+
+The file starts with ``MAGIC``, then the byte length of a JSON header that
+describes the arrays and records the SHA-256 of the joblib file they came
+from, then the header, then the arrays, each aligned to ``ALIGN`` bytes.
+``load`` maps the file and wraps the arrays with ``np.frombuffer``, so
+nothing is copied and workers share the pages.
+
+    python start.py pack-model
+"""
+
+import argparse
+import json
+import mmap
+import time
+import warnings
+
+import numpy as np
+
+from src.utils.forest import FlatForest
+from src.utils.hashing import file_digest
+
+MAGIC = b"DDFOREST"
+VERSION = 1
+ALIGN = 64
+# Leaf threshold: every uint8 input goes "left", onto the leaf itself
+LEAF_THRESHOLD = 255
+
+
+class PackedForest(FlatForest):
+    """``FlatForest`` over arrays that view a packed file."""
+
+    def __init__(self, buffer, source_sha256, **arrays):
+        super().__init__(**arrays)
+        # Keeps the mapping open for as long as the arrays use it
+        self.buffer = buffer
+        self.source_sha256 = source_sha256
+
+
+def pack(forest, path, source_sha256=None):
+    """
+    Writes a flattened forest in the packed format.
+
+    Args:
+        forest (FlatForest): Forest built by ``FlatForest.from_sklearn``.
+        path (str): Output file.
+        source_sha256 (str): Digest of the model file the forest came from.
+
+    Returns:
+        int: Bytes written.
+
+    Raises:
+        ValueError: If a split is not on a 0..254 threshold or a feature id
+            does not fit in int16.
+    """
+    nodes = np.arange(len(forest.feature))
+    is_leaf = forest.children[0::2] == nodes
+    inner_thresholds = forest.threshold[~is_leaf]
+    if inner_thresholds.size and not (
+        0 <= inner_thresholds.min() and inner_thresholds.max() < LEAF_THRESHOLD
+    ):
+        raise ValueError("Thresholds outside 0..254 cannot be stored as uint8")
+    if forest.n_features_in_ > np.iinfo(np.int16).max:
+        raise ValueError("Feature ids do not fit in int16")
+
+    # Leaves first, so a leaf's new id is its row in the value table
+    order = np.concatenate([nodes[is_leaf], nodes[~is_leaf]])
+    new_id = np.empty_like(order)
+    new_id[order] = np.arange(len(order))
+    threshold = np.where(is_leaf, LEAF_THRESHOLD, np.floor(forest.threshold))
+
+    arrays = {
+        "feature": np.where(is_leaf, 0, forest.feature)[order].astype(np.int16),
+        "threshold": threshold[order].astype(np.uint8),
+        "children": new_id[forest.children.reshape(-1, 2)[order]]
+        .ravel()
+        .astype(np.int32),
+        "roots": new_id[forest.roots].astype(np.int32),
+        "value": forest.value[order[: is_leaf.sum()]].astype(np.float16),
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+        }
+        offset += -(-array.nbytes // ALIGN) * ALIGN
+    header = json.dumps(
+        {
+            "version": VERSION,
+            "depth": int(forest.depth),
+            "n_features": int(forest.n_features_in_),
+            "classes": forest.classes_.tolist(),
+            "classes_dtype": forest.classes_.dtype.str,
+            "source_sha256": source_sha256,
+            "arrays": layout,
+        }
+    ).encode()
+    prefix = len(MAGIC) + 4 + len(header)
+    data_start = -(-prefix // ALIGN) * ALIGN
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(4, "little"))
+        file.write(header)
+        file.write(b"\0" * (data_start - prefix))
+        for name, array in arrays.items():
+            file.seek(data_start + layout[name]["offset"])
+            file.write(array.tobytes())
+        file.truncate(data_start + offset)
+    return data_start + offset
+
+
+def load(path, source=None, use_mmap=True):
+    """
+    Opens a packed forest without copying its arrays.
+
+    Args:
+        path (str): File written by ``pack``.
+        source (str): Model file the forest must have been packed from;
+            checked against the recorded SHA-256 when given.
+        use_mmap (bool): Map the file; False reads it into memory instead.
+
+    Returns:
+        PackedForest: Ready to predict.
+
+    Raises:
+        ValueError: If the file is not a packed forest, has another version,
+            or was packed from a different model file.
+    """
+    with open(path, "rb") as file:
+        if use_mmap:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = file.read()
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a packed forest")
+    header_length = int.from_bytes(buffer[len(MAGIC) : len(MAGIC) + 4], "little")
+    prefix = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[prefix : prefix + header_length]))
+    if header["version"] != VERSION:
+        raise ValueError(f"{path} has format version {header['version']}")
+    if source is not None and header["source_sha256"] != file_digest(source):
+        raise ValueError(f"{path} was not packed from {source}")
+
+    data_start = -(-(prefix + header_length) // ALIGN) * ALIGN
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arrays[name] = np.frombuffer(
+            buffer, dtype, count, data_start + spec["offset"]
+        ).reshape(spec["shape"])
+    return PackedForest(
+        buffer,
+        header["source_sha256"],
+        **arrays,
+        classes=np.array(header["classes"], dtype=header["classes_dtype"]),
+        depth=header["depth"],
+        n_features=header["n_features"],
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="start.py pack-model",
+        description="Write the trained forest in the packed format.",
+    )
+    parser.add_argument("--model", default="src/model/model.joblib")
+    parser.add_argument("--output", default="src/model/model.forest")
+    args = parser.parse_args(argv)
+
+    from joblib import load as load_joblib
+
+    started = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        model = load_joblib(args.model)
+    forest = FlatForest.from_sklearn(model)
+    size = pack(forest, args.output, file_digest(args.model))
+    print(
+        f"{forest.n_trees} trees, {len(forest.feature)} nodes -> {args.output} "
+        f"({size} bytes, {time.perf_counter() - started:.2f} s)"
+    )
@@ -0,0 +1,120 @@
+"""
+In-process LRU cache for model predictions.
+
+Keys are canonical symptom bitmasks (see ``registry.symptom_mask``), so the
+order and duplicates of the submitted symptoms never cause a miss. Each
+gunicorn worker owns one cache; its size comes from ``PREDICTION_CACHE_SIZE``.
+"""
+
+from collections import OrderedDict, namedtuple
+import threading
+
+import numpy as np
+
+# Number of ranked alternatives stored with every cached prediction
+TOP_K = 5
+
+CachedPrediction = namedtuple(
+    "CachedPrediction", ["label", "top_classes", "top_probabilities"]
+)
+
+
+def cached_predictions(probabilities):
+    """
+    Builds cache entries from rows of ``model.predict_proba``.
+
+    Args:
+        probabilities (numpy.ndarray): Array of shape (n_rows, n_classes).
+
+    Returns:
+        list: One CachedPrediction per row. ``label`` matches what
+        ``model.predict`` returns for the same row.
+    """
+    probabilities = np.asarray(probabilities)
+    k = min(TOP_K, probabilities.shape[1])
+    ranked = np.argsort(-probabilities, axis=1, kind="stable")[:, :k]
+    top = np.take_along_axis(probabilities, ranked, axis=1)
+    return [
+        CachedPrediction(
+            int(classes[0]), tuple(classes.tolist()), tuple(probs.tolist())
+        )
+        for classes, probs in zip(ranked, top)
+    ]
+
+
+class PredictionCache:
+    """Thread-safe LRU mapping of symptom bitmask -> CachedPrediction."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.model_token = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bind_model(self, model_token):
+        """
+        Associates the cache with a loaded model.
+
+        Entries computed by a different model are dropped, so a reloaded or
+        replaced model file never serves stale predictions.
+
+        Args:
+            model_token: Hashable identifier of the loaded model.
+        """
+        with self._lock:
+            if model_token != self.model_token:
+                self._entries.clear()
+                self.model_token = model_token
+
+    def get(self, key):
+        """
+        Returns the cached value for ``key`` or None on a miss.
+        """
+        if self.maxsize <= 0:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Stores ``value`` for ``key``, evicting the least recently used entry
+        when the cache is full.
+        """
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every entry while keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: size, maxsize, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
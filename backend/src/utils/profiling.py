@@ -0,0 +1,259 @@
+"""
+Opt-in sampling profiler for live requests.
+
+A profiled request gets a sampler thread that records the request thread's
+Python stack every ``PROFILE_INTERVAL_MS`` and, once the request is done,
+writes the samples to ``PROFILE_DIR`` as collapsed stacks (one
+``frame;frame;frame count`` line per distinct stack, the input of
+flamegraph.pl and speedscope) or as a speedscope JSON file.
+
+Requests are picked at random with probability ``PROFILE_SAMPLE_RATE``, or
+on demand with an ``X-Profile`` header carrying the admin ``PASSWORD``. Each
+worker profiles one request at a time, and random picks stop while the
+sampler's own CPU time exceeds ``PROFILE_MAX_OVERHEAD`` of the worker's
+uptime, so a 1% sample rate is safe to leave on in production.
+
+Sampling needs no extra package. While a request is profiled the
+interpreter's switch interval is lowered to the sampling interval, since the
+sampler can only read the stack when it gets the GIL.
+"""
+
+from collections import Counter
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+from flask import g, request
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Share of requests profiled at random; 0 only profiles requests that ask
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+# Highest share of a worker's uptime the sampler may spend on random picks
+PROFILE_MAX_OVERHEAD = float(os.getenv("PROFILE_MAX_OVERHEAD", "0.01"))
+# "collapsed" or "speedscope"
+PROFILE_FORMAT = os.getenv("PROFILE_FORMAT", "collapsed").lower()
+PASSWORD = os.getenv("PASSWORD")
+
+PROFILE_HEADER = "X-Profile"
+
+EXTENSIONS = {"collapsed": ".collapsed.txt", "speedscope": ".speedscope.json"}
+
+_labels = {}
+
+
+def _frame_label(code):
+    """``qualname (path:line)`` of a code object, with the path shortened."""
+    label = _labels.get(code)
+    if label is None:
+        path = code.co_filename
+        if "site-packages" in path:
+            path = path.split("site-packages" + os.sep, 1)[1]
+        elif path.startswith(os.getcwd()):
+            path = os.path.relpath(path)
+        label = f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+        _labels[code] = label
+    return label
+
+
+class Sampler(threading.Thread):
+    """Samples the stack of one thread until ``stop`` is called."""
+
+    def __init__(self, profiler, thread_id, name, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.profiler = profiler
+        self.thread_id = thread_id
+        self.name_hint = name
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def stop(self):
+        """Ends sampling; the file is written from the sampler thread."""
+        self.stopped.set()
+
+    def run(self):
+        started = time.perf_counter()
+        try:
+            while not self.stopped.wait(self.interval):
+                frame = sys._current_frames().get(self.thread_id)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[tuple(reversed(stack))] += 1
+            duration = time.perf_counter() - started
+            if self.stacks:
+                path = self.profiler.write(self.name_hint, self.stacks, duration)
+                logger.info(f"Profile of {self.name_hint} written to {path}")
+        except Exception as e:
+            logger.error(f"Profiling failed: {e}")
+        finally:
+            self.profiler.finished(time.thread_time())
+
+
+class RequestProfiler:
+    """Picks requests to profile and writes their samples, one at a time."""
+
+    def __init__(
+        self,
+        directory=PROFILE_DIR,
+        sample_rate=PROFILE_SAMPLE_RATE,
+        interval_ms=PROFILE_INTERVAL_MS,
+        max_overhead=PROFILE_MAX_OVERHEAD,
+        output_format=PROFILE_FORMAT,
+        password=PASSWORD,
+    ):
+        """
+        Args:
+            directory (str): Where profile files are written.
+            sample_rate (float): Probability that a request is profiled.
+            interval_ms (float): Milliseconds between two samples.
+            max_overhead (float): Share of uptime the sampler may use
+                before random picks pause.
+            output_format (str): ``collapsed`` or ``speedscope``.
+            password (str): Value of the X-Profile header that forces a
+                profile; None disables the header.
+        """
+        if output_format not in EXTENSIONS:
+            raise ValueError(f"Unknown profile format: {output_format}")
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.max_overhead = max_overhead
+        self.output_format = output_format
+        self.password = password
+        self.started_at = time.monotonic()
+        self.overhead_seconds = 0.0
+        self.requests_profiled = 0
+        self.profiles_written = 0
+        self._busy = threading.Lock()
+        self._switch_interval = None
+
+    def requested(self, header):
+        """Whether an X-Profile header value carries the admin password."""
+        return (
+            self.password is not None
+            and header is not None
+            and hmac.compare_digest(header.encode(), self.password.encode())
+        )
+
+    def within_budget(self):
+        uptime = time.monotonic() - self.started_at
+        return self.overhead_seconds <= self.max_overhead * uptime
+
+    def start(self, name, forced=False):
+        """
+        Starts sampling the calling thread if it is picked.
+
+        Args:
+            name (str): Label of the request, used in the file name.
+            forced (bool): Profile regardless of sample rate and budget.
+
+        Returns:
+            Sampler: The running sampler, or None if not profiled.
+        """
+        if not forced and (
+            random.random() >= self.sample_rate or not self.within_budget()
+        ):
+            return None
+        if not self._busy.acquire(blocking=False):
+            return None
+        self._switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch_interval, self.interval))
+        sampler = Sampler(self, threading.get_ident(), name, self.interval)
+        sampler.start()
+        self.requests_profiled += 1
+        return sampler
+
+    def finished(self, sampler_cpu_seconds):
+        """Called by the sampler thread once it has written its file."""
+        sys.setswitchinterval(self._switch_interval)
+        self.overhead_seconds += sampler_cpu_seconds
+        self._busy.release()
+
+    def write(self, name, stacks, duration):
+        """
+        Writes one profile.
+
+        Args:
+            name (str): Label of the request.
+            stacks (Counter): ``{(root frame, ..., leaf frame): samples}``.
+            duration (float): Seconds the request was sampled for.
+
+        Returns:
+            str: Path of the file written.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        filename = (
+            f"{stamp}-{os.getpid()}-{self.profiles_written}-{name}"
+            f"-{duration * 1000:.0f}ms{EXTENSIONS[self.output_format]}"
+        )
+        path = os.path.join(self.directory, filename)
+        if self.output_format == "speedscope":
+            content = json.dumps(self._speedscope(name, stacks))
+        else:
+            content = "".join(
+                f"{';'.join(stack)} {count}\n" for stack, count in stacks.items()
+            )
+        with open(path, "w") as file:
+            file.write(content)
+        self.profiles_written += 1
+        return path
+
+    def _speedscope(self, name, stacks):
+        frames = {}
+        samples = []
+        weights = []
+        for stack, count in stacks.items():
+            samples.append([frames.setdefault(label, len(frames)) for label in stack])
+            weights.append(count * self.interval)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "disease-detector",
+            "shared": {"frames": [{"name": label} for label in frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+profiler = RequestProfiler()
+
+
+def start_request_profile():
+    """``before_request`` hook starting a profile for picked requests."""
+    forced = profiler.requested(request.headers.get(PROFILE_HEADER))
+    if not forced and profiler.sample_rate <= 0:
+        return
+    rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    name = re.sub(r"[^A-Za-z0-9]+", "-", f"{request.method}{rule}").strip("-")
+    g.profile_sampler = profiler.start(name, forced=forced)
+
+
+def stop_request_profile(exception=None):
+    """``teardown_request`` hook ending the request's profile, if any."""
+    sampler = g.pop("profile_sampler", None)
+    if sampler is not None:
+        sampler.stop()
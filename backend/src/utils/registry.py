@@ -0,0 +1,78 @@
+"""
+Compiled symptom and disease lookup tables.
+
+Everything here is built once at import from src.utils.data, so encoding a
+request only touches the symptoms that were actually selected.
+"""
+
+import numpy as np
+from src.utils.data import symptoms, display_named_symptoms, diseases
+
+# Number of features the model expects
+N_SYMPTOMS = len(symptoms)
+
+# Column position of every model symptom name
+symptom_columns = {symptom: index for index, symptom in enumerate(symptoms)}
+
+# Column position of every display name shown in the frontend
+display_columns = {
+    display_name: symptom_columns[symptom]
+    for display_name, symptom in display_named_symptoms.items()
+}
+
+# Label index -> disease name, in the order LabelEncoder assigns labels
+disease_names = np.array(sorted(set(diseases)), dtype=object)
+
+
+class UnknownSymptomError(ValueError):
+    """Raised when a request contains symptoms the model does not know."""
+
+    def __init__(self, unknown):
+        self.unknown = unknown
+        super().__init__(f"Unknown symptoms: {', '.join(map(str, unknown))}")
+
+
+def lookup_columns(display_names):
+    """
+    Maps display names to model column positions.
+
+    Args:
+        display_names (list): List of display named symptoms.
+
+    Returns:
+        list: Column positions, in the order given.
+
+    Raises:
+        UnknownSymptomError: If any name is not a known display name.
+    """
+    if not isinstance(display_names, list):
+        raise UnknownSymptomError([display_names])
+    columns = []
+    unknown = []
+    for name in display_names:
+        column = display_columns.get(name) if isinstance(name, str) else None
+        if column is None:
+            unknown.append(name)
+        else:
+            columns.append(column)
+    if unknown:
+        raise UnknownSymptomError(unknown)
+    return columns
+
+
+def symptom_mask(columns):
+    """
+    Packs column positions into a canonical integer bitmask.
+
+    Order and duplicates of the input do not change the result.
+
+    Args:
+        columns (list): Column positions.
+
+    Returns:
+        int: Bitmask with bit ``i`` set when column ``i`` is present.
+    """
+    mask = 0
+    for column in columns:
+        mask |= 1 << column
+    return mask
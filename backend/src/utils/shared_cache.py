@@ -0,0 +1,291 @@
+"""
+Prediction cache shared by every gunicorn worker on a host.
+
+The table lives in a ``multiprocessing.shared_memory`` block created by the
+gunicorn master before it forks (see ``gunicorn.conf.py``). Workers inherit
+the mapping through fork, so a prediction computed by one worker is a hit for
+all others.
+
+Layout: a small header followed by a fixed number of slots, addressed by
+open addressing with linear probing. Each slot carries a sequence counter
+that makes reads lock-free (seqlock): writers bump it to an odd value, write
+the slot and bump it back to even; readers retry when the counter moved.
+Writers serialise on striped locks (a ``fcntl`` byte-range lock per stripe
+for other processes plus a ``threading.Lock`` for threads of the same
+worker). When every slot in a probe window is taken, the home slot is
+overwritten, so the table never grows and never blocks on a full state.
+"""
+
+from multiprocessing import shared_memory
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from src.utils.prediction_cache import TOP_K, CachedPrediction
+
+MAGIC = 0x3148434143445250  # b"PRDCACH1"
+MAX_PROBE = 8
+N_STRIPES = 64
+OCCUPIED = np.uint64(1 << 63)
+WORD = (1 << 64) - 1
+
+HEADER_DTYPE = np.dtype(
+    [("magic", "<u8"), ("capacity", "<u8"), ("model_token", "<u8"), ("pad", "<u8", 5)]
+)
+SLOT_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("key", "<u8", 3),
+        ("label", "<i4"),
+        ("top_classes", "<i2", TOP_K),
+        ("top_probabilities", "<f4", TOP_K),
+    ]
+)
+
+
+def _split_key(mask):
+    """Packs a symptom bitmask into three words, flagging the slot as used."""
+    return (
+        np.uint64(mask & WORD),
+        np.uint64((mask >> 64) & WORD),
+        np.uint64((mask >> 128) & (WORD >> 1)) | OCCUPIED,
+    )
+
+
+def _same_key(stored, wanted):
+    return stored[0] == wanted[0] and stored[1] == wanted[1] and stored[2] == wanted[2]
+
+
+def _token_hash(model_token):
+    digest = hashlib.blake2b(repr(model_token).encode(), digest_size=8).digest()
+    return np.uint64(int.from_bytes(digest, "little") | 1)
+
+
+# Table created by this process or inherited from the process that forked it
+_process_cache = None
+
+
+def get_or_create(slots):
+    """
+    Returns the host-wide table, creating it if this process has none yet.
+
+    Called by the gunicorn master before fork and by the app at import, so
+    workers always end up with the master's table whether or not the app is
+    preloaded.
+
+    Args:
+        slots (int): Number of slots used if the table has to be created.
+
+    Returns:
+        SharedPredictionCache: The process-wide table.
+    """
+    global _process_cache
+    if _process_cache is None:
+        _process_cache = SharedPredictionCache.create(slots)
+    return _process_cache
+
+
+class SharedPredictionCache:
+    """Fixed-size hash table of symptom bitmask -> CachedPrediction in shared memory."""
+
+    def __init__(self, shm, owner_pid=None):
+        self._shm = shm
+        self._owner_pid = owner_pid
+        self._header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)
+        if self._header["magic"][0] != MAGIC:
+            raise ValueError(
+                f"Shared memory block {shm.name} is not a prediction cache"
+            )
+        self.capacity = int(self._header["capacity"][0])
+        self._shift = 65 - self.capacity.bit_length()
+        self._slots = np.ndarray(
+            (self.capacity,),
+            dtype=SLOT_DTYPE,
+            buffer=shm.buf,
+            offset=HEADER_DTYPE.itemsize,
+        )
+        self._seq = self._slots["seq"]
+        self._keys = self._slots["key"]
+        self._lock_file = open(self.lock_path(shm.name), "a+b")
+        self._thread_locks = [threading.Lock() for _ in range(N_STRIPES)]
+        self.model_token = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def create(cls, slots, name=None):
+        """
+        Allocates a new table. Call this in the gunicorn master before fork.
+
+        Args:
+            slots (int): Number of slots, rounded up to a power of two.
+            name (str): Optional shared memory name.
+
+        Returns:
+            SharedPredictionCache: The owning handle, which unlinks on close
+            when closed by the creating process.
+        """
+        capacity = 1 << max(int(slots) - 1, 1).bit_length()
+        size = HEADER_DTYPE.itemsize + capacity * SLOT_DTYPE.itemsize
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header["magic"] = MAGIC
+        header["capacity"] = capacity
+        del header
+        return cls(shm, owner_pid=os.getpid())
+
+    @staticmethod
+    def lock_path(name):
+        return os.path.join(tempfile.gettempdir(), f"{name.lstrip('/')}.lock")
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def _home(self, mask):
+        # Fibonacci hashing: the high bits of the product mix every input bit
+        return ((hash(mask) * 0x9E3779B97F4A7C15) & WORD) >> self._shift
+
+    def _lock(self, slot):
+        stripe = slot % N_STRIPES
+        self._thread_locks[stripe].acquire()
+        fcntl.lockf(self._lock_file, fcntl.LOCK_EX, 1, stripe)
+        return stripe
+
+    def _unlock(self, stripe):
+        fcntl.lockf(self._lock_file, fcntl.LOCK_UN, 1, stripe)
+        self._thread_locks[stripe].release()
+
+    def _read(self, slot):
+        """Consistent snapshot of one slot, or None if a writer kept it busy."""
+        for _ in range(4):
+            before = self._seq[slot]
+            if before & 1:
+                continue
+            entry = self._slots[slot].copy()
+            if self._seq[slot] == before:
+                return entry
+        return None
+
+    def bind_model(self, model_token):
+        """
+        Associates the table with a loaded model, clearing it if it holds
+        predictions from a different one.
+        """
+        self.model_token = model_token
+        token = _token_hash(model_token)
+        if self._header["model_token"][0] == token:
+            return
+        stripes = [self._lock(stripe) for stripe in range(N_STRIPES)]
+        try:
+            if self._header["model_token"][0] != token:
+                self._seq += 1
+                self._keys[:] = 0
+                self._seq += 1
+                self._header["model_token"] = token
+        finally:
+            for stripe in reversed(stripes):
+                self._unlock(stripe)
+
+    def get(self, key):
+        """
+        Returns the cached CachedPrediction for ``key`` or None on a miss.
+        """
+        wanted = _split_key(key)
+        home = self._home(key)
+        for probe in range(MAX_PROBE):
+            entry = self._read((home + probe) & (self.capacity - 1))
+            if entry is None:
+                break
+            stored = entry["key"]
+            if not stored[2] & OCCUPIED:
+                break
+            if _same_key(stored, wanted):
+                self.hits += 1
+                return CachedPrediction(
+                    int(entry["label"]),
+                    tuple(int(c) for c in entry["top_classes"]),
+                    tuple(float(p) for p in entry["top_probabilities"]),
+                )
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Stores ``value`` for ``key``. Overwrites the home slot when the whole
+        probe window is occupied by other keys.
+        """
+        wanted = _split_key(key)
+        home = self._home(key)
+        target = home
+        for probe in range(MAX_PROBE):
+            slot = (home + probe) & (self.capacity - 1)
+            stored = self._keys[slot]
+            if not stored[2] & OCCUPIED or _same_key(stored, wanted):
+                target = slot
+                break
+        stripe = self._lock(target)
+        try:
+            stored = self._keys[target]
+            if stored[2] & OCCUPIED and not _same_key(stored, wanted):
+                self.evictions += 1
+            self._seq[target] += 1
+            slot = self._slots[target : target + 1]
+            slot["key"] = wanted
+            slot["label"] = value.label
+            slot["top_classes"] = value.top_classes
+            slot["top_probabilities"] = value.top_probabilities
+            self._seq[target] += 1
+        finally:
+            self._unlock(stripe)
+
+    def clear(self):
+        """Drops every entry for all workers."""
+        stripes = [self._lock(stripe) for stripe in range(N_STRIPES)]
+        try:
+            self._seq += 1
+            self._keys[:] = 0
+            self._seq += 1
+        finally:
+            for stripe in reversed(stripes):
+                self._unlock(stripe)
+
+    def stats(self):
+        """
+        Returns this worker's counters and the shared table occupancy.
+
+        Returns:
+            dict: size, maxsize, hits, misses and evictions.
+        """
+        size = int(np.count_nonzero(self._keys[:, 2] & OCCUPIED))
+        return {
+            "size": size,
+            "maxsize": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        """
+        Detaches from the table. Only the creating process unlinks it, so
+        forked workers running inherited exit handlers leave it in place.
+        Closing twice is a no-op.
+        """
+        if self._lock_file.closed:
+            return
+        self._header = self._slots = self._seq = self._keys = None
+        self._lock_file.close()
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+            try:
+                os.unlink(self.lock_path(self._shm.name))
+            except FileNotFoundError:
+                pass
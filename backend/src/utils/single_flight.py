@@ -0,0 +1,306 @@
+"""
+Run one call per key at a time across all workers on a host.
+
+Within a process, the first caller for a key becomes the leader and later
+callers wait on its future instead of repeating the work. Across processes,
+leaders serialise on an ``fcntl`` byte-range lock chosen by the key's CRC32,
+so at most one worker runs the call for a key while the others wait for the
+lock. The lock is polled rather than blocked on: record locks belong to the
+whole process, so the kernel's deadlock detection would report false
+deadlocks between threads of different workers holding different keys.
+
+For the same reason a process never conflicts with its own lock, so the
+slots it holds are also tracked in memory. This keeps a thread leader and an
+event-loop leader for the same key in one process (which wait on separate
+futures) from both running the call. The call itself should check for a
+stored result first: a leader that waited on the lock usually finds the
+result already there.
+
+Waiters only receive the leader's ``Exception``. When the leader is aborted
+instead (a client disconnect closing its stream, a cancelled task), its slot
+is released and the waiters retry, one of them becoming the new leader.
+"""
+
+from concurrent.futures import Future
+import asyncio
+import fcntl
+import os
+import threading
+import time
+import zlib
+
+# Byte-range slots in the lock file. A collision can at worst cost one
+# duplicate call, since the call re-checks for a stored result
+N_SLOTS = 1 << 16
+
+# Seconds between attempts to take the cross-process lock
+POLL_INTERVAL = 0.05
+
+
+class _LeaderAborted(Exception):
+    """Set on a leader's future when it stopped without a result or error."""
+
+
+class SingleFlight:
+    """Coalesces concurrent calls per key within and across processes."""
+
+    def __init__(self, lock_path):
+        self.lock_path = lock_path
+        self._lock_file = None
+        self._lock_file_pid = None
+        self._lock = threading.Lock()
+        self._held_slots = set()
+        self._inflight = {}
+        self._async_inflight = {}
+        self.leader_calls = 0
+        self.coalesced_calls = 0
+
+    def _file(self):
+        # Opened lazily so every forked worker gets its own descriptor
+        with self._lock:
+            if self._lock_file_pid != os.getpid():
+                os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+                self._lock_file = open(self.lock_path, "a+b")
+                self._lock_file_pid = os.getpid()
+                self._held_slots = set()
+            return self._lock_file
+
+    @staticmethod
+    def _slot(key):
+        return zlib.crc32(str(key).encode()) % N_SLOTS
+
+    def _try_lock(self, slot):
+        lock_file = self._file()
+        with self._lock:
+            if slot in self._held_slots:
+                return False
+            self._held_slots.add(slot)
+        try:
+            fcntl.lockf(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, slot)
+            return True
+        except OSError:
+            with self._lock:
+                self._held_slots.discard(slot)
+            return False
+
+    def _unlock(self, slot):
+        fcntl.lockf(self._file(), fcntl.LOCK_UN, 1, slot)
+        with self._lock:
+            self._held_slots.discard(slot)
+
+    def _join(self, key):
+        """Returns (is_leader, future) of the in-flight call for ``key``."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = Future()
+                self.leader_calls += 1
+                return True, future
+            self.coalesced_calls += 1
+            return False, future
+
+    def _finish(self, key, future, result=None, error=None):
+        # Leave the map first, so woken waiters that retry find no stale future
+        with self._lock:
+            del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, function):
+        """
+        Returns ``function()``, running it only once for concurrent callers.
+
+        Args:
+            key (str): Identity of the work, e.g. a disease name.
+            function (callable): Called by the leader with no arguments.
+
+        Returns:
+            The leader's result; its exception is re-raised in every waiter.
+        """
+        while True:
+            leader, future = self._join(key)
+            if leader:
+                break
+            try:
+                return future.result()
+            except _LeaderAborted:
+                continue
+
+        try:
+            slot = self._slot(key)
+            while not self._try_lock(slot):
+                time.sleep(POLL_INTERVAL)
+            try:
+                result = function()
+            finally:
+                self._unlock(slot)
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish(key, future, error=_LeaderAborted())
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stream(self, key, function):
+        """
+        Streaming variant of ``do``.
+
+        The leader yields the chunks of ``function()`` as they are produced.
+        Concurrent callers in the same process wait for it to finish and get
+        the joined text as a single chunk; callers of ``do`` for the same key
+        get the joined text as their result. When the leader's consumer stops
+        early, waiters retry instead of receiving its partial text.
+
+        Args:
+            key (str): Identity of the work.
+            function (callable): Returns an iterable of text chunks.
+
+        Yields:
+            str: Text chunks.
+        """
+        while True:
+            leader, future = self._join(key)
+            if leader:
+                break
+            try:
+                yield future.result()
+                return
+            except _LeaderAborted:
+                continue
+
+        try:
+            slot = self._slot(key)
+            while not self._try_lock(slot):
+                time.sleep(POLL_INTERVAL)
+            try:
+                chunks = []
+                for chunk in function():
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                self._unlock(slot)
+        except Exception as e:
+            self._finish(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish(key, future, error=_LeaderAborted())
+            raise
+        self._finish(key, future, "".join(chunks))
+
+    def _join_async(self, key):
+        future = self._async_inflight.get(key)
+        if future is not None:
+            self.coalesced_calls += 1
+            return False, future
+        future = self._async_inflight[key] = asyncio.get_running_loop().create_future()
+        self.leader_calls += 1
+        return True, future
+
+    def _finish_async(self, key, future, result=None, error=None):
+        del self._async_inflight[key]
+        if error is not None:
+            future.set_exception(error)
+            # Mark the exception retrieved when nobody else was waiting
+            future.exception()
+        else:
+            future.set_result(result)
+
+    async def _lock_async(self, slot):
+        # Waiting for another leader sleeps on the loop, never stalling it
+        while not self._try_lock(slot):
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def do_async(self, key, function):
+        """
+        Async variant of ``do`` for one event loop.
+
+        Waiting for another worker's lock sleeps on the loop, so it never
+        stalls other requests.
+
+        Args:
+            key (str): Identity of the work.
+            function (callable): Coroutine function called by the leader.
+
+        Returns:
+            The leader's result; its exception is re-raised in every waiter.
+        """
+        while True:
+            leader, future = self._join_async(key)
+            if leader:
+                break
+            try:
+                return await asyncio.shield(future)
+            except _LeaderAborted:
+                continue
+
+        try:
+            slot = self._slot(key)
+            await self._lock_async(slot)
+            try:
+                result = await function()
+            finally:
+                self._unlock(slot)
+        except Exception as e:
+            self._finish_async(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish_async(key, future, error=_LeaderAborted())
+            raise
+        self._finish_async(key, future, result)
+        return result
+
+    async def stream_async(self, key, function):
+        """
+        Async variant of ``stream`` for one event loop.
+
+        Args:
+            key (str): Identity of the work.
+            function (callable): Returns an async iterable of text chunks.
+
+        Yields:
+            str: Text chunks.
+        """
+        while True:
+            leader, future = self._join_async(key)
+            if leader:
+                break
+            try:
+                text = await asyncio.shield(future)
+            except _LeaderAborted:
+                continue
+            yield text
+            return
+
+        try:
+            slot = self._slot(key)
+            await self._lock_async(slot)
+            try:
+                chunks = []
+                async for chunk in function():
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                self._unlock(slot)
+        except Exception as e:
+            self._finish_async(key, future, error=e)
+            raise
+        except BaseException:
+            self._finish_async(key, future, error=_LeaderAborted())
+            raise
+        self._finish_async(key, future, "".join(chunks))
+
+    def stats(self):
+        """
+        Returns the coalescing counters.
+
+        Returns:
+            dict: leader_calls and coalesced_calls.
+        """
+        return {
+            "leader_calls": self.leader_calls,
+            "coalesced_calls": self.coalesced_calls,
+        }
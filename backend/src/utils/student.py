@@ -0,0 +1,87 @@
+"""
+Single-tree student of the forest, used as a fast path.
+
+``ml/distill.py`` fits one decision tree to the forest's own predictions and
+records, for every leaf, how often it agreed with the forest on held-back
+variations of the training rows. The tree only splits on whether a symptom
+is present, so it is walked directly on the request's symptom bitmask: a
+few dozen integer operations, no encoding and no NumPy call. A leaf whose
+confidence is below ``min_confidence`` gives no answer and the request goes
+on to the forest.
+"""
+
+import json
+
+from src.utils.data import symptoms
+from src.utils.prediction_cache import CachedPrediction
+from src.utils.registry import disease_names
+
+
+class StudentTree:
+    """Mapping of symptom bitmask -> CachedPrediction of a confident leaf."""
+
+    def __init__(self, feature, left, right, answers, min_confidence):
+        self._feature = feature
+        self._left = left
+        self._right = right
+        self._answers = answers
+        self.min_confidence = min_confidence
+
+    @classmethod
+    def load(cls, path, teacher_sha256=None, min_confidence=None):
+        """
+        Loads a student written by ``ml/distill.py``.
+
+        Args:
+            path (str): Path of student.json.
+            teacher_sha256 (str): Digest of the loaded model file; the student
+                must have been distilled from it when given.
+            min_confidence (float): Leaf confidence required to answer.
+                Defaults to the value the student was distilled for.
+
+        Returns:
+            StudentTree: The loaded student.
+
+        Raises:
+            ValueError: If the file was built for different symptom columns,
+            disease labels or model than the ones this backend serves.
+        """
+        with open(path, "r") as file:
+            data = json.load(file)
+        if data["columns"] != list(symptoms):
+            raise ValueError("Student columns do not match the model's symptoms")
+        if data["classes"] != list(disease_names):
+            raise ValueError("Student classes do not match the model's labels")
+        if teacher_sha256 is not None and data["teacher_sha256"] != teacher_sha256:
+            raise ValueError(f"{path} was not distilled from the loaded model")
+
+        if min_confidence is None:
+            min_confidence = data["min_confidence"]
+        answers = [
+            (
+                CachedPrediction(label, (label,), (confidence,))
+                if label >= 0 and confidence >= min_confidence
+                else None
+            )
+            for label, confidence in zip(data["label"], data["confidence"])
+        ]
+        return cls(
+            data["feature"], data["left"], data["right"], answers, min_confidence
+        )
+
+    def __len__(self):
+        return sum(answer is not None for answer in self._answers)
+
+    def get(self, mask):
+        """
+        Returns the CachedPrediction of the leaf ``mask`` reaches, or None
+        when that leaf is not confident enough.
+
+        The single ranked class carries the leaf's confidence, not a
+        probability, so callers asking for a differential use the forest.
+        """
+        feature, left, right = self._feature, self._left, self._right
+        node = 0
+        while feature[node] >= 0:
+            node = right[node] if mask >> feature[node] & 1 else left[node]
+        return self._answers[node]
@@ -1,112 +1,64 @@
-import copy
-from src.utils.data import symptoms, display_named_symptoms, diseases
-from sklearn.preprocessing import LabelEncoder
-from google import genai
-from dotenv import load_dotenv
-import os
-import json
+from src.utils.registry import N_SYMPTOMS, disease_names, lookup_columns
+import numpy as np
 
-load_dotenv()
-API_KEY = os.getenv("GEMINI_API_KEY")
-PASSWORD = os.getenv("PASSWORD")
 
-le = LabelEncoder()
-le.fit_transform(diseases)
-
-client = genai.Client(api_key=API_KEY)
-
-
-def encode_symptoms(symptom_list):
+def encode_symptoms(symptom_columns):
     """
-    Encodes the symptoms into a list of integers.
+    Encodes the symptoms into the model's feature vector.
 
     Args:
-        symptom_list (list): List containing symptoms
+        symptom_columns (list): Column positions of the selected symptoms
 
     Returns:
-        list: List of integers representing the encoded symptoms.
+        numpy.ndarray: uint8 vector with a 1 for every selected symptom.
     """
-    new_symptom_dict = copy.deepcopy(symptoms)
-    for symptom in symptom_list:
-        new_symptom_dict[symptom] = 1
-    return list(new_symptom_dict.values())
+    vector = np.zeros(N_SYMPTOMS, dtype=np.uint8)
+    vector[symptom_columns] = 1
+    return vector
 
 
-def get_symptoms(symptom_list):
+def encode_symptoms_batch(symptom_lists):
     """
-    Returns the non display named symptoms from the given list.
+    Encodes many symptom lists into a single feature matrix.
 
     Args:
-        symptom_list (list): List of symptoms.
+        symptom_lists (list): List of lists containing symptom column positions
 
     Returns:
-        list: List of non display named symptoms.
+        numpy.ndarray: Matrix of shape (len(symptom_lists), n_symptoms) with
+        one row per case.
     """
-    non_display_symptoms = []
-    for symptom in symptom_list:
-        non_display_symptoms.append(display_named_symptoms[symptom])
-    return non_display_symptoms
+    matrix = np.zeros((len(symptom_lists), N_SYMPTOMS), dtype=np.uint8)
+    rows = np.repeat(np.arange(len(symptom_lists)), [len(s) for s in symptom_lists])
+    columns = [column for symptom_list in symptom_lists for column in symptom_list]
+    matrix[rows, columns] = 1
+    return matrix
 
 
-def inverse_encode_symptoms(encoded_symptoms):
+def get_symptoms(symptom_list):
     """
-    Inverse encodes the symptoms from a list of integers to their original names.
+    Returns the model column positions for the given display named symptoms.
 
     Args:
-        encoded_symptoms (list): List of integers representing encoded symptoms.
+        symptom_list (list): List of symptoms.
 
     Returns:
-        list: List of original symptom names.
+        list: List of column positions.
+
+    Raises:
+        UnknownSymptomError: If the list contains an unknown symptom.
     """
-    return le.inverse_transform(encoded_symptoms)
+    return lookup_columns(symptom_list)
 
 
-def get_disease_description(disease_name):
+def inverse_encode_symptoms(encoded_symptoms):
     """
-    Fetches the description of a disease using Google Gemini API.
+    Inverse encodes predicted labels to their disease names.
 
     Args:
-        disease_name (str): Name of the disease.
+        encoded_symptoms (list): List of integers representing encoded labels.
 
     Returns:
-        str: Description of the disease.
-    """
-    if disease_name not in diseases:
-        return "Disease not found."
-
-    with open("cache/disease_descriptions.json", "r") as file:
-        disease_descriptions = json.load(file)
-    if disease_name in disease_descriptions:
-        return disease_descriptions[disease_name]
-
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=[
-            f"""
-                Give a brief and clear overview of the disease: {disease_name}.
-                Include the following sections in order:
-                1. **Description** – What the disease is.
-                2. **Symptoms** – Key signs to look out for.
-                3. **Causes** – Main reasons it occurs.
-                4. **Precautions** – How to prevent or reduce risk.
-                5. **Medication** – Common treatments or medicines.
-                """
-        ],
-    )
-    if response.candidates:
-        disease_descriptions = json.load(open("cache/disease_descriptions.json", "r"))
-        disease_descriptions[disease_name] = response.text
-        with open("cache/disease_descriptions.json", "w") as file:
-            json.dump(disease_descriptions, file)
-    return response.text if response.candidates else "No description available."
-
-
-def clear_cache(password):
-    """
-    Clears the disease descriptions cache.
+        numpy.ndarray: Array of disease names.
     """
-    if password != PASSWORD:
-        return False
-    with open("cache/disease_descriptions.json", "w") as file:
-        json.dump({}, file)
-    return True
+    return disease_names[np.asarray(encoded_symptoms, dtype=np.intp)]
@@ -0,0 +1,178 @@
+"""
+Pre-generates every missing disease description before a deploy goes live.
+
+    python start.py warm-cache --concurrency 8 --batch-size 4
+
+Missing diseases are grouped into batches that share one Gemini prompt and
+sent with at most ``--concurrency`` calls in flight. Failed calls are retried
+with exponential backoff and jitter; diseases a batched response left out
+are retried one per prompt. Prints a JSON report with per-disease timings and
+exits with status 1 if any description could not be generated.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+
+from src.utils.data import diseases
+from src.utils import descriptions, metrics
+
+logger = logging.getLogger(__name__)
+
+CONCURRENCY = 8
+BATCH_SIZE = 4
+RETRIES = 4
+BACKOFF_SECONDS = 1.0
+
+
+async def _generate(prompt, retries, backoff):
+    """
+    Calls Gemini with retry.
+
+    Returns:
+        tuple: (response text, attempts made).
+    """
+    for attempt in range(1, retries + 2):
+        try:
+            client = descriptions.get_client()
+            with metrics.gemini_call("warm"):
+                response = await client.aio.models.generate_content(
+                    model=descriptions.GEMINI_MODEL, contents=[prompt]
+                )
+            if not response.candidates or not response.text:
+                raise ValueError("Empty Gemini response")
+            return response.text, attempt
+        except Exception as e:
+            if attempt > retries:
+                raise
+            delay = backoff * 2 ** (attempt - 1) * (1 + random.random() / 2)
+            logger.warning(f"Gemini call failed ({e}); retrying in {delay:.1f} s")
+            await asyncio.sleep(delay)
+
+
+async def _warm_batch(batch, semaphore, timings, retries, backoff):
+    """Generates and stores one batch; returns the diseases it missed."""
+    async with semaphore:
+        started = time.perf_counter()
+        if len(batch) == 1:
+            text, attempts = await _generate(
+                descriptions.build_prompt(batch[0]), retries, backoff
+            )
+            generated = {batch[0]: text}
+        else:
+            text, attempts = await _generate(
+                descriptions.build_batch_prompt(batch), retries, backoff
+            )
+            generated = descriptions.split_batch_response(text, batch)
+        seconds = time.perf_counter() - started
+
+    for disease_name, description in generated.items():
+        descriptions.store.put(disease_name, description)
+        timings[disease_name] = {
+            "seconds": round(seconds, 3),
+            "attempts": attempts,
+            "batch_size": len(batch),
+        }
+    return [name for name in batch if name not in generated]
+
+
+async def warm_cache(
+    disease_names=diseases,
+    concurrency=CONCURRENCY,
+    batch_size=BATCH_SIZE,
+    retries=RETRIES,
+    backoff=BACKOFF_SECONDS,
+):
+    """
+    Fills the description store for every disease that is not cached yet.
+
+    Args:
+        disease_names (list): Diseases to warm.
+        concurrency (int): Maximum Gemini calls in flight.
+        batch_size (int): Diseases asked for in one prompt.
+        retries (int): Retries per call after the first attempt.
+        backoff (float): Delay before the first retry, doubled each time.
+
+    Returns:
+        dict: Report with per-disease timings, failures and wall-clock time.
+    """
+    started = time.perf_counter()
+    disease_names = list(dict.fromkeys(disease_names))
+    missing = [name for name in disease_names if name not in descriptions.store]
+    semaphore = asyncio.Semaphore(concurrency)
+    timings = {}
+    failed = {}
+
+    async def run(batches):
+        results = await asyncio.gather(
+            *(
+                _warm_batch(batch, semaphore, timings, retries, backoff)
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+        left_out = []
+        for batch, result in zip(batches, results):
+            if isinstance(result, Exception):
+                for name in batch:
+                    failed[name] = str(result)
+            else:
+                left_out.extend(result)
+        return left_out
+
+    batches = [
+        missing[start : start + batch_size]
+        for start in range(0, len(missing), batch_size)
+    ]
+    left_out = await run(batches)
+    if left_out:
+        logger.warning(f"Retrying {len(left_out)} diseases one per prompt")
+        await run([[name] for name in left_out])
+
+    return {
+        "diseases": len(disease_names),
+        "already_cached": len(disease_names) - len(missing),
+        "generated": len(timings),
+        "failed": failed,
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "per_disease": timings,
+    }
+
+
+def _positive_int(value):
+    """argparse type for counts that must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="start.py warm-cache",
+        description="Generate every missing disease description.",
+    )
+    parser.add_argument("--concurrency", type=_positive_int, default=CONCURRENCY)
+    parser.add_argument("--batch-size", type=_positive_int, default=BATCH_SIZE)
+    parser.add_argument("--retries", type=int, default=RETRIES)
+    parser.add_argument("--backoff", type=float, default=BACKOFF_SECONDS)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(
+        warm_cache(
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            retries=args.retries,
+            backoff=args.backoff,
+        )
+    )
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["failed"] else 0)
@@ -16,7 +16,7 @@ def start_development():
     app.run(debug=True, host="127.0.0.1", port=5000)
 
 
-def start_production():
+def start_production(extra_args=(), app_path="wsgi:app"):
     """Start the application in production mode with Gunicorn."""
     import subprocess
 
@@ -27,7 +27,15 @@ def start_production():
     os.chdir(backend_dir)
 
     # Run Gunicorn with configuration file
-    cmd = [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "wsgi:app"]
+    cmd = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "--config",
+        "gunicorn.conf.py",
+        *extra_args,
+        app_path,
+    ]
 
     print("Starting production server with Gunicorn...")
     print(f"Command: {' '.join(cmd)}")
@@ -42,6 +50,33 @@ def start_production():
         sys.exit(0)
 
 
+def start_async():
+    """
+    Start Gunicorn with Uvicorn workers serving the ASGI entry point.
+
+    Description requests await Gemini on the event loop instead of blocking a
+    sync worker, so slow LLM calls no longer starve /predict.
+    """
+    start_production(
+        extra_args=["--worker-class", "uvicorn_worker.UvicornWorker"],
+        app_path="asgi:app",
+    )
+
+
+def warm_cache(argv):
+    """Generate every missing disease description, e.g. before a deploy."""
+    from src.utils.warm_cache import main
+
+    main(argv)
+
+
+def pack_model(argv):
+    """Write the trained forest in the compact packed format."""
+    from src.utils.packed_forest import main
+
+    main(argv)
+
+
 if __name__ == "__main__":
     # Check if we should run in production mode
     mode = os.environ.get("FLASK_ENV", "development").lower()
@@ -51,8 +86,14 @@ if __name__ == "__main__":
             start_production()
         elif sys.argv[1] == "dev" or sys.argv[1] == "development":
             start_development()
+        elif sys.argv[1] == "async":
+            start_async()
+        elif sys.argv[1] == "warm-cache":
+            warm_cache(sys.argv[2:])
+        elif sys.argv[1] == "pack-model":
+            pack_model(sys.argv[2:])
         else:
-            print("Usage: python start.py [dev|prod]")
+            print("Usage: python start.py [dev|prod|async|warm-cache|pack-model]")
             sys.exit(1)
     else:
         # Default behavior based on environment
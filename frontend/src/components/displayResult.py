@@ -61,6 +61,12 @@ def display_disease_disc(description_data):
         )
 
 
+def display_disease_disc_stream(chunks):
+    """Display the disease description progressively as chunks arrive"""
+    with st.expander("📖 Disease Description", expanded=True):
+        st.write_stream(chunks)
+
+
 def disclaimer():
     # Disclaimer
     st.markdown(
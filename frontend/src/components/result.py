@@ -1,10 +1,16 @@
 import streamlit as st
 import os
+import json
 import requests
 import time
 import asyncio
 import aiohttp
-from components.displayResult import display_result, display_disease_disc, disclaimer
+from components.displayResult import (
+    display_result,
+    display_disease_disc,
+    display_disease_disc_stream,
+    disclaimer,
+)
 from utils.constants import BACKEND_URL
 
 
@@ -39,6 +45,56 @@ async def fetch_disease_description(disease_name):
         return None
 
 
+def stream_disease_description(disease_name):
+    """Yield the disease description from the backend while it is generated"""
+    with requests.post(
+        f"{BACKEND_URL}/disease_description/stream",
+        json={"disease_name": disease_name},
+        stream=True,
+        timeout=(5, 20),  # Connect timeout, then at most 20s between chunks
+    ) as response:
+        response.raise_for_status()
+        event = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:") :].strip()
+            elif line.startswith("data:"):
+                payload = json.loads(line[len("data:") :])
+                if event == "done":
+                    return
+                if event == "error":
+                    raise RuntimeError(payload.get("error", "Description failed"))
+                yield payload["text"]
+            elif not line:
+                event = None
+
+
+def show_disease_description(disease_name):
+    """Render the description progressively, falling back to a single fetch"""
+    chunks = stream_disease_description(disease_name)
+    try:
+        first = next(chunks)
+    except StopIteration:
+        return
+    except (requests.exceptions.RequestException, RuntimeError):
+        # Older backends have no streaming route
+        description_data = asyncio.run(fetch_disease_description(disease_name))
+        if description_data:
+            display_disease_disc(description_data)
+        return
+
+    def rest():
+        yield first
+        try:
+            yield from chunks
+        except requests.exceptions.Timeout:
+            st.error("⏱️ The description stopped arriving. Please try again.")
+        except (requests.exceptions.RequestException, RuntimeError):
+            st.error("❌ The description could not be completed. Please try again.")
+
+    display_disease_disc_stream(rest())
+
+
 def result(selected_symptoms):
     # Prediction section with improved styling
     st.markdown(
@@ -77,10 +133,8 @@ def result(selected_symptoms):
                     disease = response.json()["disease"]
                     display_result(disease, selected_symptoms)
 
-                    # Fetch and display disease description asynchronously
-                    description_data = asyncio.run(fetch_disease_description(disease))
-                    if description_data:
-                        display_disease_disc(description_data)
+                    # Stream the disease description as it is generated
+                    show_disease_description(disease)
 
                     disclaimer()
                 else:
@@ -0,0 +1,70 @@
+"""
+Builds the exact-match case index served by the backend.
+
+Every distinct symptom vector in MultiDiseaseDataset.csv is stored, keyed by
+its bitmask (bit i set when column i is present), together with how often
+each diagnosis was recorded for it. Labels are indices into the sorted
+disease names, the same order LabelEncoder uses for the model.
+
+Run from this directory after changing the dataset:
+
+    python build_case_index.py
+"""
+
+import csv
+import json
+from collections import Counter, defaultdict
+
+DATASET = "MultiDiseaseDataset.csv"
+OUTPUT = "../backend/src/model/case_index.json"
+
+
+def column_names(header):
+    """
+    Names of the feature columns of the dataset's ``header``.
+
+    Repeated columns are named the way pandas does ("fluid_overload.1"),
+    which is how the model saw them during training.
+    """
+    seen = Counter()
+    columns = []
+    for name in header[:-1]:
+        columns.append(f"{name}.{seen[name]}" if seen[name] else name)
+        seen[name] += 1
+    return columns
+
+
+def main():
+    with open(DATASET, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+
+    columns = column_names(header)
+
+    classes = sorted({row[-1] for row in rows})
+    label_of = {name: index for index, name in enumerate(classes)}
+
+    cases = defaultdict(Counter)
+    for row in rows:
+        mask = 0
+        for column, value in enumerate(row[:-1]):
+            if value == "1":
+                mask |= 1 << column
+        cases[format(mask, "x")][label_of[row[-1]]] += 1
+
+    with open(OUTPUT, "w") as f:
+        json.dump(
+            {
+                "columns": columns,
+                "classes": classes,
+                "cases": {mask: dict(counts) for mask, counts in sorted(cases.items())},
+            },
+            f,
+        )
+
+    print(f"{len(rows)} rows, {len(cases)} distinct symptom vectors -> {OUTPUT}")
+
+
+if __name__ == "__main__":
+    main()
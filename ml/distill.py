@@ -0,0 +1,193 @@
+"""
+Distills the trained forest into a single decision tree for the backend's
+student fast path (``STUDENT=1``).
+
+The student is fitted to what the forest (the teacher) predicts, not to the
+dataset labels, on a transfer set of training rows and of variations of them
+that users actually send: rows with only some of their symptoms kept and
+rows with one symptom added or removed. The test rows of the notebook's
+split (``train_size=0.8, random_state=100``) are never seen.
+
+Every leaf also gets a confidence: how often its label agreed with the
+teacher on a separate draw of such variations, ``agreements / (rows + 1)``,
+so a leaf that saw little calibration data stays below any useful
+threshold. The backend answers with the student only on leaves at or above
+``min_confidence`` and asks the forest otherwise.
+
+The report printed (and stored in the output) gives, on the held-out rows
+and their variations, the fidelity of the student to the teacher, the
+accuracy of both against the recorded diagnosis, and the coverage and
+fidelity of the student at a few confidence thresholds.
+
+Run from this directory after retraining:
+
+    python distill.py
+"""
+
+import argparse
+import csv
+import json
+import sys
+import warnings
+
+import numpy as np
+from joblib import load
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from build_case_index import column_names
+
+# The backend hashes the model the same way when it checks the output
+sys.path.insert(0, "../backend")
+from src.utils.hashing import file_digest
+
+DATASET = "MultiDiseaseDataset.csv"
+MODEL = "../backend/src/model/model.joblib"
+OUTPUT = "../backend/src/model/student.json"
+THRESHOLDS = (0.9, 0.95, 0.98, 0.99)
+
+
+def partial(rows, copies, rng):
+    """Copies of ``rows`` keeping a random non-empty subset of their symptoms."""
+    out = np.repeat(rows, copies, axis=0)
+    for row in out:
+        present = np.flatnonzero(row)
+        row[rng.permutation(present)[rng.integers(1, len(present) + 1) :]] = 0
+    return out
+
+
+def flipped(rows, copies, rng):
+    """Copies of ``rows`` with one random symptom added or removed."""
+    out = np.repeat(rows, copies, axis=0)
+    out[np.arange(len(out)), rng.integers(rows.shape[1], size=len(out))] ^= 1
+    return out
+
+
+def variations(rows, labels, copies, rng):
+    """Partial and one-flip variations, each with the label of its source row."""
+    rows = np.vstack([partial(rows, copies, rng), flipped(rows, copies, rng)])
+    labels = np.tile(np.repeat(labels, copies), 2)
+    keep = rows.any(axis=1)
+    return rows[keep], labels[keep]
+
+
+def evaluate(student, confidence, teacher, rows, labels):
+    """Fidelity and accuracy of the student, alone and gated by confidence."""
+    expected = teacher.predict(rows)
+    predicted = student.predict(rows)
+    leaf_confidence = confidence[student.apply(rows)]
+    report = {
+        "rows": len(rows),
+        "teacher_accuracy": round(float((expected == labels).mean()), 4),
+        "student_accuracy": round(float((predicted == labels).mean()), 4),
+        "fidelity": round(float((predicted == expected).mean()), 4),
+        "thresholds": {},
+    }
+    for threshold in THRESHOLDS:
+        answered = leaf_confidence >= threshold
+        served = np.where(answered, predicted, expected)
+        report["thresholds"][str(threshold)] = {
+            "coverage": round(float(answered.mean()), 4),
+            "fidelity": round(float((served == expected).mean()), 6),
+            "accuracy": round(float((served == labels).mean()), 4),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--max-depth", type=int, default=10)
+    parser.add_argument(
+        "--copies", type=int, default=10, help="Variations of each training row"
+    )
+    parser.add_argument(
+        "--min-confidence",
+        type=float,
+        default=0.98,
+        help="Leaf confidence the backend requires by default",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=OUTPUT)
+    args = parser.parse_args()
+
+    with open(DATASET, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        rows = list(reader)
+
+    columns = column_names(header)
+
+    classes = sorted({row[-1] for row in rows})
+    features = np.array([row[:-1] for row in rows], dtype=np.uint8)
+    labels = np.searchsorted(classes, [row[-1] for row in rows])
+    x_train, x_test, y_train, y_test = train_test_split(
+        features, labels, train_size=0.8, random_state=100
+    )
+
+    digest = file_digest(MODEL)
+    # The forest was fitted on a DataFrame; it is scored on plain arrays here
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        teacher = load(MODEL)
+
+    rng = np.random.default_rng(args.seed)
+    transfer = np.vstack([x_train, variations(x_train, y_train, args.copies, rng)[0]])
+    student = DecisionTreeClassifier(
+        criterion="entropy", max_depth=args.max_depth, random_state=args.seed
+    ).fit(transfer, teacher.predict(transfer))
+
+    tree = student.tree_
+    is_leaf = tree.children_left < 0
+    if not np.all((tree.threshold[~is_leaf] > 0) & (tree.threshold[~is_leaf] < 1)):
+        raise ValueError("Expected every split to separate 0 from 1")
+
+    calibration, _ = variations(x_train, y_train, args.copies, rng)
+    leaves = student.apply(calibration)
+    agreements = np.bincount(
+        leaves,
+        weights=student.predict(calibration) == teacher.predict(calibration),
+        minlength=tree.node_count,
+    )
+    confidence = agreements / (np.bincount(leaves, minlength=tree.node_count) + 1)
+
+    held_out_variations = variations(
+        x_test, y_test, 5, np.random.default_rng(args.seed + 1)
+    )
+    report = {
+        "nodes": int(tree.node_count),
+        "leaves": int(is_leaf.sum()),
+        "depth": int(student.get_depth()),
+        "transfer_rows": len(transfer),
+        "calibration_rows": len(calibration),
+        "held_out": evaluate(student, confidence, teacher, x_test, y_test),
+        "held_out_variations": evaluate(
+            student, confidence, teacher, *held_out_variations
+        ),
+    }
+
+    leaf_labels = student.classes_[tree.value[:, 0, :].argmax(axis=1)]
+    with open(args.output, "w") as f:
+        json.dump(
+            {
+                "columns": columns,
+                "classes": classes,
+                "teacher_sha256": digest,
+                "min_confidence": args.min_confidence,
+                # Bit ``feature`` set -> right child; -1 marks a leaf
+                "feature": np.where(is_leaf, -1, tree.feature).tolist(),
+                "left": tree.children_left.tolist(),
+                "right": tree.children_right.tolist(),
+                "label": np.where(is_leaf, leaf_labels, -1).tolist(),
+                "confidence": np.round(confidence, 4).tolist(),
+                "report": report,
+            },
+            f,
+        )
+
+    print(json.dumps(report, indent=2))
+    print(f"{report['nodes']} nodes, depth {report['depth']} -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
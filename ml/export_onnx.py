@@ -0,0 +1,52 @@
+"""
+Exports the trained forest to ONNX for the backend's ``onnx`` inference
+backend (``INFERENCE_BACKEND=onnx``).
+
+The graph takes a float32 matrix ``input`` of shape (n_rows, n_features) and
+returns ``label`` and a plain ``probabilities`` matrix (no ZipMap), in the
+model's class order. The SHA-256 of the joblib file is stored in the model's
+metadata, so the backend refuses an export of a different model.
+
+Needs skl2onnx (``pip install skl2onnx``). Run from this directory after
+retraining:
+
+    python export_onnx.py
+"""
+
+import sys
+import warnings
+
+from joblib import load
+from skl2onnx import to_onnx
+from skl2onnx.common.data_types import FloatTensorType
+
+# The backend hashes the model the same way when it checks the output
+sys.path.insert(0, "../backend")
+from src.utils.hashing import file_digest
+
+MODEL = "../backend/src/model/model.joblib"
+OUTPUT = "../backend/src/model/model.onnx"
+
+digest = file_digest(MODEL)
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    model = load(MODEL)
+
+onnx_model = to_onnx(
+    model,
+    initial_types=[("input", FloatTensorType([None, model.n_features_in_]))],
+    options={id(model): {"zipmap": False}},
+)
+onnx_model.doc_string = "Disease classifier exported from model.joblib"
+entry = onnx_model.metadata_props.add()
+entry.key = "source_sha256"
+entry.value = digest
+
+with open(OUTPUT, "wb") as f:
+    f.write(onnx_model.SerializeToString())
+
+print(
+    f"{len(model.estimators_)} trees, {model.n_features_in_} features, "
+    f"{len(model.classes_)} classes -> {OUTPUT}"
+)